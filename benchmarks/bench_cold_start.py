@@ -0,0 +1,106 @@
+# benchmarks/bench_cold_start.py
+#
+# Cold-start benchmark: `import engine` time and first-invoke time, each
+# measured in a fresh interpreter against the in-process mock gateway.
+#
+# --ref measures another revision (e.g. the commit before the lazy factory)
+# by exporting it with `git archive` into a temporary directory, so before /
+# after numbers come from the same machine and the same probe.
+#
+# Usage:
+#   python benchmarks/bench_cold_start.py
+#   python benchmarks/bench_cold_start.py --ref HEAD~1 --repeat 5
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, "benchmarks"))
+
+from mock_llm_server import MockConfig, MockLLMServer  # noqa: E402
+
+# Runs inside the fresh interpreter; works for trees with or without build_app
+PROBE = r"""
+import json, sys, time
+t0 = time.perf_counter()
+import engine
+t_import = time.perf_counter() - t0
+heavy = sorted(m for m in ("openai", "langgraph") if m in sys.modules)
+
+t1 = time.perf_counter()
+if hasattr(engine, "build_app"):
+    app = engine.build_app()
+else:
+    from openai import OpenAI
+    engine.client = OpenAI(api_key="mock", base_url=sys.argv[1])  # older trees ignore LLM_BASE_URL
+    app = engine.app
+app.invoke({"wendys_active": ["BOGO"]})
+t_first = time.perf_counter() - t1
+
+print(json.dumps({"import_s": t_import, "first_invoke_s": t_first, "heavy_modules_after_import": heavy}))
+"""
+
+
+def export_ref(ref, target):
+    archive = subprocess.run(["git", "-C", REPO_ROOT, "archive", ref], check=True, capture_output=True).stdout
+    subprocess.run(["tar", "-x", "-C", target], input=archive, check=True)
+
+
+def probe(tree, base_url):
+    env = dict(os.environ)
+    env.update(
+        OPENAI_API_KEY="mock",
+        LLM_BASE_URL=base_url,
+        LLM_CACHE_NODES="",
+        LLM_CACHE_PATH="",
+        PYTHONDONTWRITEBYTECODE="1"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-c", PROBE, base_url],
+        cwd=tree, env=env, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"probe failed in {tree}:\n{proc.stderr[-2000:]}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def measure(tree, base_url, repeat):
+    runs = [probe(tree, base_url) for _ in range(repeat)]
+    return {
+        "import_s": statistics.median(r["import_s"] for r in runs),
+        "first_invoke_s": statistics.median(r["first_invoke_s"] for r in runs),
+        "heavy_modules_after_import": runs[-1]["heavy_modules_after_import"]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure engine import and first-invoke time")
+    parser.add_argument("--ref", default=None, help="also measure this git revision for comparison")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", default=None)
+    args = parser.parse_args()
+
+    results = {}
+    with MockLLMServer(MockConfig(latency="fixed:0.05", tokens_per_second=0)) as mock:
+        if args.ref:
+            with tempfile.TemporaryDirectory() as tmp:
+                export_ref(args.ref, tmp)
+                results[args.ref] = measure(tmp, mock.url, args.repeat)
+        results["working tree"] = measure(REPO_ROOT, mock.url, args.repeat)
+
+    print(f"{'tree':<16} {'import_s':>9} {'first_invoke_s':>15}  heavy modules after import")
+    for name, r in results.items():
+        print(f"{name:<16} {r['import_s']:>9.3f} {r['first_invoke_s']:>15.3f}  {', '.join(r['heavy_modules_after_import']) or '-'}")
+
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# benchmarks/bench_context_windows.py
+#
+# Parity + timing check: top-K context-window engine vs the original
+# loop-over-every-group implementation from market_context_analyst.
+#
+# Usage:
+#   python benchmarks/bench_context_windows.py [rows ...]
+
+import os
+import sys
+import time
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scoring import score_context_windows  # noqa: E402
+from signal_generator import generate_market_signals  # noqa: E402
+
+TODAY = date(2026, 1, 24)
+
+
+def legacy_windows(df):
+    """The original loop: one dict per group, normalize all, sort all, keep 5."""
+    windows = []
+    for keys, group in df.groupby(["trend_type", "season", "daypart", "situation"], observed=True):
+        windows.append({
+            "signal_id": f"CTX-{group.index[0]}",
+            "trend": keys[0],
+            "season": keys[1],
+            "daypart": keys[2],
+            "situation": keys[3],
+            "timing_strength": round(group["weight"].sum(), 2)
+        })
+
+    max_strength = max(w["timing_strength"] for w in windows)
+    for w in windows:
+        w["relevance_score"] = round((w["timing_strength"] / max_strength) * 10, 1)
+        w["confidence"] = round(min(1.0, w["timing_strength"] / (0.75 * max_strength)), 2)
+        w["action"] = "Act Now" if w["relevance_score"] >= 7 else "Monitor"
+
+    return sorted(windows, key=lambda x: x["relevance_score"], reverse=True)[:5]
+
+
+def weighted_signals(rows, seed):
+    df = generate_market_signals(TODAY, size=rows, seed=seed)
+    df["weight"] = np.exp(-0.05 * (pd.Timestamp(TODAY) - df["observed_date"]).dt.days)
+    return df
+
+
+def main(sizes):
+    print(f"{'rows':>10} {'legacy_s':>10} {'topk_s':>10} {'speedup':>8}")
+    for rows in sizes:
+        df = weighted_signals(rows, seed=42)
+
+        start = time.perf_counter()
+        legacy = legacy_windows(df)
+        legacy_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        windows = score_context_windows(df)
+        topk_s = time.perf_counter() - start
+
+        assert windows == legacy, "top-K windows differ from the legacy output"
+        print(f"{rows:>10} {legacy_s:>10.4f} {topk_s:>10.4f} {legacy_s / topk_s:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [900, 50_000, 1_000_000])
@@ -0,0 +1,89 @@
+# benchmarks/bench_customer_metrics.py
+#
+# Parity + timing check: integer-coded redemption analytics vs the original
+# list-of-dicts + Counter metrics from customer_analyst_node.
+#
+# The legacy path is timed from the per-row dicts it used to build
+# (legacy_s) and from the generator's categorical frame the node now holds
+# (legacy_frame_s, which adds the frame -> dicts conversion); the columnar
+# path always starts from that frame. Each time is the best of --repeats
+# runs, so one-off import and allocation costs don't decide small sizes.
+# At the node's default 100-row sample the dict-based Counter is faster
+# than the columnar path, but both are far below a millisecond next to the
+# LLM call that follows, and only the columnar path scales to the tens of
+# millions of rows a real redemption feed has. Legacy sizes above 1M rows
+# are skipped (the dicts alone need several GB).
+#
+# Usage:
+#   python benchmarks/bench_customer_metrics.py [rows ...] [--repeats 5]
+
+import argparse
+import os
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from redemption_analytics import RedemptionAnalytics  # noqa: E402
+from signal_generator import generate_redemption_logs  # noqa: E402
+
+LEGACY_MAX_ROWS = 1_000_000
+
+
+def legacy_metrics(logs):
+    """The original computation: list-comprehension filter + Counter shares."""
+    redeemed_logs = [l for l in logs if l["coupon_used"]]
+    total_redemptions = len(redeemed_logs)
+    segment_counts = Counter(l["customer_type"] for l in redeemed_logs)
+    channel_counts = Counter(l["channel"] for l in redeemed_logs)
+    return {
+        "total_redemptions": total_redemptions,
+        "segment_share": {seg: round(cnt / total_redemptions, 3) for seg, cnt in segment_counts.items()},
+        "channel_share": {ch: round(cnt / total_redemptions, 3) for ch, cnt in channel_counts.items()}
+    }
+
+
+def best_of(repeats, fn):
+    """(result, best wall seconds) over repeats calls."""
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return result, min(times)
+
+
+def to_records(df):
+    return df.astype({"customer_type": object, "channel": object}).to_dict("records")
+
+
+def main(sizes, repeats):
+    print(f"{'rows':>10} {'legacy_s':>10} {'legacy_frame_s':>15} {'columnar_s':>11} {'speedup':>8} {'vs_frame':>9}")
+    for rows in sizes:
+        df = generate_redemption_logs(rows, seed=42)
+        runs = repeats if rows <= LEGACY_MAX_ROWS else 1
+
+        metrics, columnar_s = best_of(runs, lambda: RedemptionAnalytics().add_frame(df).metrics())
+
+        if rows > LEGACY_MAX_ROWS:
+            print(f"{rows:>10} {'skipped':>10} {'skipped':>15} {columnar_s:>11.5f} {'-':>8} {'-':>9}")
+            continue
+
+        logs = to_records(df)
+        legacy, legacy_s = best_of(runs, lambda: legacy_metrics(logs))
+        _, legacy_frame_s = best_of(runs, lambda: legacy_metrics(to_records(df)))
+
+        # Same numbers; only the key order (vocabulary vs first-seen) may differ
+        for key in legacy:
+            assert legacy[key] == metrics[key], (rows, key, legacy[key], metrics[key])
+        print(f"{rows:>10} {legacy_s:>10.5f} {legacy_frame_s:>15.5f} {columnar_s:>11.5f} "
+              f"{legacy_s / columnar_s:>7.1f}x {legacy_frame_s / columnar_s:>8.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Columnar redemption analytics vs the legacy Counter metrics")
+    parser.add_argument("rows", nargs="*", type=int, default=[100, 1_000, 100_000, 1_000_000, 10_000_000, 50_000_000])
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+    main(args.rows, args.repeats)
@@ -0,0 +1,117 @@
+# benchmarks/bench_design_modes.py
+#
+# Two-hop (design -> validate) vs single-hop structured design.
+#
+# Both graphs run sequentially on the same seeded inputs against an
+# in-process mock gateway, so the difference is the removed validator round
+# trip (plus any repair calls the structured designer needed).
+#
+# Usage:
+#   python benchmarks/bench_design_modes.py --runs 20 --latency lognormal:0.8,0.5
+#   python benchmarks/bench_design_modes.py --runs 50 --tokens-per-second 40 --json design_modes.json
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from load_test import NodeTimer, summarize  # noqa: E402
+from mock_llm_server import MockConfig, MockLLMServer  # noqa: E402
+
+MODES = {
+    "two_hop": {},
+    "structured": {"structured_design": True}
+}
+
+
+class RequestCounter:
+    """Counts gateway requests by wrapping the mock's response synthesis."""
+
+    def __init__(self, server):
+        self.count = 0
+        self._lock = threading.Lock()
+        content = server._content
+
+        def counted(body, tokens):
+            with self._lock:
+                self.count += 1
+            return content(body, tokens)
+
+        server._content = counted
+
+
+def run_mode(engine, flags, inputs, counter):
+    timer = NodeTimer()
+    app = engine.build_graph(async_nodes=False, node_wrapper=timer, **flags).compile()
+
+    latencies = []
+    requests_before = counter.count
+    for payload in inputs:
+        start = time.perf_counter()
+        app.invoke(payload)
+        latencies.append(time.perf_counter() - start)
+
+    return {
+        "end_to_end": summarize(latencies),
+        "llm_calls_per_run": (counter.count - requests_before) / len(inputs),
+        "nodes": {name: summarize(s)["mean"] for name, s in sorted(timer.samples.items())}
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency of two-hop vs structured single-hop design")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--latency", default=MockConfig.latency)
+    parser.add_argument("--tokens-per-second", type=float, default=MockConfig.tokens_per_second)
+    parser.add_argument("--active", default="BOGO", help="comma-separated wendys_active promos")
+    parser.add_argument("--json", default=None, help="write the report to this path")
+    args = parser.parse_args()
+
+    mock = MockLLMServer(MockConfig(latency=args.latency, tokens_per_second=args.tokens_per_second, seed=0)).start()
+    counter = RequestCounter(mock)
+
+    # The engine reads its settings at import time
+    os.environ["LLM_BASE_URL"] = mock.url
+    os.environ.setdefault("OPENAI_API_KEY", "mock")
+    os.environ["LLM_CACHE_NODES"] = ""   # measure the gateway, not the cache
+    os.environ["LLM_CACHE_PATH"] = ""
+
+    import engine  # noqa: E402
+
+    active = [p for p in args.active.split(",") if p]
+    inputs = [{"wendys_active": active, "signal_seed": i} for i in range(args.runs)]
+
+    report = {"runs": args.runs, "latency": args.latency, "tokens_per_second": args.tokens_per_second, "modes": {}}
+    for mode, flags in MODES.items():
+        report["modes"][mode] = run_mode(engine, flags, inputs, counter)
+    mock.stop()
+
+    print(f"runs={args.runs} latency={args.latency} tokens_per_second={args.tokens_per_second:g}")
+    print(f"{'mode':<12} {'p50_s':>8} {'p95_s':>8} {'mean_s':>8} {'llm_calls':>10}")
+    for mode, result in report["modes"].items():
+        e2e = result["end_to_end"]
+        print(f"{mode:<12} {e2e['p50']:>8.3f} {e2e['p95']:>8.3f} {e2e['mean']:>8.3f} {result['llm_calls_per_run']:>10.2f}")
+
+    nodes = sorted({n for result in report["modes"].values() for n in result["nodes"]})
+    print(f"\n{'node mean_s':<12} " + " ".join(f"{mode:>12}" for mode in report["modes"]))
+    for node in nodes:
+        cells = [result["nodes"].get(node) for result in report["modes"].values()]
+        print(f"{node:<12} " + " ".join(f"{c:>12.3f}" if c is not None else f"{'-':>12}" for c in cells))
+
+    two_hop, structured = report["modes"]["two_hop"]["end_to_end"], report["modes"]["structured"]["end_to_end"]
+    report["p50_saving"] = 1 - structured["p50"] / two_hop["p50"]
+    report["p95_saving"] = 1 - structured["p95"] / two_hop["p95"]
+    print(f"\nstructured vs two-hop: p50 {100 * report['p50_saving']:.1f}% faster, "
+          f"p95 {100 * report['p95_saving']:.1f}% faster")
+
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(report, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+# benchmarks/bench_fanout.py
+#
+# Offer throughput of the fan-out design stage vs its concurrency limit.
+#
+# The fan-out graph (one designer call per context window x strategy, then
+# batched brand validation) runs on the same seeded inputs against an
+# in-process mock gateway at each --concurrency value; the limit is the
+# compiled graph's max_concurrency, exactly as build_app(fanout_design=True)
+# applies EngineConfig.design_concurrency. Each designer prompt carries one
+# window / strategy, so prompt tokens per call stay flat while offers per
+# second should follow the limit until the gateway latency is fully hidden.
+#
+# Usage:
+#   python benchmarks/bench_fanout.py --runs 5 --latency fixed:0.5
+#   python benchmarks/bench_fanout.py --concurrency 1,4,16 --tokens-per-second 40 --json fanout.json
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_design_modes import RequestCounter  # noqa: E402
+from load_test import summarize  # noqa: E402
+from mock_llm_server import MockConfig, MockLLMServer  # noqa: E402
+
+
+def _report(latencies, offers, calls, runs):
+    return {
+        "end_to_end": summarize(latencies),
+        "offers_per_run": offers / runs,
+        "offers_per_second": offers / sum(latencies),
+        "llm_calls_per_run": calls / runs
+    }
+
+
+def _app(engine, limit, async_nodes):
+    return engine.build_graph(async_nodes=async_nodes, fanout_design=True).compile().with_config(max_concurrency=limit)
+
+
+def run_limit(engine, limit, inputs, counter):
+    app = _app(engine, limit, async_nodes=False)
+    latencies, offers = [], 0
+    requests_before = counter.count
+    for payload in inputs:
+        start = time.perf_counter()
+        offers += len(app.invoke(payload)["structured_concepts"])
+        latencies.append(time.perf_counter() - start)
+    return _report(latencies, offers, counter.count - requests_before, len(inputs))
+
+
+async def arun_limit(engine, limit, inputs, counter):
+    app = _app(engine, limit, async_nodes=True)
+    latencies, offers = [], 0
+    requests_before = counter.count
+    for payload in inputs:
+        start = time.perf_counter()
+        offers += len((await app.ainvoke(payload))["structured_concepts"])
+        latencies.append(time.perf_counter() - start)
+    return _report(latencies, offers, counter.count - requests_before, len(inputs))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fan-out design throughput vs concurrency limit")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--concurrency", default="1,2,4,8,16", help="comma-separated max_concurrency values")
+    parser.add_argument("--latency", default="fixed:0.5")
+    parser.add_argument("--tokens-per-second", type=float, default=0)
+    parser.add_argument("--async-nodes", action="store_true", help="run the async node variants")
+    parser.add_argument("--active", default="BOGO", help="comma-separated wendys_active promos")
+    parser.add_argument("--json", default=None, help="write the report to this path")
+    args = parser.parse_args()
+
+    mock = MockLLMServer(MockConfig(latency=args.latency, tokens_per_second=args.tokens_per_second, seed=0)).start()
+    counter = RequestCounter(mock)
+
+    # The engine reads its settings at import time
+    os.environ["LLM_BASE_URL"] = mock.url
+    os.environ.setdefault("OPENAI_API_KEY", "mock")
+    os.environ["LLM_CACHE_NODES"] = ""   # measure the gateway, not the cache
+    os.environ["LLM_CACHE_PATH"] = ""
+
+    import contextlib
+    import io
+
+    import engine  # noqa: E402
+    from prompts import message_tokens  # noqa: E402
+
+    active = [p for p in args.active.split(",") if p]
+    inputs = [{"wendys_active": active, "signal_seed": i} for i in range(args.runs)]
+    limits = [int(c) for c in args.concurrency.split(",")]
+
+    report = {"runs": args.runs, "latency": args.latency, "tokens_per_second": args.tokens_per_second, "limits": {}}
+    with contextlib.redirect_stdout(io.StringIO()):   # nodes print progress lines
+        if args.async_nodes:
+            # One event loop for every limit so each limit reuses the loop's warm gateway connections
+            async def driver():
+                return {limit: await arun_limit(engine, limit, inputs, counter) for limit in limits}
+            report["limits"] = asyncio.run(driver())
+        else:
+            report["limits"] = {limit: run_limit(engine, limit, inputs, counter) for limit in limits}
+
+        # Prompt size per designer call, from one run's tasks (the final state holds their inputs)
+        state = engine.build_graph(fanout_design=True).compile().invoke(inputs[0])
+        tokens = [message_tokens(engine._pair_designer_request(send.arg)["messages"])
+                  for send in engine.fan_out_designs(state)]
+    mock.stop()
+    report["design_prompt_tokens"] = summarize(tokens)
+
+    print(f"runs={args.runs} latency={args.latency} tokens_per_second={args.tokens_per_second:g} "
+          f"design prompt tokens mean={report['design_prompt_tokens']['mean']:.0f} max={max(tokens)}")
+    print(f"{'limit':>6} {'p50_s':>8} {'mean_s':>8} {'offers':>7} {'llm_calls':>10} {'offers_s':>9} {'speedup':>8}")
+    base = report["limits"][limits[0]]["offers_per_second"]
+    for limit, result in report["limits"].items():
+        e2e = result["end_to_end"]
+        print(f"{limit:>6} {e2e['p50']:>8.3f} {e2e['mean']:>8.3f} {result['offers_per_run']:>7.1f} "
+              f"{result['llm_calls_per_run']:>10.1f} {result['offers_per_second']:>9.2f} "
+              f"{result['offers_per_second'] / base:>7.2f}x")
+
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(report, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+# benchmarks/bench_ingestion.py
+#
+# Chunked file ingestion: throughput and peak memory vs file size.
+#
+# Synthetic competitor and market exports of each size are written chunk by
+# chunk (so writing never holds the whole file), then every (rows, format)
+# point is ingested in a fresh subprocess. With bounded chunks, peak RSS
+# should stay flat as the file grows.
+#
+# Usage:
+#   python benchmarks/bench_ingestion.py [--rows 100000,1000000,5000000] [--formats csv,parquet] [--json ingestion.json]
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ingestion import DEFAULT_CHUNK_ROWS, ingest_signals  # noqa: E402
+from signal_generator import generate_competitor_signals, generate_market_signals  # noqa: E402
+
+AS_OF = "2026-01-31"
+WRITE_CHUNK = 500_000
+
+
+def write_file(path, generate, rows, file_format):
+    """Appends generator chunks to path; returns its size in bytes."""
+    if file_format == "parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        writer = None
+        for offset in range(0, rows, WRITE_CHUNK):
+            df = generate(AS_OF, size=min(WRITE_CHUNK, rows - offset), seed=offset)
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            writer = writer or pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+        writer.close()
+    else:
+        for offset in range(0, rows, WRITE_CHUNK):
+            df = generate(AS_OF, size=min(WRITE_CHUNK, rows - offset), seed=offset)
+            if file_format == "csv":
+                df.to_csv(path, mode="a", header=offset == 0, index=False, date_format="%Y-%m-%d")
+            else:
+                with open(path, "a") as fh:
+                    df.to_json(fh, orient="records", lines=True, date_format="iso")
+    return os.path.getsize(path)
+
+
+def peak_rss_mb():
+    """This process's high-water RSS. VmHWM, because ru_maxrss survives exec and would
+    report the parent's peak from writing the files."""
+    try:
+        with open("/proc/self/status") as fh:
+            for line in fh:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def child(competitor, market, chunk_rows):
+    start = time.perf_counter()
+    aggregator, reports = ingest_signals([competitor], [market], as_of=AS_OF, chunk_rows=chunk_rows)
+    seconds = time.perf_counter() - start
+    windows = aggregator.market_context_windows()
+    return {
+        "seconds": seconds,
+        "rows": sum(r.rows_read for r in reports),
+        "rows_accepted": sum(r.rows_accepted for r in reports),
+        "chunks": sum(r.chunks for r in reports),
+        "peak_rss_mb": peak_rss_mb(),
+        "top_window": windows[0]["signal_id"] if windows else None
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chunked ingestion throughput and peak memory")
+    parser.add_argument("--rows", default="100000,1000000,5000000", help="comma-separated rows per file")
+    parser.add_argument("--formats", default="csv,parquet", help="comma-separated: csv, jsonl, parquet")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument("--json", default=None)
+    parser.add_argument("--child", nargs=2, metavar=("COMPETITOR", "MARKET"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(child(*args.child, chunk_rows=args.chunk_rows)))
+        return
+
+    results = []
+    print(f"{'rows/file':>10} {'format':<8} {'file_MB':>8} {'seconds':>8} {'rows/s':>10} {'peak_MB':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in (int(r) for r in args.rows.split(",")):
+            for file_format in args.formats.split(","):
+                competitor = os.path.join(tmp, f"competitor.{file_format}")
+                market = os.path.join(tmp, f"market.{file_format}")
+                size = (write_file(competitor, generate_competitor_signals, rows, file_format)
+                        + write_file(market, generate_market_signals, rows, file_format))
+
+                proc = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), "--chunk-rows", str(args.chunk_rows),
+                     "--child", competitor, market],
+                    capture_output=True, text=True, check=True
+                )
+                r = json.loads(proc.stdout.strip().splitlines()[-1])
+                r.update(rows_per_file=rows, format=file_format, file_mb=size / 2 ** 20)
+                results.append(r)
+                print(f"{rows:>10} {file_format:<8} {r['file_mb']:>8.1f} {r['seconds']:>8.2f} "
+                      f"{r['rows'] / r['seconds']:>10.0f} {r['peak_rss_mb']:>8.0f}")
+                os.remove(competitor)
+                os.remove(market)
+
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+# benchmarks/bench_montecarlo.py
+#
+# Monte Carlo score intervals: worker scaling and ranking stability.
+#
+# Scaling: the same seeded replica set is sampled with 1..N worker processes
+# (pools are warmed first, so process start-up is excluded); results are
+# bit-identical across worker counts, so only the wall time differs.
+#
+# Stability: for several pairs of independent seeds, the relevance score of
+# every context window from a single draw (what market_context_analyst
+# scores) and from the Monte Carlo mean are compared between the two seeds
+# (mean absolute difference, on the 0-10 scale): the replica mean is the
+# score that stays put. Top-K overlap (Jaccard of the window keys) is
+# reported too, with the mean top_k_rate of the Monte Carlo windows; with
+# the uniform synthetic generator every window has the same expected
+# strength, so the top K is a tie that no number of replicas can settle,
+# and low overlap for both rankings is what that data should show.
+#
+# Usage:
+#   python benchmarks/bench_montecarlo.py [--replicas 400] [--workers 1,2,4,8] [--json montecarlo.json]
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+import engine  # noqa: E402
+from montecarlo import MonteCarloSampler, window_evidence  # noqa: E402
+from scoring import CONTEXT_DIMENSIONS, CONTEXT_TOP_K, score_context_windows  # noqa: E402
+from signal_generator import DAYPARTS, SEASONS, SITUATIONS, TREND_TYPES  # noqa: E402
+
+WINDOW_KEYS = ("trend", "season", "daypart", "situation")
+
+
+def sample(sampler, replicas, seed):
+    return sampler.sample(replicas, seed, engine.TODAY, engine.COMPETITOR_SAMPLE_SIZE,
+                          engine.MARKET_SAMPLE_SIZE, CONTEXT_DIMENSIONS)
+
+
+def scaling(replicas, worker_counts, repeats):
+    rows, reference = [], None
+    for workers in worker_counts:
+        sampler = MonteCarloSampler(workers=workers, cache_size=0)
+        sample(sampler, workers, seed=0)   # start the pool
+        times = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            values = sample(sampler, replicas, seed=1).values
+            times.append(time.perf_counter() - start)
+        sampler.shutdown()
+
+        reference = values if reference is None else reference
+        rows.append({
+            "workers": workers,
+            "seconds": min(times),
+            "replicas_per_second": replicas / min(times),
+            "identical": bool(np.array_equal(reference, values))
+        })
+    base = rows[0]["seconds"]
+    for row in rows:
+        row["speedup"] = base / row["seconds"]
+        row["efficiency"] = row["speedup"] / row["workers"]
+    return rows
+
+
+def top_keys(windows):
+    return {tuple(w[key] for key in WINDOW_KEYS) for w in windows}
+
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b) if a | b else 1.0
+
+
+def relevance(windows):
+    return {tuple(w[key] for key in WINDOW_KEYS): w["relevance_score"] for w in windows}
+
+
+def drift(a, b):
+    """Mean absolute relevance difference over the windows scored in both draws."""
+    common = a.keys() & b.keys()
+    return float(np.mean([abs(a[key] - b[key]) for key in common]))
+
+
+def stability(replicas, pairs, workers):
+    sampler = MonteCarloSampler(workers=workers)
+    point, monte_carlo, point_drift, monte_carlo_drift, rates = [], [], [], [], []
+    every = len(TREND_TYPES) * len(SEASONS) * len(DAYPARTS) * len(SITUATIONS)   # score all windows for the drift
+    for pair in range(pairs):
+        draws = []
+        for seed in (pair, 10_000 + pair):
+            raw = engine.market_context_generator({"signal_seed": seed})["raw_market_signals"]
+            df = raw.to_pandas(columns=CONTEXT_DIMENSIONS + ["observed_date"])
+            df["weight"] = np.exp(-engine.RECENCY_DECAY * (pd.Timestamp(engine.TODAY) - df["observed_date"]).dt.days)
+            evidence, samples = window_evidence(df, CONTEXT_DIMENSIONS), sample(sampler, replicas, seed)
+            single = score_context_windows(df, dims=CONTEXT_DIMENSIONS, k=every)
+            top = samples.windows(evidence, k=CONTEXT_TOP_K)
+            draws.append((single, samples.windows(evidence, k=every), top))
+            rates += [w["top_k_rate"] for w in top]
+        (single_a, stable_a, top_a), (single_b, stable_b, top_b) = draws
+        point.append(jaccard(top_keys(single_a[:CONTEXT_TOP_K]), top_keys(single_b[:CONTEXT_TOP_K])))
+        monte_carlo.append(jaccard(top_keys(top_a), top_keys(top_b)))
+        point_drift.append(drift(relevance(single_a), relevance(single_b)))
+        monte_carlo_drift.append(drift(relevance(stable_a), relevance(stable_b)))
+    sampler.shutdown()
+    return {
+        "pairs": pairs,
+        "single_draw_relevance_drift": float(np.mean(point_drift)),
+        "monte_carlo_relevance_drift": float(np.mean(monte_carlo_drift)),
+        "single_draw_jaccard": float(np.mean(point)),
+        "monte_carlo_jaccard": float(np.mean(monte_carlo)),
+        "mean_top_k_rate": float(np.mean(rates))
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte Carlo sampler scaling and top-K stability")
+    parser.add_argument("--replicas", type=int, default=400)
+    parser.add_argument("--workers", default=None, help="comma-separated worker counts (default 1..cpu_count)")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--stability-pairs", type=int, default=5)
+    parser.add_argument("--stability-replicas", type=int, default=200)
+    parser.add_argument("--json", default=None)
+    args = parser.parse_args()
+
+    cpus = os.cpu_count() or 1
+    worker_counts = [int(w) for w in args.workers.split(",")] if args.workers else list(range(1, cpus + 1))
+
+    report = {"cpus": cpus, "replicas": args.replicas, "scaling": scaling(args.replicas, worker_counts, args.repeats)}
+    print(f"cpus={cpus} replicas={args.replicas} "
+          f"(competitor={engine.COMPETITOR_SAMPLE_SIZE}, market={engine.MARKET_SAMPLE_SIZE} rows each)")
+    print(f"{'workers':>8} {'seconds':>8} {'replicas/s':>11} {'speedup':>8} {'efficiency':>10} {'identical':>9}")
+    for row in report["scaling"]:
+        print(f"{row['workers']:>8} {row['seconds']:>8.2f} {row['replicas_per_second']:>11.1f} "
+              f"{row['speedup']:>8.2f} {row['efficiency']:>10.2f} {str(row['identical']):>9}")
+
+    report["stability"] = stability(args.stability_replicas, args.stability_pairs, max(worker_counts))
+    s = report["stability"]
+    print(f"\nwindow relevance drift between independent seeds (mean |difference|, 0-10 scale, {s['pairs']} pairs): "
+          f"single draw {s['single_draw_relevance_drift']:.2f}, "
+          f"Monte Carlo x{args.stability_replicas} {s['monte_carlo_relevance_drift']:.2f}")
+    print(f"top-{CONTEXT_TOP_K} window overlap between independent seeds (Jaccard, {s['pairs']} pairs): "
+          f"single draw {s['single_draw_jaccard']:.2f}, "
+          f"Monte Carlo x{args.stability_replicas} {s['monte_carlo_jaccard']:.2f}")
+    print(f"Monte Carlo top windows reach a single draw's top-{CONTEXT_TOP_K} in {100 * s['mean_top_k_rate']:.0f}% of replicas")
+
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(report, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
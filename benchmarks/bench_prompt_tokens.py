@@ -0,0 +1,208 @@
+# benchmarks/bench_prompt_tokens.py
+#
+# Prompt-token report: the budgeted, static-first prompts from prompts.py vs
+# the original inline f-string prompts, per LLM node.
+#
+# The state is built from the deterministic nodes (seeded signals) plus
+# canned LLM texts of typical length, so no gateway is needed. "cacheable"
+# is the static system prefix that is byte-identical on every run.
+#
+# Usage:
+#   python benchmarks/bench_prompt_tokens.py [--seed 7] [--active BOGO] [--json report.json]
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import engine  # noqa: E402
+import prompts  # noqa: E402
+
+CUSTOMER_INSIGHTS = """- Loyalty Members account for the largest observed share of redemptions (0.382), followed by Guests (0.327) and First-Timers (0.291).
+- Mobile App is the leading redemption channel with an observed share of 0.364; Drive-Thru accounts for 0.345 and In-Store for 0.291.
+- Redemptions are spread across all three segments and channels, with no single segment or channel exceeding 40% of the 55 observed redemptions."""
+
+TRENDS_SUMMARY = """**1. Late-Night Value is peaking right now.** Winter late-night payday signals are the strongest in the sample (CTX-412): guests want a filling, low-risk treat after 9pm when cash just landed. Lead with bundle value and speed.
+
+**2. Gamified Rewards keep breakfast commuters engaged.** Spring breakfast commute signals (CTX-88) show appetite for streaks and unlocks that reward the daily habit rather than one-off discounts.
+
+**3. Surprise & Delight wins cold-weather weekends.** Weekend cold-weather chatter (CTX-231) rewards unexpected perks — a random free Frosty topper beats a flat price cut.
+
+**4. App-Exclusive Perks convert lunch traffic.** Lunch signals from TikTok and food blogs (CTX-57) favour mobile-only drops that feel like insider access.
+
+**Timing:** act now on late-night and breakfast windows; monitor subscription bundles, whose signals are still building."""
+
+RAW_CONCEPTS = """Name: The Midnight Payday Stack
+Why: Competitors own BOGO at dinner but nobody defends the after-9pm payday window; a time-boxed unlock of a Baconator + fries stack answers the threat without a discount.
+Strategy: Defensive
+Evidence Signal IDs: CTX-412, CTX-231
+
+Name: Frosty Streak Pass
+Why: A 5-visit breakfast streak in the app unlocks a mystery Frosty flavour, turning the commute habit into a game competitors have not launched.
+Strategy: First-to-Market
+Evidence Signal IDs: CTX-88, CTX-57"""
+
+
+# ---------------------------------------------------------
+# ORIGINAL PROMPTS (as inlined in engine.py before prompts.py)
+# ---------------------------------------------------------
+def legacy_customer(metrics):
+    return f"""
+You are a Customer Insights Analyst.
+
+IMPORTANT RULES:
+- Use ONLY the metrics provided below.
+- Do NOT infer causes, preferences, or intent.
+- Do NOT introduce new numbers or segments.
+- Use descriptive language only (e.g., "accounts for", "observed share").
+
+Metrics (synthetic data):
+{json.dumps(metrics, indent=2)}
+
+Write 3 concise bullet-point insights suitable for an executive summary.
+"""
+
+
+def legacy_trends(state):
+    context = json.dumps(state["market_context_windows"], indent=2)
+    return f"""
+    You are Wendy’s Market Strategist.
+
+    Using the timing and context signals below:
+    - Summarize the top emerging trends
+    - Explain WHEN and WHY they matter
+    - Use consumer language and value cues
+
+    DATA:
+    {context}
+    """
+
+
+def legacy_designer(state):
+    return f"""
+You are Wendy's Lead Creative Strategist.
+
+Use the following intelligence signals to design differentiated offers.
+
+COMPETITOR GAPS:
+{state['competitor_intel']['summary']}
+
+CUSTOMER INSIGHTS:
+{state['customer_insights']}
+
+TRENDS & CONTEXT:
+{state['market_trends_summary']}
+
+TOP SIGNALS (with evidence IDs):
+{json.dumps(state["market_context_windows"], indent=2)}
+
+MECHANIC CONSTRAINTS BY TREND:
+{json.dumps(engine.TREND_MECHANIC_MAP, indent=2)}
+
+Constraints:
+- Each offer MUST explicitly reference at least one signal_id
+- The mechanic MUST align with the associated trend type
+- Do NOT reuse standard discount formats (e.g., % off, $ off)
+
+Task:
+Design 2 original Wendy's offers.
+
+Rules:
+- One offer must be a DEFENSIVE response
+- One offer must be a FIRST-TO-MARKET creative pivot
+
+OUTPUT FORMAT (STRICT):
+Name:
+Why:
+Strategy: Defensive | First-to-Market
+Evidence Signal IDs:
+
+Example:
+Evidence Signal IDs: CTX-12, CTX-44
+"""
+
+
+def legacy_validator(state):
+    return f"""
+    Refine these concepts with Wendy's witty brand voice: {state['raw_concepts']}
+
+    RETURN ONLY A JSON OBJECT in this format:
+    {{
+      "report_intro": "Intro text here...",
+      "offers": [
+        {{
+          "name": "The Wendy's Daily Drip Deal",
+          "witty_rationale": "Rationale text...",
+          "type": "Defensive",
+          "evidence_signals": ["CTX-12"],
+          "feasibility": 9.0,
+          "impact": 8.5
+        }},
+        ...
+      ]
+    }}
+    """
+
+
+def build_state(seed, active):
+    state = {"wendys_active": active, "signal_seed": seed}
+    state.update(engine.competitor_analyst_node(state))
+    state.update(engine.market_context_generator(state))
+    state.update(engine.market_context_analyst(state))
+    state.update(
+        customer_insights=CUSTOMER_INSIGHTS,
+        market_trends_summary=TRENDS_SUMMARY,
+        raw_concepts=RAW_CONCEPTS
+    )
+    return state
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prompt tokens per node: budgeted vs original")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--active", default="BOGO", help="comma-separated wendys_active promos")
+    parser.add_argument("--json", default=None)
+    args = parser.parse_args()
+
+    state = build_state(args.seed, [p for p in args.active.split(",") if p])
+    metrics = engine._customer_metrics({"signal_seed": args.seed})
+
+    cases = {
+        "cust": (legacy_customer(metrics), engine._customer_request(metrics)),
+        "trend": (legacy_trends(state), engine._trends_request(state)),
+        "design": (legacy_designer(state), engine._designer_request(state)),
+        "validate": (legacy_validator(state), engine._validator_request(state))
+    }
+
+    tokenizer = "tiktoken " + prompts.TIKTOKEN_ENCODING if prompts._load_encoding() else "regex estimate"
+    print(f"tokenizer: {tokenizer}")
+    print(f"{'node':<10} {'before':>7} {'after':>7} {'saved':>7} {'saved%':>7} {'cacheable':>10}")
+
+    report = {"tokenizer": tokenizer, "nodes": {}}
+    for node, (legacy, request) in cases.items():
+        before = prompts.count_tokens(legacy)
+        after = prompts.message_tokens(request["messages"])
+        cacheable = prompts.count_tokens(request["messages"][0]["content"])
+        report["nodes"][node] = {
+            "before_tokens": before,
+            "after_tokens": after,
+            "saved_tokens": before - after,
+            "cacheable_prefix_tokens": cacheable
+        }
+        print(f"{node:<10} {before:>7} {after:>7} {before - after:>7} "
+              f"{100 * (before - after) / before:>6.1f}% {cacheable:>10}")
+
+    total_before = sum(n["before_tokens"] for n in report["nodes"].values())
+    total_after = sum(n["after_tokens"] for n in report["nodes"].values())
+    print(f"{'TOTAL':<10} {total_before:>7} {total_after:>7} {total_before - total_after:>7} "
+          f"{100 * (total_before - total_after) / total_before:>6.1f}%")
+
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(report, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# benchmarks/bench_signal_cube.py
+#
+# Parity + timing check: day-bucketed signal cube vs per-row recency scoring.
+#
+# For each size the market and competitor draws are scored at TODAY by the
+# row-level engines (exp per row + groupby) and by the cube, and the outputs
+# must match. Then, on the built cube:
+#   rescore  raw context-window weights for a new date / decay / window
+#   windows  the full top-K window dicts for a new decay
+#   sweep    --decays decay constants: rows re-weighted and re-grouped per
+#            decay vs one kernel-matrix product on the cube
+#
+# Usage:
+#   python benchmarks/bench_signal_cube.py [rows ...] [--decays 100]
+
+import argparse
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scoring import CONTEXT_DIMENSIONS, RECENCY_DECAY, score_competitor_threats, score_context_windows  # noqa: E402
+from signal_cube import SignalCube  # noqa: E402
+from signal_generator import generate_competitor_signals, generate_market_signals  # noqa: E402
+
+TODAY = date(2026, 1, 24)
+WENDYS_ACTIVE = ["BOGO"]
+
+
+def weighted(df, date_col, decay=RECENCY_DECAY):
+    return df.assign(weight=np.exp(-decay * (pd.Timestamp(TODAY) - df[date_col]).dt.days))
+
+
+def best_of(fn, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def row_sweep(market, decays):
+    """What a decay sweep costs without the cube: re-weight and re-group every row per decay."""
+    ages = (pd.Timestamp(TODAY) - market["observed_date"]).dt.days.to_numpy()
+    grouped = market[CONTEXT_DIMENSIONS]
+    return np.stack([
+        grouped.assign(weight=np.exp(-decay * ages)).groupby(CONTEXT_DIMENSIONS, observed=True)["weight"].sum()
+        for decay in decays
+    ], axis=-1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Signal cube parity, re-score latency and decay sweeps")
+    parser.add_argument("sizes", nargs="*", type=int, default=[900, 100_000, 1_000_000])
+    parser.add_argument("--decays", type=int, default=100, help="decay constants per sweep")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    decays = np.linspace(0.01, 0.2, args.decays)
+    print(f"{'rows':>10} {'rows_s':>8} {'build_s':>8} {'rescore_us':>11} {'windows_ms':>11} "
+          f"{'row_sweep_s':>12} {'cube_sweep_ms':>14} {'speedup':>8}")
+    for rows in args.sizes:
+        competitor = generate_competitor_signals(TODAY, size=rows, seed=42)
+        market = generate_market_signals(TODAY, size=rows, seed=42)
+
+        # Parity at TODAY with the default decay
+        start = time.perf_counter()
+        comp_w = weighted(competitor, "obs_date")
+        _, legacy_summary = score_competitor_threats(comp_w[~comp_w["mechanic"].isin(WENDYS_ACTIVE)])
+        legacy_windows = score_context_windows(weighted(market, "observed_date"))
+        rows_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        cube = SignalCube.from_frames(competitor, market)
+        summary = cube.competitor_intel(WENDYS_ACTIVE, TODAY)["summary"]
+        windows = cube.market_context_windows(TODAY)
+        build_s = time.perf_counter() - start
+
+        assert summary == legacy_summary, "threat summaries differ from the row-level engine"
+        assert windows == legacy_windows, "context windows differ from the row-level engine"
+
+        # Re-scoring on the built cube
+        shifted = TODAY - timedelta(days=7)
+        rescore_s = best_of(lambda: cube.context_weights(shifted, decay=0.08, window_days=30), args.repeats * 20)
+        windows_s = best_of(lambda: cube.market_context_windows(TODAY, decay=0.08), args.repeats)
+
+        # Decay sweep: per-row regroup vs one kernel matmul (same sums)
+        row_sweep_s = best_of(lambda: row_sweep(market, decays), 1)
+        cube_sweep_s = best_of(lambda: cube.context_weights(TODAY, decay=decays), args.repeats)
+        swept = cube.context_weights(TODAY, decay=decays)
+        expected = row_sweep(market, decays[[0, -1]])
+        observed = swept.reshape(-1, len(decays))[:, [0, -1]]
+        assert np.allclose(observed[observed.any(axis=1)], expected), "decay sweep differs from per-row sums"
+
+        print(f"{rows:>10} {rows_s:>8.3f} {build_s:>8.3f} {rescore_s * 1e6:>11.0f} {windows_s * 1e3:>11.2f} "
+              f"{row_sweep_s:>12.3f} {cube_sweep_s * 1e3:>14.2f} {row_sweep_s / cube_sweep_s:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+# benchmarks/bench_state_memory.py
+#
+# Memory and serialization cost of the tabular graph state: TableRef
+# payloads (compact) vs the original gaps.to_dict() / DataFrame-in-state
+# nodes (legacy), at growing signal row counts.
+#
+# Every (rows, mode) point runs the full graph once in a fresh subprocess
+# against an instant in-process mock gateway, so peak RSS is not polluted
+# by earlier points. Reported per point:
+#   peak_rss_mb      process high-water mark after the run
+#   run_rss_mb       growth of that high-water mark during the run
+#   state_mb         in-memory size of competitor_intel + raw_market_signals
+#   ckpt_mb / ckpt_s checkpoint payload (FrameSerializer) of those keys
+#
+# The legacy per-row dict needs several GB beyond 1M rows, so legacy points
+# above --legacy-max-rows are skipped.
+#
+# Usage:
+#   python benchmarks/bench_state_memory.py [--rows 10000,1000000,10000000] [--json state_memory.json]
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mock_llm_server import MockConfig, MockLLMServer  # noqa: E402
+from scoring import CONTEXT_DIMENSIONS, CONTEXT_TOP_K, score_competitor_threats, score_context_windows  # noqa: E402
+
+DEFAULT_ROWS = "10000,1000000,10000000"
+MODES = ("legacy", "compact")
+
+
+# ---------------------------------------------------------
+# ORIGINAL NODES (DataFrames / per-row dicts in state)
+# ---------------------------------------------------------
+def legacy_nodes(engine):
+    np, pd = engine.np, engine.pd
+
+    def competitor_analyst_node(state):
+        df = engine.generate_competitor_signals(engine.TODAY, size=engine.COMPETITOR_SAMPLE_SIZE,
+                                                seed=state.get("signal_seed"))
+        df["weight"] = np.exp(-engine.RECENCY_DECAY * (pd.Timestamp(engine.TODAY) - df["obs_date"]).dt.days)
+        gaps = df[~df["mechanic"].isin(state["wendys_active"])]
+        threats, summary = score_competitor_threats(gaps)
+        return {"competitor_intel": {"summary": summary, "threats": threats, "raw": gaps.to_dict()}}
+
+    def market_context_generator(state):
+        return {"raw_market_signals": engine.generate_market_signals(
+            engine.TODAY, size=engine.MARKET_SAMPLE_SIZE, seed=state.get("signal_seed"))}
+
+    def market_context_analyst(state):
+        df = state["raw_market_signals"].copy()
+        df["observed_date"] = pd.to_datetime(df["observed_date"])
+        df["days_ago"] = (pd.Timestamp(engine.TODAY) - df["observed_date"]).dt.days
+        df["weight"] = np.exp(-engine.RECENCY_DECAY * df["days_ago"])
+        return {"market_context_windows": score_context_windows(df, dims=CONTEXT_DIMENSIONS, k=CONTEXT_TOP_K)}
+
+    return {
+        "competitor_analyst_node": competitor_analyst_node,
+        "market_context_generator": market_context_generator,
+        "market_context_analyst": market_context_analyst
+    }
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024   # KiB on Linux
+
+
+def child(rows, mode):
+    mock = MockLLMServer(MockConfig(latency="fixed:0", tokens_per_second=0, seed=0)).start()
+    os.environ["LLM_BASE_URL"] = mock.url
+    os.environ.setdefault("OPENAI_API_KEY", "mock")
+    os.environ["LLM_CACHE_NODES"] = ""
+    os.environ["LLM_CACHE_PATH"] = ""
+
+    import engine  # noqa: E402
+    from checkpointing import FrameSerializer  # noqa: E402
+    from tracing import state_size  # noqa: E402
+
+    engine.COMPETITOR_SAMPLE_SIZE = engine.MARKET_SAMPLE_SIZE = rows
+    if mode == "legacy":
+        for name, fn in legacy_nodes(engine).items():
+            setattr(engine, name, fn)
+    app = engine.build_graph().compile()
+
+    # Warm imports and the LLM client on a tiny run, so the delta is the data
+    small = engine.COMPETITOR_SAMPLE_SIZE
+    engine.COMPETITOR_SAMPLE_SIZE = engine.MARKET_SAMPLE_SIZE = 100
+    app.invoke({"wendys_active": ["BOGO"], "signal_seed": 0})
+    engine.COMPETITOR_SAMPLE_SIZE = engine.MARKET_SAMPLE_SIZE = small
+
+    before = peak_rss_mb()
+    start = time.perf_counter()
+    out = app.invoke({"wendys_active": ["BOGO"], "signal_seed": 0})
+    run_s = time.perf_counter() - start
+    peak = peak_rss_mb()
+
+    keys = ("competitor_intel", "raw_market_signals")
+    serde = FrameSerializer()
+    start = time.perf_counter()
+    payload = sum(len(serde.dumps_typed(out[key])[1]) for key in keys)
+    ckpt_s = time.perf_counter() - start
+
+    mock.stop()
+    return {
+        "rows": rows,
+        "mode": mode,
+        "run_s": run_s,
+        "peak_rss_mb": peak,
+        "run_rss_mb": peak - before,
+        "state_mb": sum(state_size(out[key]) for key in keys) / 2 ** 20,
+        "ckpt_mb": payload / 2 ** 20,
+        "ckpt_s": ckpt_s
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Graph memory: TableRef payloads vs DataFrames/dicts in state")
+    parser.add_argument("--rows", default=DEFAULT_ROWS, help="comma-separated signal row counts")
+    parser.add_argument("--legacy-max-rows", type=int, default=1_000_000)
+    parser.add_argument("--json", default=None)
+    parser.add_argument("--child", nargs=2, metavar=("ROWS", "MODE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(child(int(args.child[0]), args.child[1])))
+        return
+
+    results = []
+    print(f"{'rows':>10} {'mode':<8} {'run_s':>7} {'peak_MB':>8} {'run_MB':>8} {'state_MB':>9} {'ckpt_MB':>8} {'ckpt_s':>7}")
+    for rows in (int(r) for r in args.rows.split(",")):
+        for mode in MODES:
+            if mode == "legacy" and rows > args.legacy_max_rows:
+                print(f"{rows:>10} {mode:<8} {'skipped (see --legacy-max-rows)':>40}")
+                continue
+            proc = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child", str(rows), mode],
+                capture_output=True, text=True
+            )
+            if proc.returncode != 0:
+                print(f"{rows:>10} {mode:<8} failed (exit {proc.returncode})")
+                results.append({"rows": rows, "mode": mode, "error": proc.stderr.strip().splitlines()[-1:]})
+                continue
+            r = json.loads(proc.stdout.strip().splitlines()[-1])
+            results.append(r)
+            print(f"{rows:>10} {mode:<8} {r['run_s']:>7.2f} {r['peak_rss_mb']:>8.0f} {r['run_rss_mb']:>8.0f} "
+                  f"{r['state_mb']:>9.1f} {r['ckpt_mb']:>8.1f} {r['ckpt_s']:>7.2f}")
+
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+# benchmarks/bench_suite.py
+#
+# Scaling curves and regression gate for the deterministic nodes and the
+# full graph.
+#
+# Every (case, rows) point runs in a fresh subprocess: the case is warmed
+# on a tiny input, then timed (best of --repeats; one run from 1M rows up)
+# and its peak memory read from the kernel's high-water mark (VmHWM, which
+# also sees Arrow/NumPy buffers that tracemalloc misses). The full graph
+# runs against the in-process mock gateway, so nothing leaves the machine.
+#
+# Cases:
+#   comp          competitor_analyst_node      (rows = competitor signals)
+#   mkt           market_context_generator + market_context_analyst (rows = market signals)
+#   cust_metrics  customer metrics behind customer_analyst_node (rows = redemption logs)
+#   viz           visualization_node           (rows = offers; capped at 1M)
+#   graph         full graph, all three samples at rows, mock LLM
+#
+# Results (JSON) hold every point plus a log-log scaling exponent per case.
+# With --baseline, any point slower / heavier than the baseline by more than
+# --threshold / --memory-threshold fails the run (exit 1); points under the
+# --min-seconds / --min-memory-mb noise floors are reported but not gated.
+# Timings are machine-specific: benchmarks/baselines/suite.json was recorded
+# on a 1-CPU Linux box; refresh it with --update-baseline where the gate runs.
+#
+# Usage:
+#   python benchmarks/bench_suite.py --json suite.json
+#   python benchmarks/bench_suite.py --sizes 1000,10000,100000 --baseline benchmarks/baselines/suite.json
+#   python benchmarks/bench_suite.py --update-baseline benchmarks/baselines/suite.json
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+DEFAULT_SIZES = "1000,10000,100000,1000000,10000000"
+CASES = ("comp", "mkt", "cust_metrics", "viz", "graph")
+MAX_ROWS = {"viz": 1_000_000}   # a list of 10M offer dicts alone needs ~6 GB
+SINGLE_RUN_ROWS = 1_000_000
+
+
+# ---------------------------------------------------------
+# CHILD: one (case, rows) point
+# ---------------------------------------------------------
+def _memory_mb(field):
+    with open("/proc/self/status") as fh:
+        for line in fh:
+            if line.startswith(field + ":"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def _offers(rows):
+    rng = np.random.default_rng(0)
+    scores = rng.uniform(0, 10, size=(rows, 2)).round(1)
+    return [
+        {"name": f"Offer {i}", "feasibility": float(f), "impact": float(m),
+         "type": "Defensive" if i % 2 else "First-to-Market"}
+        for i, (f, m) in enumerate(scores)
+    ]
+
+
+def _case(name, engine):
+    """Factory for a case: rows -> zero-argument function that runs the case once."""
+    def comp(rows):
+        engine.COMPETITOR_SAMPLE_SIZE = rows
+        return lambda: engine.competitor_analyst_node({"wendys_active": ["BOGO"], "signal_seed": 0})
+
+    def mkt(rows):
+        engine.MARKET_SAMPLE_SIZE = rows
+
+        def run():
+            raw = engine.market_context_generator({"signal_seed": 0})
+            return engine.market_context_analyst(raw)
+        return run
+
+    def cust_metrics(rows):
+        engine.CUSTOMER_SAMPLE_SIZE = rows
+        return lambda: engine._customer_metrics({"signal_seed": 0})
+
+    def viz(rows):
+        state = {"structured_concepts": _offers(rows)}
+        return lambda: engine.visualization_node(state)
+
+    def graph(rows):
+        engine.COMPETITOR_SAMPLE_SIZE = engine.MARKET_SAMPLE_SIZE = engine.CUSTOMER_SAMPLE_SIZE = rows
+        app = engine.build_graph().compile()
+        return lambda: app.invoke({"wendys_active": ["BOGO"], "signal_seed": 0})
+
+    return locals()[name]
+
+
+def child(case, rows, repeats):
+    if case == "graph":
+        from mock_llm_server import MockConfig, MockLLMServer
+
+        mock = MockLLMServer(MockConfig(latency="fixed:0", tokens_per_second=0, seed=0)).start()
+        os.environ["LLM_BASE_URL"] = mock.url
+        os.environ.setdefault("OPENAI_API_KEY", "mock")
+        os.environ["LLM_CACHE_NODES"] = ""
+        os.environ["LLM_CACHE_PATH"] = ""
+
+    import contextlib
+    import io
+
+    import engine
+
+    make = _case(case, engine)
+    with contextlib.redirect_stdout(io.StringIO()):   # nodes print progress lines
+        make(100)()                                   # warm imports, clients, code paths
+        run = make(rows)
+        rss_before = _memory_mb("VmRSS")
+        times = []
+        for _ in range(1 if rows >= SINGLE_RUN_ROWS else repeats):
+            start = time.perf_counter()
+            run()
+            times.append(time.perf_counter() - start)
+
+    peak = _memory_mb("VmHWM")
+    return {
+        "case": case,
+        "rows": rows,
+        "seconds": min(times),
+        "runs": len(times),
+        "peak_rss_mb": peak,
+        "peak_delta_mb": max(0.0, peak - rss_before)
+    }
+
+
+# ---------------------------------------------------------
+# PARENT: curves + gate
+# ---------------------------------------------------------
+def scaling_exponent(points, min_seconds):
+    """Least-squares slope of log(seconds) vs log(rows) over points above the noise floor."""
+    usable = [(p["rows"], p["seconds"]) for p in points if p["seconds"] >= min_seconds]
+    if len(usable) < 2:
+        return None
+    rows, seconds = np.log10(np.array(usable)).T
+    return round(float(np.polyfit(rows, seconds, 1)[0]), 3)
+
+
+def compare(results, baseline, args):
+    """Rows of (case, rows, metric, baseline, current, ratio, status); status FAIL past the thresholds."""
+    base = {(p["case"], p["rows"]): p for points in baseline["results"].values() for p in points}
+    report = []
+    for points in results.values():
+        for point in points:
+            ref = base.get((point["case"], point["rows"]))
+            if ref is None:
+                continue
+            for metric, threshold, floor in (("seconds", args.threshold, args.min_seconds),
+                                             ("peak_delta_mb", args.memory_threshold, args.min_memory_mb)):
+                ratio = point[metric] / ref[metric] if ref[metric] else float("inf")
+                if max(ref[metric], point[metric]) < floor:
+                    status = "noise"
+                else:
+                    status = "FAIL" if ratio > 1 + threshold else "ok"
+                report.append((point["case"], point["rows"], metric, ref[metric], point[metric], ratio, status))
+    return report
+
+
+def environment():
+    import pandas as pd
+
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Node / graph scaling curves with a regression gate")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="comma-separated row counts")
+    parser.add_argument("--cases", default=",".join(CASES))
+    parser.add_argument("--repeats", type=int, default=3, help=f"runs per point below {SINGLE_RUN_ROWS:,} rows (best is kept)")
+    parser.add_argument("--json", default=None, help="write results to this path")
+    parser.add_argument("--baseline", default=None, help="gate against this results file")
+    parser.add_argument("--update-baseline", default=None, metavar="PATH", help="write results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown (0.25 = 25%%)")
+    parser.add_argument("--memory-threshold", type=float, default=0.25, help="allowed peak-memory growth")
+    parser.add_argument("--min-seconds", type=float, default=0.02, help="timings below this are not gated")
+    parser.add_argument("--min-memory-mb", type=float, default=32.0, help="memory deltas below this are not gated")
+    parser.add_argument("--child", nargs=3, metavar=("CASE", "ROWS", "REPEATS"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        case, rows, repeats = args.child
+        print(json.dumps(child(case, int(rows), int(repeats))))
+        return
+
+    sizes = [int(s) for s in args.sizes.split(",")]
+    cases = [c for c in args.cases.split(",") if c]
+    unknown = set(cases) - set(CASES)
+    if unknown:
+        parser.error(f"unknown cases {sorted(unknown)}; choose from {', '.join(CASES)}")
+
+    results = {case: [] for case in cases}
+    print(f"{'case':<13} {'rows':>10} {'seconds':>9} {'runs':>5} {'peak_MB':>8} {'delta_MB':>9}")
+    for case in cases:
+        for rows in sizes:
+            if rows > MAX_ROWS.get(case, rows):
+                print(f"{case:<13} {rows:>10} {'skipped':>9}")
+                continue
+            proc = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child", case, str(rows), str(args.repeats)],
+                capture_output=True, text=True
+            )
+            if proc.returncode != 0:
+                tail = proc.stderr.strip().splitlines()[-1:] or ["no output"]
+                print(f"{case:<13} {rows:>10} failed: {tail[0]}")
+                sys.exit(2)
+            point = json.loads(proc.stdout.strip().splitlines()[-1])
+            results[case].append(point)
+            print(f"{case:<13} {rows:>10} {point['seconds']:>9.4f} {point['runs']:>5} "
+                  f"{point['peak_rss_mb']:>8.0f} {point['peak_delta_mb']:>9.1f}")
+
+    curves = {case: {"scaling_exponent": scaling_exponent(points, args.min_seconds)} for case, points in results.items()}
+    print("\nscaling exponent (seconds ~ rows^k): " + ", ".join(f"{case} {c['scaling_exponent']}" for case, c in curves.items()))
+
+    output = {"environment": environment(), "sizes": sizes, "results": results, "curves": curves}
+    for path in filter(None, (args.json, args.update_baseline)):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w") as fh:
+            json.dump(output, fh, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as fh:
+            baseline = json.load(fh)
+        report = compare(results, baseline, args)
+        print(f"\n{'case':<13} {'rows':>10} {'metric':<14} {'baseline':>10} {'current':>10} {'ratio':>7}  status")
+        for case, rows, metric, ref, current, ratio, status in report:
+            print(f"{case:<13} {rows:>10} {metric:<14} {ref:>10.4f} {current:>10.4f} {ratio:>7.2f}  {status}")
+        failures = [r for r in report if r[-1] == "FAIL"]
+        if failures:
+            print(f"\n{len(failures)} regression(s) beyond the thresholds "
+                  f"(time +{args.threshold:.0%}, memory +{args.memory_threshold:.0%})")
+            sys.exit(1)
+        print(f"\nno regressions ({len(report)} comparisons against {args.baseline})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# benchmarks/bench_threat_scoring.py
+#
+# Parity + timing check: vectorized threat scoring vs the original
+# per-mechanic loop from competitor_analyst_node. Timings are the best of
+# REPEATS warm runs, so one-off first-call costs do not dominate small sizes.
+#
+# competitor_analyst_node itself now scores through SignalCube (see
+# bench_signal_cube.py); score_competitor_threats stays the row-level
+# reference the cube, the aggregator and the scenario tests are checked
+# against, so its small-input overhead is not on the request path.
+#
+# Usage:
+#   python benchmarks/bench_threat_scoring.py [rows ...]
+
+import os
+import sys
+import time
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scoring import score_competitor_threats  # noqa: E402
+from signal_generator import generate_competitor_signals  # noqa: E402
+
+TODAY = date(2026, 1, 24)
+WENDYS_ACTIVE = ["BOGO"]
+REPEATS = 5
+
+
+def legacy_threats(gaps):
+    """The original loop: nested groupby + full sort per mechanic."""
+    threats = []
+    for mech, group in gaps.groupby("mechanic", observed=True):
+        top_brand = group.groupby("brand", observed=True)["weight"].sum().idxmax()
+        raw_score = group["weight"].sum()
+        score = round(min(10.0, raw_score), 1)
+        trace_id = group.sort_values("weight", ascending=False)["id"].iloc[0]
+        threats.append((mech, top_brand, score, trace_id))
+    return threats
+
+
+def weighted_gaps(rows, seed):
+    df = generate_competitor_signals(TODAY, size=rows, seed=seed)
+    df["weight"] = np.exp(-0.05 * (pd.Timestamp(TODAY) - df["obs_date"]).dt.days)
+    return df[~df["mechanic"].isin(WENDYS_ACTIVE)]
+
+
+def check_parity(gaps, legacy, table):
+    """Same mechanics, brands and scores; trace IDs must point at a max-weight row."""
+    assert len(legacy) == len(table), "mechanic count differs"
+    weight_by_id = gaps.groupby("id")["weight"].max()
+    for (mech, brand, score, trace_id), row in zip(legacy, table.itertuples(index=False)):
+        assert mech == row.mechanic, (mech, row.mechanic)
+        assert brand == row.top_brand, (mech, brand, row.top_brand)
+        assert score == row.score, (mech, score, row.score)
+        # Recency weights tie at day resolution; any strongest row is a valid trace
+        assert weight_by_id[trace_id] == weight_by_id[row.trace_id], (mech, trace_id, row.trace_id)
+
+
+def best_of(fn):
+    times = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main(sizes):
+    print(f"{'rows':>10} {'legacy_s':>10} {'vector_s':>10} {'speedup':>8}")
+    for rows in sizes:
+        gaps = weighted_gaps(rows, seed=42)
+
+        legacy = legacy_threats(gaps)
+        table, _ = score_competitor_threats(gaps)
+        check_parity(gaps, legacy, table)
+
+        legacy_s = best_of(lambda: legacy_threats(gaps))
+        vector_s = best_of(lambda: score_competitor_threats(gaps))
+        print(f"{rows:>10} {legacy_s:>10.4f} {vector_s:>10.4f} {legacy_s / vector_s:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [500, 50_000, 1_000_000])
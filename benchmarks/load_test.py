@@ -0,0 +1,193 @@
+# benchmarks/load_test.py
+#
+# End-to-end load generator for the compiled graph.
+#
+# Drives app.invoke (or async_app.ainvoke with --async) at a target
+# concurrency and reports throughput plus p50/p95/p99 latency per node and
+# end to end. Without --base-url an in-process mock gateway
+# (benchmarks/mock_llm_server.py) is started, so the run is fully offline.
+#
+# Usage:
+#   python benchmarks/load_test.py --concurrency 10 --runs 50
+#   python benchmarks/load_test.py --concurrency 100 --runs 300 --async --latency lognormal:1.2,0.6
+#   python benchmarks/load_test.py --base-url http://127.0.0.1:8089 --json results.json
+
+import argparse
+import asyncio
+import functools
+import inspect
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mock_llm_server import MockConfig, MockLLMServer  # noqa: E402
+
+PERCENTILES = (50, 95, 99)
+
+
+class NodeTimer:
+    """node_wrapper for engine.build_graph that records wall time per node."""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def _record(self, name, seconds):
+        with self._lock:
+            self.samples[name].append(seconds)
+
+    def __call__(self, name, fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def timed_async(state):
+                start = time.perf_counter()
+                try:
+                    return await fn(state)
+                finally:
+                    self._record(name, time.perf_counter() - start)
+            return timed_async
+
+        @functools.wraps(fn)
+        def timed(state):
+            start = time.perf_counter()
+            try:
+                return fn(state)
+            finally:
+                self._record(name, time.perf_counter() - start)
+        return timed
+
+
+def summarize(samples):
+    arr = np.asarray(samples)
+    stats = {f"p{p}": float(np.percentile(arr, p)) for p in PERCENTILES}
+    stats.update(count=len(arr), mean=float(arr.mean()))
+    return stats
+
+
+def run_threads(app, inputs, concurrency):
+    latencies, errors = [], []
+
+    def one(payload):
+        start = time.perf_counter()
+        try:
+            app.invoke(payload)
+            latencies.append(time.perf_counter() - start)
+        except Exception as exc:  # noqa: BLE001 - load test records every failure
+            errors.append(repr(exc))
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, inputs))
+    return latencies, errors
+
+
+def run_async(app, inputs, concurrency):
+    latencies, errors = [], []
+
+    async def driver():
+        gate = asyncio.Semaphore(concurrency)
+
+        async def one(payload):
+            async with gate:
+                start = time.perf_counter()
+                try:
+                    await app.ainvoke(payload)
+                    latencies.append(time.perf_counter() - start)
+                except Exception as exc:  # noqa: BLE001
+                    errors.append(repr(exc))
+
+        await asyncio.gather(*(one(p) for p in inputs))
+
+    asyncio.run(driver())
+    return latencies, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the Signal-to-Offer graph")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--async", dest="use_async", action="store_true", help="drive async_app.ainvoke")
+    parser.add_argument("--base-url", default=None, help="existing OpenAI-compatible endpoint (default: in-process mock)")
+    parser.add_argument("--latency", default=MockConfig.latency)
+    parser.add_argument("--tokens-per-second", type=float, default=MockConfig.tokens_per_second)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--active", default="BOGO", help="comma-separated wendys_active promos")
+    parser.add_argument("--json", default=None, help="write the report to this path")
+    args = parser.parse_args()
+
+    mock = None
+    if args.base_url is None:
+        mock = MockLLMServer(MockConfig(
+            latency=args.latency,
+            tokens_per_second=args.tokens_per_second,
+            error_rate=args.error_rate,
+            seed=0
+        )).start()
+        args.base_url = mock.url
+
+    # The engine reads its settings at import time
+    os.environ["LLM_BASE_URL"] = args.base_url
+    os.environ.setdefault("OPENAI_API_KEY", "mock")
+    os.environ["LLM_CACHE_NODES"] = ""   # measure the gateway, not the cache
+    os.environ["LLM_CACHE_PATH"] = ""
+    os.environ.setdefault("LLM_REQUESTS_PER_MINUTE", "0")   # ... and not the shared rate limiter
+    os.environ.setdefault("LLM_TOKENS_PER_MINUTE", "0")
+    os.environ.setdefault("LLM_MAX_CONNECTIONS", str(max(100, args.concurrency * 4)))
+
+    import engine  # noqa: E402
+
+    timer = NodeTimer()
+    app = engine.build_graph(async_nodes=args.use_async, node_wrapper=timer).compile()
+
+    active = [p for p in args.active.split(",") if p]
+    inputs = [{"wendys_active": active, "signal_seed": i} for i in range(args.runs)]
+
+    start = time.perf_counter()
+    if args.use_async:
+        latencies, errors = run_async(app, inputs, args.concurrency)
+    else:
+        latencies, errors = run_threads(app, inputs, args.concurrency)
+    elapsed = time.perf_counter() - start
+
+    if mock is not None:
+        mock.stop()
+
+    report = {
+        "mode": "async" if args.use_async else "threads",
+        "concurrency": args.concurrency,
+        "runs": args.runs,
+        "errors": len(errors),
+        "elapsed_s": elapsed,
+        "throughput_runs_per_s": len(latencies) / elapsed if elapsed else 0.0,
+        "end_to_end": summarize(latencies) if latencies else {},
+        "nodes": {name: summarize(s) for name, s in sorted(timer.samples.items())},
+        "llm_calls": engine.get_runtime().resilience.snapshot()
+    }
+
+    print(f"mode={report['mode']} concurrency={args.concurrency} runs={args.runs} "
+          f"errors={len(errors)} throughput={report['throughput_runs_per_s']:.2f} runs/s")
+    print(f"{'stage':<12} {'count':>6} {'p50_s':>8} {'p95_s':>8} {'p99_s':>8}")
+    rows = list(report["nodes"].items()) + ([("END-TO-END", report["end_to_end"])] if latencies else [])
+    for name, stats in rows:
+        print(f"{name:<12} {stats['count']:>6} {stats['p50']:>8.3f} {stats['p95']:>8.3f} {stats['p99']:>8.3f}")
+    calls = report["llm_calls"]
+    print(f"llm calls={calls.get('calls', 0)} retries={calls.get('retries', 0)} "
+          f"hedges fired={calls.get('hedges_fired', 0)} won={calls.get('hedges_won', 0)} "
+          f"deadline_exceeded={calls.get('deadline_exceeded', 0)}")
+    for err in errors[:5]:
+        print("error:", err)
+
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(report, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+# benchmarks/mock_llm_server.py
+#
+# Offline, OpenAI-compatible stand-in for the LLM gateway.
+#
+# Serves POST /chat/completions (and /v1/chat/completions) with:
+#   * configurable latency distributions (time to first token),
+#   * a completion token rate that stretches long answers,
+#   * error injection (429 / 500 / 503),
+#   * valid JSON bodies for response_format={"type": "json_object"} (honouring
+#     fan-out "Strategy:" / "Offers:" tasks and batched CONCEPTS lines),
+#   * SSE streaming when stream=True (with a final usage chunk when
+#     stream_options={"include_usage": true}).
+#
+# Standard library only, so it runs on any plain Linux box.
+#
+# Usage:
+#   python benchmarks/mock_llm_server.py --port 8089 --latency lognormal:0.8,0.5 \
+#       --tokens-per-second 80 --error-rate 0.02
+#   LLM_BASE_URL=http://127.0.0.1:8089 OPENAI_API_KEY=mock streamlit run streamlit_app.py
+
+import argparse
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ERROR_STATUSES = (429, 500, 503)
+
+
+def parse_latency(spec: str):
+    """
+    Builds a sampler (seconds) from "name:params":
+      fixed:0.5 | uniform:0.2,1.0 | normal:0.8,0.2 | lognormal:median,sigma
+    """
+    name, _, raw = spec.partition(":")
+    params = [float(p) for p in raw.split(",") if p]
+
+    if name == "fixed":
+        return lambda rng: params[0]
+    if name == "uniform":
+        return lambda rng: rng.uniform(params[0], params[1])
+    if name == "normal":
+        return lambda rng: max(0.0, rng.gauss(params[0], params[1]))
+    if name == "lognormal":
+        median, sigma = params
+        return lambda rng: rng.lognormvariate(math.log(median), sigma)
+
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+@dataclass
+class MockConfig:
+    latency: str = "lognormal:0.8,0.5"     # time to first token
+    tokens_per_second: float = 80.0        # completion token rate (0 = instant)
+    completion_tokens: int = 120           # mean completion length for text answers
+    error_rate: float = 0.0                # share of requests answered with an error status
+    seed: int = None
+
+
+class MockLLMServer:
+    """ThreadingHTTPServer wrapper that can run in the background of a load test."""
+
+    def __init__(self, config: MockConfig = None, host="127.0.0.1", port=0):
+        self.config = config or MockConfig()
+        self._rng = random.Random(self.config.seed)
+        self._rng_lock = threading.Lock()
+        self._sample_latency = parse_latency(self.config.latency)
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # ---------------------------------------------------
+    # RESPONSE SYNTHESIS
+    # ---------------------------------------------------
+    def _draw(self):
+        """Latency, completion length and error decision for one request."""
+        with self._rng_lock:
+            rng = self._rng
+            ttft = self._sample_latency(rng)
+            tokens = max(1, int(rng.expovariate(1 / self.config.completion_tokens)))
+            error = rng.random() < self.config.error_rate
+            status = rng.choice(ERROR_STATUSES)
+        return ttft, tokens, (status if error else None)
+
+    def _content(self, body, tokens):
+        # Evidence comes from the dynamic (last) message, not static format examples
+        messages = body.get("messages") or [{}]
+        data = str(messages[-1].get("content", ""))
+        # Prefer an explicit allow-list, then signal-table rows, then any mention
+        allowed = re.search(r"ALLOWED SIGNAL IDS:\n(.*)", data)
+        cited = (re.findall(r"CTX-\d+", allowed.group(1)) if allowed else
+                 re.findall(r"^CTX-\d+", data, re.MULTILINE) or re.findall(r"CTX-\d+", data))
+        signals = sorted(set(cited)) or ["CTX-0"]
+
+        if (body.get("response_format") or {}).get("type") == "json_object":
+            concepts = self._concepts(data)
+            if concepts:
+                # Batch refinement: one offer per concept, same order, type and evidence
+                offers = [dict(concept, name=f"{concept.get('name', 'Mock Offer')} (Refined)") for concept in concepts]
+                return json.dumps({"report_intro": "Mock report intro.", "offers": offers})
+
+            # Fan-out task ("Strategy: X" / "Offers: n"), else one offer per strategy
+            task = re.search(r"^Strategy: (.+)$", data, re.MULTILINE)
+            count = re.search(r"^Offers: (\d+)$", data, re.MULTILINE)
+            strategies = ([task.group(1).strip()] * int(count.group(1) if count else 1) if task
+                          else ["Defensive", "First-to-Market"])
+            # Distinct prompts get distinct names, so merged fan-out results don't collapse
+            tag = f" #{hashlib.sha1(data.encode('utf-8')).hexdigest()[:6]}" if task else ""
+            offers = [
+                {
+                    "name": f"Mock Offer {i + 1}{tag}",
+                    "witty_rationale": "Synthetic rationale from the mock gateway.",
+                    "type": strategy,
+                    "evidence_signals": [signals[i % len(signals)]],
+                    "feasibility": round(6 + 3 * ((i * 7) % 10) / 10, 1),
+                    "impact": round(6 + 3 * ((i * 3) % 10) / 10, 1)
+                }
+                for i, strategy in enumerate(strategies)
+            ]
+            return json.dumps({"report_intro": "Mock report intro.", "offers": offers})
+
+        words = ["mock"] * tokens
+        if not cited:
+            return "- " + " ".join(words)
+        return f"- Evidence {signals[0]}: " + " ".join(words)
+
+    @staticmethod
+    def _concepts(data):
+        """JSON-object lines of a CONCEPTS section (batched validation requests)."""
+        section = re.search(r"^CONCEPTS:\n(.*?)(?:\n\n|\Z)", data, re.MULTILINE | re.DOTALL)
+        concepts = []
+        for line in (section.group(1).splitlines() if section else []):
+            try:
+                concept = json.loads(line)
+            except json.JSONDecodeError:
+                return []
+            if not isinstance(concept, dict):
+                return []
+            concepts.append(concept)
+        return concepts
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def handle(self):
+                try:
+                    super().handle()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # client gave up: timed out, or a cancelled hedge
+
+            def do_POST(self):
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    return self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+
+                ttft, tokens, error = server._draw()
+                time.sleep(ttft)
+
+                if error:
+                    return self._send_json(error, {"error": {"message": "Injected mock failure", "type": "mock_error"}})
+
+                content = server._content(body, tokens)
+                prompt_tokens = sum(len(str(m.get("content", ""))) for m in body.get("messages", [])) // 4
+                completion_tokens = max(1, len(content) // 4)
+                rate = server.config.tokens_per_second
+
+                usage = {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens
+                }
+                if body.get("stream"):
+                    return self._stream(body, content, rate, usage)
+
+                if rate:
+                    time.sleep(completion_tokens / rate)
+
+                self._send_json(200, {
+                    "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body.get("model", "mock"),
+                    "choices": [{
+                        "index": 0,
+                        "finish_reason": "stop",
+                        "message": {"role": "assistant", "content": content}
+                    }],
+                    "usage": usage
+                })
+
+            def _send_json(self, status, payload):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _stream(self, body, content, rate, usage):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-cache")
+                self.send_header("Connection", "close")
+                self.end_headers()
+
+                completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+                pieces = re.findall(r"\S+\s*", content) or [content]
+                for i, piece in enumerate(pieces):
+                    delta = {"content": piece} if i else {"role": "assistant", "content": piece}
+                    self._event({
+                        "id": completion_id,
+                        "object": "chat.completion.chunk",
+                        "created": int(time.time()),
+                        "model": body.get("model", "mock"),
+                        "choices": [{"index": 0, "delta": delta, "finish_reason": None}]
+                    })
+                    if rate:
+                        time.sleep(max(1, len(piece) // 4) / rate)
+
+                self._event({
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": body.get("model", "mock"),
+                    "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]
+                })
+                if (body.get("stream_options") or {}).get("include_usage"):
+                    # Like the OpenAI API: one extra chunk with no choices and the request's usage
+                    self._event({
+                        "id": completion_id,
+                        "object": "chat.completion.chunk",
+                        "created": int(time.time()),
+                        "model": body.get("model", "mock"),
+                        "choices": [],
+                        "usage": usage
+                    })
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+                self.close_connection = True
+
+            def _event(self, payload):
+                self.wfile.write(f"data: {json.dumps(payload)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline OpenAI-compatible mock gateway")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", default=MockConfig.latency, help="fixed:s | uniform:a,b | normal:mu,sd | lognormal:median,sigma")
+    parser.add_argument("--tokens-per-second", type=float, default=MockConfig.tokens_per_second)
+    parser.add_argument("--completion-tokens", type=int, default=MockConfig.completion_tokens)
+    parser.add_argument("--error-rate", type=float, default=MockConfig.error_rate)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    config = MockConfig(
+        latency=args.latency,
+        tokens_per_second=args.tokens_per_second,
+        completion_tokens=args.completion_tokens,
+        error_rate=args.error_rate,
+        seed=args.seed
+    )
+    server = MockLLMServer(config, host=args.host, port=args.port)
+    print(f"Mock LLM gateway listening on {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,416 @@
+# checkpointing.py
+#
+# Durable, offline checkpointing for the compiled graph.
+#
+# SqliteCheckpointSaver is a LangGraph checkpointer backed by a local SQLite
+# file: every superstep's channel values and every finished node's writes
+# are persisted under the run's thread ID. When a node fails (malformed
+# validator JSON, gateway timeout, ...), invoking the graph again with
+# input None (engine.resume_input() also re-stamps the run's context
+# deadline) and the same run ID resumes from the last successful node; the
+# writes of nodes that already finished in the failed superstep are kept,
+# so their LLM calls are not paid for twice.
+#
+# FrameSerializer stores DataFrames (prioritization_table, competitor threat
+# tables) and TableRef handles (raw_market_signals, competitor gap rows) as
+# compressed Arrow IPC blobs, a streaming DecayedSignalAggregator as its
+# plain-data snapshot, and everything else with LangGraph's msgpack
+# serializer (no pickle fallback: state that cannot be stored as data fails
+# loudly instead of being pickled into the database).
+#
+# A run that completes is never resumed, so callers drop its checkpoints
+# with checkpointer.delete_thread(run_id).
+#
+# Usage:
+#   app = engine.build_app(checkpoint=True)
+#   config = run_config(run_id)
+#   app.invoke({"wendys_active": [...]}, config)   # fails in "validate"
+#   pending_nodes(app, run_id)                      # ("validate",)
+#   app.invoke(engine.resume_input(), config)       # resumes at "validate"
+
+import asyncio
+import random
+import sqlite3
+import threading
+
+import numpy as np
+import ormsgpack
+import pandas as pd
+import pyarrow as pa
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+    writes_sort_key,
+)
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from frames import TableRef
+from signal_aggregator import DecayedSignalAggregator
+
+_FRAME_MARKER = "__arrow_frame__"
+_TABLE_REF_MARKER = "__arrow_table_ref__"
+_AGGREGATOR_MARKER = "__signal_aggregator__"
+_TIMESTAMP_MARKER = "__pd_timestamp__"
+_MAX_FRAME_DEPTH = 4
+_IPC_OPTIONS = pa.ipc.IpcWriteOptions(compression="zstd")
+
+
+# ---------------------------------------------------------
+# SERIALIZATION
+# ---------------------------------------------------------
+def _frame_to_arrow(df: pd.DataFrame) -> bytes:
+    """Arrow IPC stream (zstd); unlike Parquet it keeps datetime64[s] and categoricals exact."""
+    table = pa.Table.from_pandas(df, preserve_index=True)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema, options=_IPC_OPTIONS) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def _frame_from_arrow(data: bytes) -> pd.DataFrame:
+    return pa.ipc.open_stream(data).read_all().to_pandas()
+
+
+class FrameSerializer:
+    """
+    SerializerProtocol that writes DataFrames and TableRefs as Arrow IPC.
+
+    Top-level frames are stored as ("arrow", bytes), top-level TableRefs as
+    ("arrow-ref", [ref_id, bytes]) so a resumed run keeps their IDs, and a
+    DecayedSignalAggregator as ("signal-aggregator", msgpack of its to_state()). Frames nested in
+    dicts/lists (e.g. competitor_intel["threats"]) are swapped for markers,
+    the skeleton goes through the inner serializer, and the frames travel
+    alongside as Arrow blobs. Frames Arrow cannot hold (e.g. mixed-type
+    object columns) fall back to the inner serializer. pd.Timestamp values
+    travel as ISO strings, since LangGraph's msgpack loader refuses to
+    rebuild them, and NumPy scalars (scores in window dicts) as Python scalars.
+    """
+
+    def __init__(self, inner=None):
+        self.inner = inner or JsonPlusSerializer()
+
+    def _extract(self, obj, frames, markers, depth=0):
+        """Skeleton of obj with frames/timestamps swapped for markers (counted in markers)."""
+        if isinstance(obj, TableRef):
+            frames.append(obj.to_ipc())
+            markers.append(_TABLE_REF_MARKER)
+            return {_TABLE_REF_MARKER: [len(frames) - 1, obj.ref_id]}
+        if isinstance(obj, DecayedSignalAggregator):
+            frames.append(ormsgpack.packb(obj.to_state()))
+            markers.append(_AGGREGATOR_MARKER)
+            return {_AGGREGATOR_MARKER: len(frames) - 1}
+        if isinstance(obj, pd.DataFrame):
+            try:
+                frames.append(_frame_to_arrow(obj))
+            except (pa.ArrowException, ValueError, TypeError):
+                return obj
+            markers.append(_FRAME_MARKER)
+            return {_FRAME_MARKER: len(frames) - 1}
+        if isinstance(obj, pd.Timestamp):
+            markers.append(_TIMESTAMP_MARKER)
+            return {_TIMESTAMP_MARKER: obj.isoformat()}
+        if isinstance(obj, np.generic):
+            return obj.item()
+        if depth >= _MAX_FRAME_DEPTH:
+            return obj
+        if isinstance(obj, dict):
+            return {key: self._extract(value, frames, markers, depth + 1) for key, value in obj.items()}
+        if isinstance(obj, (list, tuple)):
+            items = [self._extract(value, frames, markers, depth + 1) for value in obj]
+            return items if isinstance(obj, list) else tuple(items)
+        return obj
+
+    def _restore(self, obj, frames):
+        if isinstance(obj, dict):
+            if len(obj) == 1 and _FRAME_MARKER in obj:
+                return _frame_from_arrow(frames[obj[_FRAME_MARKER]])
+            if len(obj) == 1 and _TABLE_REF_MARKER in obj:
+                index, ref_id = obj[_TABLE_REF_MARKER]
+                return TableRef.from_ipc(frames[index], ref_id)
+            if len(obj) == 1 and _AGGREGATOR_MARKER in obj:
+                return DecayedSignalAggregator.from_state(ormsgpack.unpackb(frames[obj[_AGGREGATOR_MARKER]]))
+            if len(obj) == 1 and _TIMESTAMP_MARKER in obj:
+                return pd.Timestamp(obj[_TIMESTAMP_MARKER])
+            return {key: self._restore(value, frames) for key, value in obj.items()}
+        if isinstance(obj, list):
+            return [self._restore(value, frames) for value in obj]
+        if isinstance(obj, tuple):
+            return tuple(self._restore(value, frames) for value in obj)
+        return obj
+
+    def dumps_typed(self, obj):
+        if isinstance(obj, TableRef):
+            return "arrow-ref", ormsgpack.packb([obj.ref_id, obj.to_ipc()])
+        if isinstance(obj, DecayedSignalAggregator):
+            return "signal-aggregator", ormsgpack.packb(obj.to_state())
+        if isinstance(obj, pd.DataFrame):
+            try:
+                return "arrow", _frame_to_arrow(obj)
+            except (pa.ArrowException, ValueError, TypeError):
+                return self.inner.dumps_typed(obj)
+
+        frames, markers = [], []
+        skeleton = self._extract(obj, frames, markers)
+        if not markers:
+            return self.inner.dumps_typed(skeleton)
+
+        type_, payload = self.inner.dumps_typed(skeleton)
+        return f"arrow+{type_}", ormsgpack.packb([payload, frames])
+
+    def loads_typed(self, data):
+        type_, payload = data
+        if type_ == "arrow":
+            return _frame_from_arrow(payload)
+        if type_ == "arrow-ref":
+            ref_id, ipc = ormsgpack.unpackb(payload)
+            return TableRef.from_ipc(ipc, ref_id)
+        if type_ == "signal-aggregator":
+            return DecayedSignalAggregator.from_state(ormsgpack.unpackb(payload))
+        if type_.startswith("arrow+"):
+            skeleton_payload, frames = ormsgpack.unpackb(payload)
+            skeleton = self.inner.loads_typed((type_[len("arrow+"):], skeleton_payload))
+            return self._restore(skeleton, frames)
+        return self.inner.loads_typed(data)
+
+
+# ---------------------------------------------------------
+# CHECKPOINT SAVER
+# ---------------------------------------------------------
+_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS checkpoints (
+        thread_id TEXT NOT NULL, checkpoint_ns TEXT NOT NULL, checkpoint_id TEXT NOT NULL,
+        parent_checkpoint_id TEXT,
+        type TEXT NOT NULL, checkpoint BLOB NOT NULL,
+        metadata_type TEXT NOT NULL, metadata BLOB NOT NULL,
+        PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id))""",
+    """CREATE TABLE IF NOT EXISTS blobs (
+        thread_id TEXT NOT NULL, checkpoint_ns TEXT NOT NULL, channel TEXT NOT NULL,
+        version TEXT NOT NULL, type TEXT NOT NULL, blob BLOB,
+        PRIMARY KEY (thread_id, checkpoint_ns, channel, version))""",
+    """CREATE TABLE IF NOT EXISTS writes (
+        thread_id TEXT NOT NULL, checkpoint_ns TEXT NOT NULL, checkpoint_id TEXT NOT NULL,
+        task_id TEXT NOT NULL, idx INTEGER NOT NULL, channel TEXT NOT NULL,
+        type TEXT NOT NULL, blob BLOB, task_path TEXT NOT NULL DEFAULT '',
+        PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx))"""
+)
+
+
+class SqliteCheckpointSaver(BaseCheckpointSaver[str]):
+    """LangGraph checkpointer persisted to a local SQLite file (thread ID = run ID)."""
+
+    def __init__(self, path=".checkpoints.sqlite", serde=None):
+        super().__init__(serde=serde or FrameSerializer())
+        self.path = path
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            for statement in _SCHEMA:
+                conn.execute(statement)
+
+    def _connect(self):
+        # One short-lived connection per operation keeps parallel graph branches thread-safe
+        return sqlite3.connect(self.path, timeout=30)
+
+    # ---------------------------------------------------
+    # READ
+    # ---------------------------------------------------
+    def _load_blobs(self, conn, thread_id, checkpoint_ns, versions):
+        values = {}
+        for channel, version in versions.items():
+            row = conn.execute(
+                "SELECT type, blob FROM blobs WHERE thread_id = ? AND checkpoint_ns = ? "
+                "AND channel = ? AND version = ?",
+                (thread_id, checkpoint_ns, channel, str(version))
+            ).fetchone()
+            if row is None or row[0] == "empty":
+                continue
+            values[channel] = self.serde.loads_typed((row[0], row[1]))
+        return values
+
+    def _load_writes(self, conn, thread_id, checkpoint_ns, checkpoint_id):
+        rows = conn.execute(
+            "SELECT task_id, idx, channel, type, blob, task_path FROM writes "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+            (thread_id, checkpoint_ns, checkpoint_id)
+        ).fetchall()
+        rows.sort(key=lambda r: writes_sort_key(r[5], r[0], r[1]))
+        return [(task_id, channel, self.serde.loads_typed((type_, blob))) for task_id, _, channel, type_, blob, _ in rows]
+
+    def _tuple(self, conn, thread_id, checkpoint_ns, row):
+        checkpoint_id, parent_id, type_, checkpoint_blob, metadata_type, metadata_blob = row
+        checkpoint = self.serde.loads_typed((type_, checkpoint_blob))
+        return CheckpointTuple(
+            config={"configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint_id
+            }},
+            checkpoint={
+                **checkpoint,
+                "channel_values": self._load_blobs(conn, thread_id, checkpoint_ns, checkpoint["channel_versions"])
+            },
+            metadata=self.serde.loads_typed((metadata_type, metadata_blob)),
+            pending_writes=self._load_writes(conn, thread_id, checkpoint_ns, checkpoint_id),
+            parent_config=(
+                {"configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": parent_id
+                }}
+                if parent_id else None
+            )
+        )
+
+    def get_tuple(self, config):
+        configurable = config["configurable"]
+        thread_id = configurable["thread_id"]
+        checkpoint_ns = configurable.get("checkpoint_ns", "")
+        checkpoint_id = get_checkpoint_id(config)
+
+        query = (
+            "SELECT checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata "
+            "FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?"
+        )
+        params = [thread_id, checkpoint_ns]
+        if checkpoint_id:
+            query += " AND checkpoint_id = ?"
+            params.append(checkpoint_id)
+        else:
+            # Checkpoint IDs are time-ordered (uuid6)
+            query += " ORDER BY checkpoint_id DESC LIMIT 1"
+
+        with self._connect() as conn:
+            row = conn.execute(query, params).fetchone()
+            return self._tuple(conn, thread_id, checkpoint_ns, row) if row else None
+
+    def list(self, config, *, filter=None, before=None, limit=None):
+        query = (
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, "
+            "type, checkpoint, metadata_type, metadata FROM checkpoints WHERE 1 = 1"
+        )
+        params = []
+        if config:
+            configurable = config["configurable"]
+            query += " AND thread_id = ?"
+            params.append(configurable["thread_id"])
+            if configurable.get("checkpoint_ns") is not None:
+                query += " AND checkpoint_ns = ?"
+                params.append(configurable["checkpoint_ns"])
+            if get_checkpoint_id(config):
+                query += " AND checkpoint_id = ?"
+                params.append(get_checkpoint_id(config))
+        if before and get_checkpoint_id(before):
+            query += " AND checkpoint_id < ?"
+            params.append(get_checkpoint_id(before))
+        query += " ORDER BY checkpoint_id DESC"
+
+        with self._connect() as conn:
+            rows = conn.execute(query, params).fetchall()
+            for thread_id, checkpoint_ns, *row in rows:
+                if limit is not None and limit <= 0:
+                    break
+                metadata = self.serde.loads_typed((row[4], row[5]))
+                if filter and not all(metadata.get(key) == value for key, value in filter.items()):
+                    continue
+                if limit is not None:
+                    limit -= 1
+                yield self._tuple(conn, thread_id, checkpoint_ns, row)
+
+    # ---------------------------------------------------
+    # WRITE
+    # ---------------------------------------------------
+    def put(self, config, checkpoint, metadata, new_versions):
+        configurable = config["configurable"]
+        thread_id = configurable["thread_id"]
+        checkpoint_ns = configurable.get("checkpoint_ns", "")
+
+        stored = checkpoint.copy()
+        values = stored.pop("channel_values")
+        blobs = [
+            (thread_id, checkpoint_ns, channel, str(version),
+             *(self.serde.dumps_typed(values[channel]) if channel in values else ("empty", None)))
+            for channel, version in new_versions.items()
+        ]
+        type_, checkpoint_blob = self.serde.dumps_typed(stored)
+        metadata_type, metadata_blob = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+
+        with self._lock, self._connect() as conn:
+            conn.executemany("INSERT OR REPLACE INTO blobs VALUES (?, ?, ?, ?, ?, ?)", blobs)
+            conn.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (thread_id, checkpoint_ns, checkpoint["id"], configurable.get("checkpoint_id"),
+                 type_, checkpoint_blob, metadata_type, metadata_blob)
+            )
+
+        return {"configurable": {
+            "thread_id": thread_id,
+            "checkpoint_ns": checkpoint_ns,
+            "checkpoint_id": checkpoint["id"]
+        }}
+
+    def put_writes(self, config, writes, task_id, task_path=""):
+        configurable = config["configurable"]
+        key = (configurable["thread_id"], configurable.get("checkpoint_ns", ""), configurable["checkpoint_id"])
+
+        rows = []
+        replace = False
+        for idx, (channel, value) in enumerate(writes):
+            idx = WRITES_IDX_MAP.get(channel, idx)
+            # Special writes (errors, interrupts) overwrite; regular ones are write-once
+            replace = replace or idx < 0
+            rows.append((*key, task_id, idx, channel, *self.serde.dumps_typed(value), task_path))
+
+        verb = "INSERT OR REPLACE" if replace else "INSERT OR IGNORE"
+        with self._lock, self._connect() as conn:
+            conn.executemany(f"{verb} INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def delete_thread(self, thread_id):
+        with self._lock, self._connect() as conn:
+            for table in ("checkpoints", "blobs", "writes"):
+                conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+
+    def get_next_version(self, current, channel=None):
+        # Same sortable string versions as LangGraph's InMemorySaver
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+    # ---------------------------------------------------
+    # ASYNC (SQLite work runs off the event loop)
+    # ---------------------------------------------------
+    async def aget_tuple(self, config):
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        items = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for item in items:
+            yield item
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id, task_path=""):
+        return await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id):
+        return await asyncio.to_thread(self.delete_thread, thread_id)
+
+
+# ---------------------------------------------------------
+# RUN HELPERS
+# ---------------------------------------------------------
+def run_config(run_id) -> dict:
+    """Config for a checkpointed run: the run ID doubles as the LangGraph thread ID."""
+    return {"configurable": {"thread_id": run_id, "run_id": run_id}}
+
+
+def pending_nodes(app, run_id) -> tuple:
+    """Nodes a resume of run_id would execute next (empty once the run finished)."""
+    return tuple(app.get_state(run_config(run_id)).next)
@@ -0,0 +1,41 @@
+# conftest.py
+#
+# Shared pytest setup. Tests reuse the parity references and the mock
+# gateway that live in benchmarks/. Graph tests run against the in-process
+# mock gateway (instant, deterministic answers), with the LLM response
+# cache off so every node call reaches it and can be counted.
+
+import dataclasses
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks"))
+
+from bench_design_modes import RequestCounter  # noqa: E402
+from mock_llm_server import MockConfig, MockLLMServer  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def llm_gateway():
+    server = MockLLMServer(MockConfig(latency="fixed:0", tokens_per_second=0, seed=0)).start()
+    server.requests = RequestCounter(server)
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def engine_runtime(llm_gateway, tmp_path):
+    """A fresh process runtime on the mock gateway, checkpointing under tmp_path."""
+    import engine
+
+    config = dataclasses.replace(
+        engine.EngineConfig.from_env(),
+        api_key="mock",
+        base_url=llm_gateway.url,
+        cache_nodes=frozenset(),
+        cache_path="",
+        checkpoint_path=str(tmp_path / "checkpoints.sqlite")
+    )
+    yield engine.configure(config)
@@ -0,0 +1,315 @@
+# coordinator.py
+#
+# Process-wide admission control for a shared deployment.
+#
+# ExecutionCoordinator.run(key, fn) gates whole graph runs:
+#   * identical in-flight runs (same key) are coalesced singleflight-style:
+#     the first caller executes, later callers wait and share its result,
+#   * at most max_concurrent_runs execute at once; the rest wait in a
+#     bounded FIFO queue (QueueFull beyond max_queued_runs) and are told
+#     their position as it changes.
+#
+# RateLimiter sits on the raw chat.completions client (below the resilient
+# call layer, so every retry and hedge is counted) and holds each request
+# until both token buckets, requests/minute and tokens/minute, have room.
+# Token cost is estimated from the prompt up front and reconciled with the
+# reported usage afterwards.
+
+import asyncio
+import json
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+from datetime import date
+
+from llm_cache import report_usage
+from prompts import message_tokens
+from resilience import DeadlineExceeded
+
+# Completion tokens assumed for a request without max_tokens
+DEFAULT_COMPLETION_ESTIMATE = 400
+
+
+class QueueFull(RuntimeError):
+    """The run queue is at capacity; the caller should retry later."""
+
+
+def run_key(payload, graph=None, ignore=("stream_tokens", "context_deadline"), day=None) -> str:
+    """
+    Coalescing key of a graph input: the payload (minus delivery-only keys,
+    with list values order-insensitive), the graph it runs on (e.g. the
+    design-mode flags the app was compiled with) and the calendar day.
+    """
+    material = {
+        key: sorted(value) if isinstance(value, (list, tuple, set, frozenset)) else value
+        for key, value in (payload or {}).items()
+        if key not in ignore
+    }
+    material["graph"] = graph
+    material["day"] = (day or date.today()).isoformat()
+    return json.dumps(material, sort_keys=True, default=str)
+
+
+# ---------------------------------------------------------
+# RUN ADMISSION + COALESCING
+# ---------------------------------------------------------
+class ExecutionCoordinator:
+    """
+    Singleflight + bounded-concurrency gate for graph runs.
+
+    Usage:
+        result, shared = coordinator.run(run_key(payload, graph), lambda: app.invoke(payload),
+                                         on_queue=lambda pos: ..., on_join=lambda: ...)
+
+    stats counts runs / coalesced / queued / rejected.
+    """
+
+    def __init__(self, max_concurrent_runs=4, max_queued_runs=16):
+        self.max_concurrent_runs = max_concurrent_runs
+        self.max_queued_runs = max_queued_runs
+        self.stats = Counter()
+        self._cond = threading.Condition()
+        self._running = 0
+        self._queue = deque()    # tickets waiting for a run slot, oldest first
+        self._in_flight = {}     # key -> Future shared by coalesced callers
+
+    def run(self, key, fn, on_queue=None, on_join=None):
+        """
+        (fn(), False) for the first caller of key, (shared result, True) for
+        callers that arrive while it is in flight; fn's exception is raised
+        to all of them.
+        """
+        with self._cond:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self._in_flight[key] = Future()
+            self.stats["coalesced" if not leader else "runs"] += 1
+
+        if not leader:
+            if on_join:
+                on_join()
+            return future.result(), True
+
+        try:
+            with self.admission(on_queue):
+                result = fn()
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            with self._cond:
+                self._in_flight.pop(key, None)
+
+    def admission(self, on_queue=None):
+        """Context manager holding one run slot; waits in the queue if none is free."""
+        return _Admission(self, on_queue)
+
+    def _acquire(self, on_queue):
+        ticket = object()
+        with self._cond:
+            if self._running < self.max_concurrent_runs and not self._queue:
+                self._running += 1
+                return
+            if len(self._queue) >= self.max_queued_runs:
+                self.stats["rejected"] += 1
+                raise QueueFull(f"{len(self._queue)} runs already queued; try again shortly")
+            self._queue.append(ticket)
+            self.stats["queued"] += 1
+
+        last = None
+        try:
+            while True:
+                with self._cond:
+                    position = self._queue.index(ticket) + 1
+                    if position == 1 and self._running < self.max_concurrent_runs:
+                        self._queue.popleft()
+                        self._running += 1
+                        return
+                    if position == last:
+                        self._cond.wait(timeout=1.0)
+                        continue
+                # Report outside the lock (callbacks may touch the UI)
+                last = position
+                if on_queue:
+                    on_queue(position)
+        except BaseException:
+            with self._cond:
+                if ticket in self._queue:
+                    self._queue.remove(ticket)
+                self._cond.notify_all()
+            raise
+
+    def _release(self):
+        with self._cond:
+            self._running -= 1
+            self._cond.notify_all()
+
+    def snapshot(self) -> dict:
+        with self._cond:
+            return {**self.stats, "running": self._running, "waiting": len(self._queue),
+                    "in_flight_keys": len(self._in_flight)}
+
+
+class _Admission:
+    def __init__(self, coordinator, on_queue):
+        self._coordinator = coordinator
+        self._on_queue = on_queue
+
+    def __enter__(self):
+        self._coordinator._acquire(self._on_queue)
+        return self
+
+    def __exit__(self, *exc):
+        self._coordinator._release()
+
+
+# ---------------------------------------------------------
+# REQUEST / TOKEN RATE LIMITING
+# ---------------------------------------------------------
+class TokenBucket:
+    """Refills at per_minute / 60 per second up to capacity; not thread-safe on its own."""
+
+    def __init__(self, per_minute, capacity=None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else per_minute / 6.0   # 10 seconds of burst
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount, now):
+        """Seconds until amount is available (0 = now)."""
+        self._refill(now)
+        amount = min(amount, self.capacity)   # oversized requests wait for a full bucket, never forever
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount):
+        self.level -= min(amount, self.capacity)
+
+    def adjust(self, amount):
+        """Refund (positive) or charge (negative) after the real cost is known; may go into debt."""
+        self.level = min(self.capacity, self.level + amount)
+
+
+class RateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute buckets for LLM calls.
+
+    A limit of None (or 0) disables that bucket. stats counts requests,
+    throttled requests and throttled_seconds.
+    """
+
+    def __init__(self, requests_per_minute=None, tokens_per_minute=None):
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.stats = Counter()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def estimate(kwargs) -> int:
+        """Prompt tokens plus the completion allowance of a request."""
+        return message_tokens(kwargs.get("messages", [])) + (kwargs.get("max_tokens") or DEFAULT_COMPLETION_ESTIMATE)
+
+    def _try_take(self, cost):
+        """0.0 if the request was admitted, else seconds to wait before trying again."""
+        now = time.monotonic()
+        with self._lock:
+            wait = max(
+                self.requests.wait_time(1, now) if self.requests else 0.0,
+                self.tokens.wait_time(cost, now) if self.tokens else 0.0
+            )
+            if wait == 0.0:
+                if self.requests:
+                    self.requests.take(1)
+                if self.tokens:
+                    self.tokens.take(cost)
+                self.stats["requests"] += 1
+        return wait
+
+    def _settle(self, cost, response):
+        usage = getattr(response, "usage", None)
+        if self.tokens is not None and usage is not None and usage.total_tokens is not None:
+            with self._lock:
+                self.tokens.adjust(cost - usage.total_tokens)
+
+    def _throttled(self, started):
+        with self._lock:
+            self.stats["throttled"] += 1
+            self.stats["throttled_seconds"] += time.monotonic() - started
+
+    def _check_timeout(self, started, wait, timeout):
+        if timeout is not None and time.monotonic() + wait - started > timeout:
+            raise DeadlineExceeded(f"rate limit: no capacity within {timeout:.2f}s")
+
+    def acquire(self, cost, timeout=None):
+        """Blocks until admitted (seconds waited); DeadlineExceeded if that would exceed timeout."""
+        started = time.monotonic()
+        wait = self._try_take(cost)
+        if not wait:
+            return 0.0
+        while wait:
+            self._check_timeout(started, wait, timeout)
+            time.sleep(wait)
+            wait = self._try_take(cost)
+        self._throttled(started)
+        return time.monotonic() - started
+
+    async def aacquire(self, cost, timeout=None):
+        """Async variant of acquire()."""
+        started = time.monotonic()
+        wait = self._try_take(cost)
+        if not wait:
+            return 0.0
+        while wait:
+            self._check_timeout(started, wait, timeout)
+            await asyncio.sleep(wait)
+            wait = self._try_take(cost)
+        self._throttled(started)
+        return time.monotonic() - started
+
+    def wrap(self, completions):
+        """Blocking `chat.completions` stand-in that waits for rate-limit capacity."""
+        return _LimitedCompletions(self, completions)
+
+    def wrap_async(self, completions):
+        return _AsyncLimitedCompletions(self, completions)
+
+
+def _remaining(kwargs, waited):
+    timeout = kwargs.get("timeout")
+    return kwargs if timeout is None else {**kwargs, "timeout": max(0.001, timeout - waited)}
+
+
+class _LimitedCompletions:
+    def __init__(self, limiter, completions):
+        self._limiter = limiter
+        self._completions = completions
+
+    def create(self, **kwargs):
+        cost = self._limiter.estimate(kwargs)
+        waited = self._limiter.acquire(cost, kwargs.get("timeout"))
+        response = self._completions.create(**_remaining(kwargs, waited))
+        if kwargs.get("stream"):
+            # Streams settle on their final usage chunk (stream_options include_usage)
+            return report_usage(response, lambda chunk: self._limiter._settle(cost, chunk))
+        self._limiter._settle(cost, response)
+        return response
+
+
+class _AsyncLimitedCompletions(_LimitedCompletions):
+    async def create(self, **kwargs):
+        cost = self._limiter.estimate(kwargs)
+        waited = await self._limiter.aacquire(cost, kwargs.get("timeout"))
+        response = await self._completions.create(**_remaining(kwargs, waited))
+        if kwargs.get("stream"):
+            # Streams settle on their final usage chunk (stream_options include_usage)
+            return report_usage(response, lambda chunk: self._limiter._settle(cost, chunk))
+        self._limiter._settle(cost, response)
+        return response
@@ -1,41 +1,358 @@
 # **2. Import and Setup**
 
+# Heavy LLM/orchestration libraries (openai, langgraph) are imported lazily by
+# build_app()/get_runtime(), so `import engine` stays cheap and never needs an
+# API key; tools that only use the deterministic nodes pay for pandas/numpy only.
+
 import pandas as pd # For data manipulation and analysis
 import numpy as np # For numerical operations
 import random # For generating random data
 import json # For working with JSON data
-from typing import TypedDict, List # For type hinting, especially for state management
-from faker import Faker # For generating fake data for simulation
-from openai import OpenAI # For interacting with OpenAI-compatible LLMs
+import os # For environment-driven configuration
+import threading # Guards one-time runtime construction
+import time # Wall-clock context deadline per run
+import operator # Reducer for keys several branches append to
+from dataclasses import dataclass, field # For the engine configuration
+from typing import Annotated, TypedDict, List # For type hinting, especially for state management
 # from google.colab import userdata # For securely accessing Colab secrets
 from datetime import date # For date operations
-from langgraph.graph import StateGraph, START, END # For building the LangGraph agent orchestration
+from signal_generator import generate_competitor_signals, generate_market_signals, generate_redemption_logs # Batched, seedable signal simulation
+from redemption_analytics import RedemptionAnalytics # Integer-coded redemption counts (segment x channel x redeemed)
+from llm_cache import CachedChatClient, LLMResponseCache # Content-addressed LLM response cache
+from tracing import Tracer # Per-node spans: latency, CPU, memory, state size, tokens
+from incremental import IncrementalExecutor # Replays node outputs whose input slice is unchanged
+from scoring import CONTEXT_DIMENSIONS, CONTEXT_TOP_K, RECENCY_DECAY, format_threat_summary # Shared scoring constants (window dims / top-K / decay) + threat summary format
+from signal_cube import SignalCube # Day-bucketed signal counts, scored by a recency-kernel product
+from prompts import Section, assemble, compact_json, records_table, text_lines # Token-budgeted, cache-friendly prompt layout
+from offer_schema import OFFER_TYPES, parse_offers, parse_report, validate_offers # Local validation of the offers JSON contract
+from resilience import CallPolicy, DeadlineExceeded, ResilientCaller # Per-node deadlines, jittered retries and p95 hedging
+from coordinator import ExecutionCoordinator, RateLimiter # Shared-deployment admission control and LLM rate limits
+from frames import TableRef # Arrow-backed handles for large tabular state
+from montecarlo import MonteCarloSampler, window_evidence # Process-pool score intervals over seeded replicas
 
 # Accessing API key from Colab Secrets (ensure 'OPENAI_API_KEY' is set in your secrets tab)
 # openai_api_key = userdata.get('OPENAI_API_KEY')
 
-import os
-from openai import OpenAI
 
-openai_api_key = os.getenv("OPENAI_API_KEY")
+@dataclass
+class EngineConfig:
+    """Runtime settings for build_app(); EngineConfig.from_env() mirrors the environment variables."""
+    api_key: str = None
+    # Any OpenAI-compatible endpoint (e.g. benchmarks/mock_llm_server.py for offline runs)
+    base_url: str = "https://api.ai-gateway.tigeranalytics.com"
+    # Shared HTTP connection pool settings (keep-alive reuse across nodes and runs)
+    max_connections: int = 100
+    max_keepalive: int = 20
+    timeout_seconds: float = 120.0
+    # Resilient call layer: per-node deadlines (seconds, timeout_seconds for unlisted nodes),
+    # transient-error retries, and a duplicate request after a node's observed p95 latency
+    node_deadlines: dict = field(default_factory=lambda: {"cust": 30.0, "trend": 45.0, "design": 60.0, "validate": 60.0,
+                                                          "design_pair": 30.0, "validate_batch": 45.0})
+    max_retries: int = 3
+    hedge_nodes: frozenset = frozenset({"cust", "trend", "design", "validate", "design_pair", "validate_batch"})
+    # Shared-deployment admission control: concurrent graph runs, bounded wait queue,
+    # and gateway rate limits (0 disables a limit)
+    max_concurrent_runs: int = 4
+    max_queued_runs: int = 16
+    llm_requests_per_minute: int = 600
+    llm_tokens_per_minute: int = 1_000_000
+    # Run-level SLO for the context branches: narration that misses it falls back to deterministic text
+    context_deadline_seconds: float = 45.0
+    # Processes for Monte Carlo score intervals (None = one per CPU)
+    monte_carlo_workers: int = None
+    # Fan-out design: graph tasks (designer / validator calls) in flight at once per run
+    design_concurrency: int = 8
+    # Cache layer around the shared client; nodes opt in by graph node name
+    cache_nodes: frozenset = frozenset({"cust"})
+    cache_path: str = ".llm_cache.sqlite"
+    cache_ttl_seconds: int = 7 * 24 * 3600
+    # Per-node tracing: spans kept in-process, optionally appended to trace_jsonl_path
+    trace_jsonl_path: str = None
+    trace_memory: bool = False # tracemalloc roughly doubles node runtime; opt in with TRACE_MEMORY=1
+    # SQLite checkpoint store used by build_app(checkpoint=True) for resumable runs
+    checkpoint_path: str = ".checkpoints.sqlite"
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            api_key=os.getenv("OPENAI_API_KEY"),
+            base_url=os.getenv("LLM_BASE_URL", cls.base_url),
+            max_connections=int(os.getenv("LLM_MAX_CONNECTIONS", cls.max_connections)),
+            max_keepalive=int(os.getenv("LLM_MAX_KEEPALIVE", cls.max_keepalive)),
+            timeout_seconds=float(os.getenv("LLM_TIMEOUT_SECONDS", cls.timeout_seconds)),
+            node_deadlines=_parse_deadlines(os.getenv("LLM_NODE_DEADLINES")) or cls().node_deadlines,
+            max_retries=int(os.getenv("LLM_MAX_RETRIES", cls.max_retries)),
+            hedge_nodes=frozenset(node for node in os.getenv("LLM_HEDGE_NODES", ",".join(sorted(cls.hedge_nodes))).split(",") if node),
+            max_concurrent_runs=int(os.getenv("MAX_CONCURRENT_RUNS", cls.max_concurrent_runs)),
+            max_queued_runs=int(os.getenv("MAX_QUEUED_RUNS", cls.max_queued_runs)),
+            llm_requests_per_minute=int(os.getenv("LLM_REQUESTS_PER_MINUTE", cls.llm_requests_per_minute)),
+            llm_tokens_per_minute=int(os.getenv("LLM_TOKENS_PER_MINUTE", cls.llm_tokens_per_minute)),
+            context_deadline_seconds=float(os.getenv("CONTEXT_DEADLINE_SECONDS", cls.context_deadline_seconds)),
+            monte_carlo_workers=int(os.getenv("MONTE_CARLO_WORKERS", 0)) or None,
+            design_concurrency=int(os.getenv("DESIGN_CONCURRENCY", cls.design_concurrency)),
+            cache_nodes=frozenset(node for node in os.getenv("LLM_CACHE_NODES", "cust").split(",") if node),
+            cache_path=os.getenv("LLM_CACHE_PATH", cls.cache_path),
+            cache_ttl_seconds=int(os.getenv("LLM_CACHE_TTL_SECONDS", cls.cache_ttl_seconds)),
+            trace_jsonl_path=os.getenv("TRACE_JSONL_PATH"),
+            trace_memory=os.getenv("TRACE_MEMORY", "0") == "1",
+            checkpoint_path=os.getenv("CHECKPOINT_PATH", cls.checkpoint_path)
+        )
+
+
+def _parse_deadlines(spec):
+    """"cust=20,design=45" -> {"cust": 20.0, "design": 45.0}"""
+    if not spec:
+        return {}
+    pairs = (item.split("=", 1) for item in spec.split(",") if item)
+    return {node.strip(): float(seconds) for node, seconds in pairs}
+
+
+# Outputs carrying these keys belong to one run (a fresh deadline or replica seed, a deadline fallback)
+_RUN_SPECIFIC_KEYS = frozenset({"context_deadline", "monte_carlo_seed", "degraded_inputs"})
+
+# Nodes drawing random signals (or Monte Carlo replicas): replayed only when the run pins signal_seed
+_SAMPLING_NODES = frozenset({"comp", "cust", "mkt_gen", "mkt_ctx"})
+
+# LLM calls sampled at the default (creative) temperature: every run asks the model again
+_CREATIVE_NODES = frozenset({"trend", "design", "validate", "design_pair", "validate_batch"})
+
+
+def _replayable(node, state):
+    """runtime.memo's replay_if: only deterministic nodes replay a stored output."""
+    if node in _CREATIVE_NODES:
+        return False
+    if node in _SAMPLING_NODES:
+        return state.get("signal_seed") is not None
+    return True
+
+
+class EngineRuntime:
+    """
+    Process-wide LLM plumbing, built on first use.
+
+    The tracer is cheap and created immediately; the OpenAI clients (and the
+    API-key check) are only constructed when an LLM node first needs them.
+    """
+
+    def __init__(self, config: EngineConfig):
+        self.config = config
+        self.tracer = Tracer(jsonl_path=config.trace_jsonl_path, track_memory=config.trace_memory)
+        # stream_tokens / context_deadline change how and whether text arrives, not what a
+        # node returns from the same inputs; run-specific outputs are never replayed
+        self.memo = IncrementalExecutor(
+            ignore_keys={"stream_tokens", "context_deadline"},
+            store_if=lambda output: not _RUN_SPECIFIC_KEYS.intersection(output or {}),
+            replay_if=_replayable
+        )
+        self.resilience = ResilientCaller(
+            policies={
+                node: CallPolicy(deadline_seconds=seconds, max_retries=config.max_retries, hedge=node in config.hedge_nodes)
+                for node, seconds in config.node_deadlines.items()
+            },
+            default=CallPolicy(deadline_seconds=config.timeout_seconds, max_retries=config.max_retries),
+            max_hedge_workers=config.max_connections
+        )
+        self.rate_limiter = RateLimiter(config.llm_requests_per_minute, config.llm_tokens_per_minute)
+        self.coordinator = ExecutionCoordinator(config.max_concurrent_runs, config.max_queued_runs)
+        self.monte_carlo = MonteCarloSampler(config.monte_carlo_workers) # worker processes start on first sample
+        self._llm = None
+        self._checkpointer = None
+        self._lock = threading.Lock()
+
+    @property
+    def llm(self) -> CachedChatClient:
+        if self._llm is None:
+            with self._lock:
+                if self._llm is None:
+                    self._llm = self._build_llm()
+        return self._llm
+
+    def _build_llm(self):
+        from openai import OpenAI, AsyncOpenAI, DefaultHttpxClient, DefaultAsyncHttpxClient # For interacting with OpenAI-compatible LLMs
+        from openai import DEFAULT_CONNECTION_LIMITS, Timeout # HTTP pool/timeout types of the httpx flavour bundled with openai
+
+        config = self.config
+        if not config.api_key:
+            raise ValueError("OPENAI_API_KEY not set")
+
+        limits = type(DEFAULT_CONNECTION_LIMITS)(
+            max_connections=config.max_connections,
+            max_keepalive_connections=config.max_keepalive,
+            keepalive_expiry=30.0
+        )
+        timeout = Timeout(config.timeout_seconds, connect=10.0)
+
+        # Initialize the OpenAI clients (blocking + async) with the API key and custom base URL;
+        # retries are owned by the resilient call layer, not the SDK
+        client = OpenAI(
+            api_key=config.api_key,
+            base_url=config.base_url,
+            timeout=timeout,
+            max_retries=0,
+            http_client=DefaultHttpxClient(limits=limits)
+        )
+
+        # The async client's pool belongs to one event loop, so one is built per running loop
+        def async_client():
+            return AsyncOpenAI(
+                api_key=config.api_key,
+                base_url=config.base_url,
+                timeout=timeout,
+                max_retries=0,
+                http_client=DefaultAsyncHttpxClient(limits=limits)
+            )
+        cache = LLMResponseCache(path=config.cache_path, ttl_seconds=config.cache_ttl_seconds)
+
+        return CachedChatClient(
+            client, cache, nodes=config.cache_nodes, async_client_factory=async_client,
+            observers=[self.tracer.on_llm_response], resilience=self.resilience, limiter=self.rate_limiter
+        )
+
+    @property
+    def checkpointer(self):
+        """SQLite checkpoint saver (langgraph is only imported on first use)."""
+        if self._checkpointer is None:
+            with self._lock:
+                if self._checkpointer is None:
+                    from checkpointing import SqliteCheckpointSaver
+                    self._checkpointer = SqliteCheckpointSaver(self.config.checkpoint_path)
+        return self._checkpointer
+
+    def close(self):
+        """Stops the Monte Carlo worker processes (configure() calls this on the runtime it replaces)."""
+        self.monte_carlo.shutdown()
+
+    # Convenience accessors
+    @property
+    def client(self):
+        return self.llm.client
+
+    @property
+    def async_client(self):
+        return self.llm.async_client
+
+    @property
+    def llm_cache(self):
+        return self.llm.cache
+
+
+_runtime = None
+_runtime_lock = threading.Lock()
+_default_apps = {} # lazily compiled engine.app / engine.async_app
+_default_apps_lock = threading.Lock()
+
+
+def configure(config: EngineConfig = None) -> EngineRuntime:
+    """Installs the process-wide runtime (defaults to EngineConfig.from_env())."""
+    global _runtime
+    with _runtime_lock:
+        previous, _runtime = _runtime, EngineRuntime(config or EngineConfig.from_env())
+    if previous is not None:
+        previous.close()
+    # engine.app / engine.async_app are rebuilt against the new runtime on next access
+    _default_apps.clear()
+    return _runtime
+
+
+def get_runtime() -> EngineRuntime:
+    """Process-wide runtime, created from the environment on first use."""
+    global _runtime
+    if _runtime is None:
+        with _runtime_lock:
+            if _runtime is None:
+                _runtime = EngineRuntime(EngineConfig.from_env())
+    return _runtime
+
+
+def get_llm() -> CachedChatClient:
+    """Shared, lazily constructed LLM facade used by every LLM node."""
+    return get_runtime().llm
+
 
-if not openai_api_key:
-    raise ValueError("OPENAI_API_KEY not set")
+def _timeout_kwargs(timeout):
+    # An explicit timeout=None would disable the client's default timeout
+    return {} if timeout is None else {"timeout": timeout}
 
-client = OpenAI(
-    api_key=openai_api_key,
-    base_url="https://api.ai-gateway.tigeranalytics.com"
-)
+
+# The final chunk of a stream carries its usage, for the tracer and the token rate limit
+_STREAM_KWARGS = {"stream": True, "stream_options": {"include_usage": True}}
+
+
+def _streamed_text(node, request, timeout=None):
+    """
+    Runs a stream=True completion, forwarding each text delta to LangGraph's
+    custom stream as {"node": ..., "token": ...}; returns the full text.
+    A timeout bounds the whole stream, not just the wait for the first chunk.
+    """
+    from langgraph.config import get_stream_writer
+
+    writer = get_stream_writer()
+    stop_at = None if timeout is None else time.monotonic() + timeout
+    parts = []
+    stream = get_llm().for_node(node).chat.completions.create(**request, **_STREAM_KWARGS, **_timeout_kwargs(timeout))
+    for chunk in stream:
+        if stop_at is not None and time.monotonic() > stop_at:
+            stream.close()
+            raise DeadlineExceeded(f"{node}: stream ran past its deadline")
+        delta = chunk.choices[0].delta.content if chunk.choices else None
+        if delta:
+            parts.append(delta)
+            writer({"node": node, "token": delta})
+    return "".join(parts)
+
+
+async def _astreamed_text(node, request, timeout=None):
+    """Async variant of _streamed_text."""
+    from langgraph.config import get_stream_writer
+
+    writer = get_stream_writer()
+    stop_at = None if timeout is None else time.monotonic() + timeout
+    parts = []
+    stream = await get_llm().for_node_async(node).chat.completions.create(**request, **_STREAM_KWARGS, **_timeout_kwargs(timeout))
+    async for chunk in stream:
+        if stop_at is not None and time.monotonic() > stop_at:
+            await stream.close()
+            raise DeadlineExceeded(f"{node}: stream ran past its deadline")
+        delta = chunk.choices[0].delta.content if chunk.choices else None
+        if delta:
+            parts.append(delta)
+            writer({"node": node, "token": delta})
+    return "".join(parts)
+
+
+def _complete_text(node, request, stream=False, timeout=None):
+    """Completion text for a node, token-streamed when the run asked for it."""
+    if stream:
+        return _streamed_text(node, request, timeout)
+    res = get_llm().for_node(node).chat.completions.create(**request, **_timeout_kwargs(timeout))
+    return res.choices[0].message.content
+
+
+async def _acomplete_text(node, request, stream=False, timeout=None):
+    if stream:
+        return await _astreamed_text(node, request, timeout)
+    res = await get_llm().for_node_async(node).chat.completions.create(**request, **_timeout_kwargs(timeout))
+    return res.choices[0].message.content
 
 
-# Initialize the OpenAI client with the API key and custom base URL
-client = OpenAI(api_key=openai_api_key, base_url="https://api.ai-gateway.tigeranalytics.com")
-# Initialize Faker for generating synthetic data
-fake = Faker()
 # Define a fixed 'today's date' for consistent data generation
 TODAY = date(2026, 1, 24)
 # Define the model name to be used for LLM calls
 MODEL_NAME = "gemini-2.5-flash"
+# Number of synthetic observations drawn per run (raise for stress runs)
+COMPETITOR_SAMPLE_SIZE = 500
+MARKET_SAMPLE_SIZE = 900
+CUSTOMER_SAMPLE_SIZE = 100
+# Replicas behind the Monte Carlo intervals when the app enables them
+MONTE_CARLO_REPLICAS = 200
+# Active-promo options offered by the Streamlit app (and enumerated by scenarios.py)
+PROMO_OPTIONS = [
+    "Biggie Bag",
+    "4 for $4",
+    "Breakfast Combo",
+    "Frosty Promo",
+    "Rewards Multiplier"
+]
 
 
 
@@ -46,13 +363,28 @@ MODEL_NAME = "gemini-2.5-flash"
 class MasterState(TypedDict):
     # Core inputs that can be passed to the graph initially or updated by nodes
     wendys_active: List[str] # List of active Wendy's promotions
+    signal_seed: int # Optional seed for reproducible signal generation
+    monte_carlo_replicas: int # Optional; > 0 scores N seeded replicas and reports mean + 90% intervals
+    monte_carlo_seed: int # Replica seed of an unseeded Monte Carlo run (stamped at run start)
+    signal_aggregator: object # Optional DecayedSignalAggregator; when set, nodes read its state instead of raw rows
+    redemption_analytics: object # Optional RedemptionAnalytics; when set, cust narrates its counts instead of a synthetic sample
+    stream_tokens: bool # Optional; when True, narrator/designer stream tokens to stream_mode="custom" consumers
+    context_deadline: float # Epoch seconds by which the context branches must finish (stamped at run start)
+    degraded_inputs: Annotated[List[str], operator.add] # Keys filled by a deterministic fallback after missing the deadline
     competitor_intel: dict # Detailed metadata for traceability and summary of competitor activities
     customer_insights: str # Summary of customer behavioral insights
-    raw_market_signals: pd.DataFrame
+    metrics: dict # Deterministic redemption metrics behind customer_insights
+    data_disclaimer: str
+    raw_market_signals: TableRef # Raw market observations (columnar; materialize only the needed columns)
     market_trends: List[dict]          # Structured trend signals
     market_context_windows: List[dict] # Timing & situational relevance
     market_trends_summary: str         # Narrative summary for creative agent
     raw_concepts: str # Raw, unstructured offer concepts generated by the creative agent
+    # Fan-out design (map-reduce): per-task inputs carried by Send, and the reducer-merged results
+    design_task: dict # One designer call's (context window, strategy, competitor gap) pair
+    offer_candidates: Annotated[List[dict], operator.add] # {"task", "rank", "offer"} per designed candidate
+    validation_batch: dict # One validator call's candidates and allowed signal IDs
+    validated_offers: Annotated[List[dict], operator.add] # {"batch", "intro", "offers"} per validator call
     # Structured keys to hold synchronized data after processing
     structured_concepts: List[dict] # Refined offer concepts in a structured (JSON) format
     final_report_text: str # Introductory text for the final report
@@ -76,74 +408,46 @@ def competitor_analyst_node(state: MasterState):
 
     print("✅ Competitor Analyst RUNNING")
 
-    # Simulate competitor data generation
-    records = []
-    for _ in range(500):
-        records.append({
-            "id": fake.uuid4()[:8],  # Unique ID for traceability
-            "brand": random.choice(["McDonald's", "Burger King", "Taco Bell"]),
-            "mechanic": random.choice(["BOGO", "Gamified App Challenge", "Loyalty Multiplier"]),
-            "obs_date": pd.to_datetime(
-                fake.date_between(start_date='-60d', end_date=TODAY)
-            )
-        })
-
-    df = pd.DataFrame(records)
+    # Streaming mode: read the pre-aggregated decayed sums
+    if state.get("signal_aggregator") is not None:
+        return {
+            "competitor_intel": state["signal_aggregator"].competitor_intel(state["wendys_active"])
+        }
 
-    # Recency weighting
-    df["weight"] = np.exp(
-        -0.05 * (pd.Timestamp(TODAY) - df["obs_date"]).dt.days
+    # Simulate competitor data generation (vectorized, seedable)
+    df = generate_competitor_signals(
+        TODAY,
+        size=COMPETITOR_SAMPLE_SIZE,
+        seed=state.get("signal_seed")
     )
 
     # Identify competitor mechanics Wendy's is NOT active in
     gaps = df[~df["mechanic"].isin(state["wendys_active"])]
 
-    threats = []
+    # Day-bucketed counts scored by one recency-kernel product (no per-row weights)
+    intel = SignalCube().add_competitor_batch(df).competitor_intel(state["wendys_active"], TODAY)
+    threats, summary = intel["threats"], intel["summary"]
 
-    # ✅ FIXED INDENTATION STARTS HERE
-    for mech, group in gaps.groupby("mechanic"):
-
-        # Leading competitor brand
-        top_brand = (
-            group.groupby("brand")["weight"].sum().idxmax()
-        )
-
-        # Raw score + HARD CAP
-        raw_score = group["weight"].sum()
-        score = round(min(10.0, raw_score), 1)  # 🔒 NEVER > 10
-
-        # Traceability ID
-        trace_id = (
-            group.sort_values("weight", ascending=False)["id"].iloc[0]
-        )
-
-        threats.append(
-            f"{mech} driven by {top_brand} "
-            f"(Threat: {score}/10) [Ref ID: {trace_id}]"
-        )
+    # Monte Carlo mode: replica means + intervals, keeping this draw's trace IDs
+    if state.get("monte_carlo_replicas"):
+        trace_ids = dict(zip(threats["mechanic"], threats["trace_id"]))
+        threats = _monte_carlo_samples(state).threats(state["wendys_active"], trace_ids)
+        summary = format_threat_summary(threats)
 
+    # Return the summary of threats, the structured table and the raw gap rows for traceability
+    # (as a columnar handle, not a per-row dict)
     return {
         "competitor_intel": {
-            "summary": "\n".join(threats),
-            "raw": gaps.to_dict()
+            "summary": summary,
+            "threats": threats,
+            "raw": TableRef.from_pandas(gaps)
         }
     }
 
-    # Return the summary of threats and the raw data for potential further analysis
-    return {"competitor_intel": {"summary": "\n".join(threats), "raw": gaps.to_dict()}}
-
 #5. Agent #2 - Building Customer Insights Agent
 
 ### 5a. Define the Nodes - Customer Insights Logic
 
-from faker import Faker
-import random
-import json
-from collections import Counter
-
-fake = Faker()
-random.seed(42)  # Deterministic output
-
 def customer_analyst_node(state: "MasterState"):
     """Analyzes behavioral signals to identify high-redemption segments and customer preferences."""
 
@@ -157,79 +461,95 @@ def customer_analyst_node(state: "MasterState"):
     Step 3: Ask LLM ONLY to summarize provided metrics
     """
 
+    metrics = _customer_metrics(state)
+    if metrics is None:
+        return _NO_REDEMPTIONS
+
+    try:
+        res = get_llm().for_node("cust").chat.completions.create(
+            **_customer_request(metrics), **_timeout_kwargs(_context_time_left(state))
+        )
+    except DeadlineExceeded:
+        return _customer_fallback(metrics)
+
+    return _customer_output(metrics, res.choices[0].message.content)
+
+
+async def acustomer_analyst_node(state: "MasterState"):
+    """Async variant of customer_analyst_node (shared AsyncOpenAI pool)."""
+
+    print("✅ Customer Analyst RUNNING")
+
+    metrics = _customer_metrics(state)
+    if metrics is None:
+        return _NO_REDEMPTIONS
+
+    try:
+        res = await get_llm().for_node_async("cust").chat.completions.create(
+            **_customer_request(metrics), **_timeout_kwargs(_context_time_left(state))
+        )
+    except DeadlineExceeded:
+        return _customer_fallback(metrics)
+
+    return _customer_output(metrics, res.choices[0].message.content)
+
+
+_NO_REDEMPTIONS = {
+    "customer_insights": "No coupon redemptions observed in the synthetic sample."
+}
+
+
+def _customer_metrics(state):
+    """Steps 1-2: redemption logs + deterministic metrics (None when nothing was redeemed)."""
+    # Streaming mode: metrics of the accumulated (real) redemption logs
+    if state.get("redemption_analytics") is not None:
+        return state["redemption_analytics"].metrics()
+
     # ---------------------------------------------------
     # 1. SYNTHETIC SIGNAL GENERATION (NEUTRAL)
     # ---------------------------------------------------
-    sample_size = 100
-    logs = []
-
-    for _ in range(sample_size):
-        logs.append({
-            "customer_type": random.choice(
-                ["Loyalty Member", "Guest", "First-Timer"]
-            ),
-            "channel": random.choice(
-                ["Mobile App", "Drive-Thru", "In-Store"]
-            ),
-            "coupon_used": random.choice([True, False])
-        })
+    logs = generate_redemption_logs(size=CUSTOMER_SAMPLE_SIZE, seed=state.get("signal_seed"))
 
     # ---------------------------------------------------
     # 2. METRIC COMPUTATION (SOURCE OF TRUTH)
     # ---------------------------------------------------
-    redeemed_logs = [l for l in logs if l["coupon_used"]]
+    # One bincount over integer-coded (segment, channel, redeemed) rows
+    return RedemptionAnalytics().add_frame(logs).metrics()
 
-    if not redeemed_logs:
-        return {
-            "customer_insights": "No coupon redemptions observed in the synthetic sample."
-        }
-
-    total_redemptions = len(redeemed_logs)
-
-    segment_counts = Counter(l["customer_type"] for l in redeemed_logs)
-    channel_counts = Counter(l["channel"] for l in redeemed_logs)
-
-    metrics = {
-        "total_redemptions": total_redemptions,
-        "segment_share": {
-            seg: round(cnt / total_redemptions, 3)
-            for seg, cnt in segment_counts.items()
-        },
-        "channel_share": {
-            ch: round(cnt / total_redemptions, 3)
-            for ch, cnt in channel_counts.items()
-        }
-    }
 
-    # ---------------------------------------------------
-    # 3. LLM NARRATION (STRICTLY BOUND)
-    # ---------------------------------------------------
-    analysis_prompt = f"""
-You are a Customer Insights Analyst.
+CUSTOMER_INSTRUCTIONS = """You are a Customer Insights Analyst.
 
 IMPORTANT RULES:
-- Use ONLY the metrics provided below.
+- Use ONLY the metrics provided by the user.
 - Do NOT infer causes, preferences, or intent.
 - Do NOT introduce new numbers or segments.
 - Use descriptive language only (e.g., "accounts for", "observed share").
 
-Metrics (synthetic data):
-{json.dumps(metrics, indent=2)}
+Write 3 concise bullet-point insights suitable for an executive summary."""
 
-Write 3 concise bullet-point insights suitable for an executive summary.
-"""
 
-    res = client.chat.completions.create(
-        model=MODEL_NAME,
-        messages=[{"role": "user", "content": analysis_prompt}],
-        temperature=0  # Minimizes creativity
-    )
+def _customer_request(metrics):
+    """Step 3: strictly bound narration request."""
+    # ---------------------------------------------------
+    # 3. LLM NARRATION (STRICTLY BOUND)
+    # ---------------------------------------------------
+    prompt = assemble("cust", CUSTOMER_INSTRUCTIONS, [
+        Section("Metrics (synthetic data)", [compact_json(metrics)])
+    ])
 
+    return {
+        "model": MODEL_NAME,
+        "messages": prompt.messages,
+        "temperature": 0  # Minimizes creativity
+    }
+
+
+def _customer_output(metrics, content):
     # ---------------------------------------------------
     # 4. AGENT OUTPUT
     # ---------------------------------------------------
     return {
-        "customer_insights": res.choices[0].message.content,
+        "customer_insights": content,
         "metrics": metrics,
         "data_disclaimer": (
             "Insights are based on synthetic data and "
@@ -237,6 +557,24 @@ Write 3 concise bullet-point insights suitable for an executive summary.
         )
     }
 
+def _customer_fallback(metrics):
+    """Deterministic narration (the metrics as text) for a run past its context deadline."""
+    def shares(values):
+        return ", ".join(f"{name} {share:.1%}" for name, share in sorted(values.items(), key=lambda kv: -kv[1]))
+
+    joint = {
+        f"{segment} via {channel}": share
+        for segment, channels in metrics.get("segment_channel_share", {}).items()
+        for channel, share in channels.items()
+    }
+    text = "\n".join([
+        f"- {metrics['total_redemptions']} coupon redemptions observed in the synthetic sample.",
+        f"- Segment share: {shares(metrics['segment_share'])}.",
+        f"- Channel share: {shares(metrics['channel_share'])}."
+    ] + ([f"- Largest segment x channel shares: {shares(dict(sorted(joint.items(), key=lambda kv: -kv[1])[:3]))}."]
+         if joint else []))
+    return {**_customer_output(metrics, text), "degraded_inputs": ["customer_insights"]}
+
 #6. Agent #3 - Building Market Trends Agent
 
 ### 6a. Define the Nodes - Market Trends Logic
@@ -244,127 +582,166 @@ Write 3 concise bullet-point insights suitable for an executive summary.
 # **NEW NODE A — Market Context Signal Generator**
 
 def market_context_generator(state: MasterState):
-    records = []
-
-    trend_types = [
-        "Gamified Rewards",
-        "Subscription Meal Bundles",
-        "Surprise & Delight",
-        "Late-Night Value",
-        "App-Exclusive Perks"
-    ]
-
-    seasons = ["Winter", "Spring", "Summer", "Fall"]
-    dayparts = ["Breakfast", "Lunch", "Dinner", "Late Night"]
-    situations = ["Cold Weather", "Payday", "Commute", "Weekend"]
-    sources = ["Reddit", "TikTok", "Press", "Food Blogs"]
-
-    for _ in range(900):
-        records.append({
-            "trend_type": random.choice(trend_types),
-            "season": random.choice(seasons),
-            "daypart": random.choice(dayparts),
-            "situation": random.choice(situations),
-            "source": random.choice(sources),
-            "observed_date": fake.date_between(start_date='-120d', end_date=TODAY)
-        })
+    # Streaming mode: signals are already folded into the aggregator
+    if state.get("signal_aggregator") is not None:
+        return {}
+
+    df = generate_market_signals(
+        TODAY,
+        size=MARKET_SAMPLE_SIZE,
+        seed=state.get("signal_seed")
+    )
 
-    return {"raw_market_signals": pd.DataFrame(records)}
+    return {"raw_market_signals": TableRef.from_pandas(df)}
 
 
 # **Market Context Analyst (Structured Scoring)**
 
 def market_context_analyst(state: MasterState):
-    df = state["raw_market_signals"].copy()
-
-    # Normalize dates
-    df["observed_date"] = pd.to_datetime(df["observed_date"])
-    df["days_ago"] = (pd.Timestamp(TODAY) - df["observed_date"]).dt.days
-
-    # Recency decay weighting
-    df["weight"] = np.exp(-0.05 * df["days_ago"])
-
-    windows = []
-
-    # Aggregate timing/context signals
-    for keys, group in df.groupby(
-        ["trend_type", "season", "daypart", "situation"]
-    ):
-        strength = group["weight"].sum()
-        ref_id = group.index[0]  # lightweight traceability ID
-
-        windows.append({
-            "signal_id": f"CTX-{ref_id}",
-            "trend": keys[0],
-            "season": keys[1],
-            "daypart": keys[2],
-            "situation": keys[3],
-            "timing_strength": round(strength, 2)
-        })
-
-    # Guardrail (prevents divide-by-zero)
-    if not windows:
-        return {"market_context_windows": []}
-
-    max_strength = max(w["timing_strength"] for w in windows)
+    # Streaming mode: read the pre-aggregated decayed sums
+    if state.get("signal_aggregator") is not None:
+        return {
+            "market_context_windows": state["signal_aggregator"].market_context_windows(k=CONTEXT_TOP_K)
+        }
 
-    # Score + classify
-    for w in windows:
-        w["relevance_score"] = round(
-            (w["timing_strength"] / max_strength) * 10, 1
-        )
-        w["confidence"] = round(
-            min(1.0, w["timing_strength"] / (0.75 * max_strength)), 2
+    # Only the grouping dimensions and the date are materialized
+    df = state["raw_market_signals"].to_pandas(columns=CONTEXT_DIMENSIONS + ["observed_date"])
+
+    if state.get("monte_carlo_replicas"):
+        # Top-K by replica-mean relevance; evidence IDs point into this run's draw
+        windows = _monte_carlo_samples(state).windows(window_evidence(df, CONTEXT_DIMENSIONS), k=CONTEXT_TOP_K)
+    else:
+        # Day-bucketed counts scored by one recency-kernel product + top-K selection
+        # (dicts only for the survivors)
+        windows = (
+            SignalCube(context_dims=CONTEXT_DIMENSIONS)
+            .add_market_batch(df)
+            .market_context_windows(TODAY, k=CONTEXT_TOP_K)
         )
-        w["action"] = (
-            "Act Now" if w["relevance_score"] >= 7
-            else "Monitor"
-        )
-
-    # ✅ NEW: Cap to Top 5 Most Relevant Windows
-    windows = sorted(
-        windows,
-        key=lambda x: x["relevance_score"],
-        reverse=True
-    )[:5]
 
     return {
         "market_context_windows": windows
     }
 
 
+def _monte_carlo_samples(state):
+    """Replica samples for this run's seed (one cached pass shared by the competitor and market nodes)."""
+    seed = state.get("signal_seed")
+    return get_runtime().monte_carlo.sample(
+        state["monte_carlo_replicas"],
+        seed if seed is not None else state.get("monte_carlo_seed"),
+        TODAY,
+        competitor_size=COMPETITOR_SAMPLE_SIZE,
+        market_size=MARKET_SAMPLE_SIZE,
+        dims=CONTEXT_DIMENSIONS
+    )
+
+
 # **Convert Structured Context → Narrative Trends**
 
 def market_trends_narrator(state: MasterState):
-    context = json.dumps(state["market_context_windows"], indent=2)
+    print("✅ Market Trends Narrator RUNNING")
 
+    try:
+        summary = _complete_text(
+            "trend", _trends_request(state),
+            stream=state.get("stream_tokens", False), timeout=_context_time_left(state)
+        )
+    except DeadlineExceeded:
+        return _trends_fallback(state)
+
+    return {"market_trends_summary": summary}
+
+
+async def amarket_trends_narrator(state: MasterState):
+    """Async variant of market_trends_narrator."""
     print("✅ Market Trends Narrator RUNNING")
 
-    prompt = f"""
-    You are Wendy’s Market Strategist.
+    try:
+        summary = await _acomplete_text(
+            "trend", _trends_request(state),
+            stream=state.get("stream_tokens", False), timeout=_context_time_left(state)
+        )
+    except DeadlineExceeded:
+        return _trends_fallback(state)
+
+    return {"market_trends_summary": summary}
+
+
+TRENDS_INSTRUCTIONS = """You are Wendy’s Market Strategist.
+
+Using the timing and context signals provided (one row per signal, strongest first):
+- Summarize the top emerging trends
+- Explain WHEN and WHY they matter
+- Use consumer language and value cues"""
+
 
-    Using the timing and context signals below:
-    - Summarize the top emerging trends
-    - Explain WHEN and WHY they matter
-    - Use consumer language and value cues
+def _trends_request(state):
+    header, rows = records_table(state["market_context_windows"])
 
-    DATA:
-    {context}
+    prompt = assemble("trend", TRENDS_INSTRUCTIONS, [
+        Section("DATA", rows, header=header)
+    ])
+
+    return {
+        "model": MODEL_NAME,
+        "messages": prompt.messages
+    }
+
+
+def _trends_fallback(state):
+    """Deterministic trend digest (top context windows as text) for a run past its context deadline."""
+    lines = [
+        f"- {w['trend']}: {w['season']} {w['daypart']}, {w['situation']} — {w['action']} "
+        f"(relevance {w['relevance_score']:g}, evidence {w['signal_id']})"
+        for w in state["market_context_windows"]
+    ]
+    return {"market_trends_summary": "\n".join(lines), "degraded_inputs": ["market_trends_summary"]}
+
+
+def set_context_deadline(state: MasterState):
     """
+    Run entry: stamps the wall-clock deadline for the context branches
+    (EngineConfig.context_deadline_seconds) unless the caller passed one.
+
+    An unseeded Monte Carlo run also gets a fresh monte_carlo_seed here, so
+    the competitor and market nodes reduce the same replica pass.
+    """
+    stamp = {}
+    if state.get("context_deadline") is None:
+        stamp["context_deadline"] = time.time() + get_runtime().config.context_deadline_seconds
+    if state.get("monte_carlo_replicas") and state.get("signal_seed") is None and state.get("monte_carlo_seed") is None:
+        stamp["monte_carlo_seed"] = random.SystemRandom().getrandbits(63)
+    return stamp
+
+
+def resume_input():
+    """
+    Graph input that resumes a failed checkpointed run:
+    app.invoke(resume_input(), run_config(run_id)).
+
+    The context deadline is wall-clock time saved with the run, so resuming
+    with None would start every remaining branch already past it; this
+    re-stamps a fresh context_deadline_seconds budget, then continues from
+    the last successful node like None does.
+    """
+    from langgraph.types import Command
+
+    return Command(update={"context_deadline": time.time() + get_runtime().config.context_deadline_seconds})
 
-    res = client.chat.completions.create(
-        model=MODEL_NAME,
-        messages=[{"role": "user", "content": prompt}]
-    )
 
-    return {"market_trends_summary": res.choices[0].message.content}
+def _context_time_left(state):
+    """Seconds until the run's context deadline (None when the run has none)."""
+    deadline = state.get("context_deadline")
+    return None if deadline is None else deadline - time.time()
 
 
 def context_ready_gate(state: MasterState):
     """
-    Synchronization node.
-    Ensures all required upstream context is present
-    before offer design runs.
+    Fan-in barrier: offer design runs once comp, cust and trend have all
+    finished. The LLM narrations in cust/trend are bounded by the run's
+    context deadline and fall back to deterministic text (listed in
+    degraded_inputs), so the wait here is bounded too.
     """
     return {}
 
@@ -377,28 +754,27 @@ def offer_designer_node(state: MasterState):
 
     print("✅ Offer Designer RUNNING")
 
-    assert "market_trends_summary" in state, \
-        f"Missing market_trends_summary. Available keys: {list(state.keys())}"
+    concepts = _complete_text("design", _designer_request(state), stream=state.get("stream_tokens", False))
 
-    prompt = f"""
-You are Wendy's Lead Creative Strategist.
+    return {"raw_concepts": concepts}
 
-Use the following intelligence signals to design differentiated offers.
 
-COMPETITOR GAPS:
-{state['competitor_intel']['summary']}
+async def aoffer_designer_node(state: MasterState):
+    """Async variant of offer_designer_node."""
 
-CUSTOMER INSIGHTS:
-{state['customer_insights']}
+    print("✅ Offer Designer RUNNING")
+
+    concepts = await _acomplete_text("design", _designer_request(state), stream=state.get("stream_tokens", False))
+
+    return {"raw_concepts": concepts}
 
-TRENDS & CONTEXT:
-{state['market_trends_summary']}
 
-TOP SIGNALS (with evidence IDs):
-{json.dumps(state["market_context_windows"], indent=2)}
+DESIGNER_BRIEF = f"""You are Wendy's Lead Creative Strategist.
+
+Use the intelligence signals provided (competitor gaps, customer insights, trends & context, top signals with evidence IDs) to design differentiated offers.
 
 MECHANIC CONSTRAINTS BY TREND:
-{json.dumps(TREND_MECHANIC_MAP, indent=2)}
+{compact_json(TREND_MECHANIC_MAP)}
 
 Constraints:
 - Each offer MUST explicitly reference at least one signal_id
@@ -410,7 +786,9 @@ Design 2 original Wendy's offers.
 
 Rules:
 - One offer must be a DEFENSIVE response
-- One offer must be a FIRST-TO-MARKET creative pivot
+- One offer must be a FIRST-TO-MARKET creative pivot"""
+
+DESIGNER_INSTRUCTIONS = DESIGNER_BRIEF + """
 
 OUTPUT FORMAT (STRICT):
 Name:
@@ -419,56 +797,418 @@ Strategy: Defensive | First-to-Market
 Evidence Signal IDs:
 
 Example:
-Evidence Signal IDs: CTX-12, CTX-44
-"""
+Evidence Signal IDs: CTX-12, CTX-44"""
 
-    res = client.chat.completions.create(
-        model=MODEL_NAME,
-        messages=[{"role": "user", "content": prompt}]
-    )
 
-    return {"raw_concepts": res.choices[0].message.content}
+def _designer_request(state, instructions=DESIGNER_INSTRUCTIONS):
+    assert "market_trends_summary" in state, \
+        f"Missing market_trends_summary. Available keys: {list(state.keys())}"
+
+    signal_header, signal_rows = records_table(state["market_context_windows"])
+
+    gaps = _gap_lines(state)
+
+    # Declaration order is the layout; priority decides what survives the budget
+    prompt = assemble("design", instructions, [
+        Section("COMPETITOR GAPS", gaps, priority=1),
+        Section("CUSTOMER INSIGHTS", text_lines(state["customer_insights"]), priority=3),
+        Section("TRENDS & CONTEXT", text_lines(state["market_trends_summary"]), priority=2),
+        Section("TOP SIGNALS (with evidence IDs)", signal_rows, priority=0, header=signal_header)
+    ])
+
+    return {
+        "model": MODEL_NAME,
+        "messages": prompt.messages
+    }
+
+
+def _gap_lines(state):
+    """Competitor gap lines, strongest threats first (so a tight budget drops the weakest gaps)."""
+    intel = state["competitor_intel"]
+    threats = intel.get("threats")
+    if threats is not None and not threats.empty:
+        return text_lines(format_threat_summary(threats.sort_values("score", ascending=False, kind="stable")))
+    return text_lines(intel["summary"])
+
+
+### 7a-2. Single-hop Structured Designer (design + structure in one call)
+
+# Offers JSON contract, shared by the structured designer, its repair call and the validator
+REPORT_FORMAT = """RETURN ONLY A JSON OBJECT in this format:
+{"report_intro":"Intro text here...","offers":[{"name":"The Wendy's Daily Drip Deal","witty_rationale":"Rationale text...","type":"Defensive","evidence_signals":["CTX-12"],"feasibility":9.0,"impact":8.5},...]}"""
+
+STRUCTURED_DESIGNER_INSTRUCTIONS = DESIGNER_BRIEF + """
+
+Write names and rationales in Wendy's witty brand voice. Score feasibility and impact from 0 to 10. "type" is "Defensive" or "First-to-Market"; "evidence_signals" lists the signal_ids the offer is built on.
+
+""" + REPORT_FORMAT
+
+REPAIR_INSTRUCTIONS = """You fix JSON documents that failed validation.
+Correct every listed problem and change nothing else. Use only the allowed signal IDs.
+
+""" + REPORT_FORMAT
+
+
+def structured_designer_node(state: MasterState):
+    """Designs the offers and emits the validator's JSON schema directly (no second LLM hop)."""
+
+    print("✅ Offer Designer (structured) RUNNING")
+
+    known_signals = _known_signals(state)
+    content = _complete_text("design", _structured_designer_request(state))
+    data, errors = parse_report(content, known_signals=known_signals)
+
+    # Cheap targeted repair: only the broken JSON and the problem list go back
+    if errors:
+        content = _complete_text("design", _repair_request(content, errors, known_signals))
+        data, errors = parse_report(content, known_signals=known_signals)
+
+    return _structured_output(data, errors)
+
+
+async def astructured_designer_node(state: MasterState):
+    """Async variant of structured_designer_node."""
+
+    print("✅ Offer Designer (structured) RUNNING")
+
+    known_signals = _known_signals(state)
+    content = await _acomplete_text("design", _structured_designer_request(state))
+    data, errors = parse_report(content, known_signals=known_signals)
+
+    if errors:
+        content = await _acomplete_text("design", _repair_request(content, errors, known_signals))
+        data, errors = parse_report(content, known_signals=known_signals)
+
+    return _structured_output(data, errors)
+
+
+def _known_signals(state):
+    return {window["signal_id"] for window in state["market_context_windows"]}
+
+
+def _structured_designer_request(state):
+    request = _designer_request(state, instructions=STRUCTURED_DESIGNER_INSTRUCTIONS)
+    request["response_format"] = {"type": "json_object"}
+    return request
+
+
+def _repair_request(content, errors, known_signals, instructions=REPAIR_INSTRUCTIONS):
+    prompt = assemble("repair", instructions, [
+        Section("PROBLEMS", errors),
+        Section("ALLOWED SIGNAL IDS", [", ".join(sorted(known_signals))]),
+        Section("JSON", [content or ""])
+    ])
+    return {
+        "model": MODEL_NAME,
+        "response_format": {"type": "json_object"},
+        "messages": prompt.messages,
+        "temperature": 0
+    }
+
+
+def _structured_output(data, errors):
+    if errors:
+        raise ValueError(f"Structured designer output failed validation after repair: {errors}")
+    return {
+        # Compact JSON keeps the optional Brand Validator refinement pass working unchanged
+        "raw_concepts": compact_json(data["offers"]),
+        "structured_concepts": data["offers"],
+        "final_report_text": data["report_intro"]
+    }
 
 
 ### 7b. Critique Loop (Agent Collaboration)
 
 def brand_validator_node(state: MasterState):
     """Refines raw concepts with Wendy's brand voice and returns them in a structured JSON format."""
-    # Construct a prompt to refine concepts and enforce a specific JSON output format
-    prompt = f"""
-    Refine these concepts with Wendy's witty brand voice: {state['raw_concepts']}
-
-    RETURN ONLY A JSON OBJECT in this format:
-    {{
-      "report_intro": "Intro text here...",
-      "offers": [
-        {{
-          "name": "The Wendy's Daily Drip Deal",
-          "witty_rationale": "Rationale text...",
-          "type": "Defensive",
-          "evidence_signals": ["CTX-12"],
-          "feasibility": 9.0,
-          "impact": 8.5
-        }},
-        ...
-      ]
-    }}
-    """
+    res = get_llm().for_node("validate").chat.completions.create(**_validator_request(state))
+
+    return _validator_output(res.choices[0].message.content)
+
+
+async def abrand_validator_node(state: MasterState):
+    """Async variant of brand_validator_node."""
+    res = await get_llm().for_node_async("validate").chat.completions.create(**_validator_request(state))
+
+    return _validator_output(res.choices[0].message.content)
+
+
+VALIDATOR_INSTRUCTIONS = """Refine the concepts provided with Wendy's witty brand voice.
+
+""" + REPORT_FORMAT
+
+
+def _validator_request(state):
+    # Static format contract first; the concepts are the only dynamic input
+    prompt = assemble("validate", VALIDATOR_INSTRUCTIONS, [
+        Section("CONCEPTS", text_lines(state["raw_concepts"]))
+    ])
     # Call the LLM, specifying JSON object as the desired response format
-    res = client.chat.completions.create(
-        model=MODEL_NAME,
-        response_format={ "type": "json_object" }, # Ensures valid JSON output
-        messages=[{"role": "user", "content": prompt}]
-    )
+    return {
+        "model": MODEL_NAME,
+        "response_format": { "type": "json_object" }, # Ensures valid JSON output
+        "messages": prompt.messages
+    }
+
 
+def _validator_output(content):
     # Parse the JSON string from the LLM response
-    data = json.loads(res.choices[0].message.content)
+    data = json.loads(content)
     # Update the state with structured concepts and the report introduction
     return {
         "structured_concepts": data["offers"],
         "final_report_text": data["report_intro"]
     }
 
+### 7b-2. Fan-out Design (map-reduce: one designer call per window x strategy, batched validation)
+
+# Offer variants asked of each (window, strategy) designer call, and candidates per validator call
+FANOUT_OFFERS_PER_CALL = 2
+VALIDATION_BATCH_SIZE = 8
+
+OFFERS_FORMAT = """RETURN ONLY A JSON OBJECT in this format:
+{"offers":[{"name":"The Wendy's Daily Drip Deal","witty_rationale":"Rationale text...","type":"Defensive","evidence_signals":["CTX-12"],"feasibility":9.0,"impact":8.5},...]}"""
+
+PAIR_DESIGNER_INSTRUCTIONS = f"""You are Wendy's Lead Creative Strategist.
+
+Design the requested number of original Wendy's offers for the ONE context window and ONE strategy given in TASK.
+
+MECHANIC CONSTRAINTS BY TREND:
+{compact_json(TREND_MECHANIC_MAP)}
+
+Constraints:
+- Every offer MUST cite the context window's signal_id in evidence_signals
+- The mechanic MUST align with the window's trend type
+- Do NOT reuse standard discount formats (e.g., % off, $ off)
+- "type" is the TASK strategy: a Defensive offer answers the competitor gap, a First-to-Market offer claims the window first
+
+Write names and rationales in Wendy's witty brand voice. Score feasibility and impact from 0 to 10.
+
+""" + OFFERS_FORMAT
+
+PAIR_REPAIR_INSTRUCTIONS = """You fix JSON documents that failed validation.
+Correct every listed problem and change nothing else. Use only the allowed signal IDs.
+
+""" + OFFERS_FORMAT
+
+BATCH_VALIDATOR_INSTRUCTIONS = """Refine each concept provided (one JSON object per line) with Wendy's witty brand voice.
+Return exactly one offer per concept, in the same order, keeping each concept's type and evidence_signals.
+
+""" + REPORT_FORMAT
+
+
+def _design_tasks(state):
+    """
+    Fan-out work list: both strategies for every top context window, with
+    competitor gaps dealt to the Defensive calls strongest first, plus one
+    more Defensive call per gap the windows did not cover.
+    """
+    windows = state["market_context_windows"]
+    gaps = _gap_lines(state)
+    if not windows:
+        return []
+
+    tasks = [
+        {"window": window, "strategy": strategy,
+         "gap": gaps[i % len(gaps)] if strategy == "Defensive" and gaps else None}
+        for i, window in enumerate(windows)
+        for strategy in OFFER_TYPES
+    ]
+    tasks += [
+        {"window": windows[i % len(windows)], "strategy": "Defensive", "gap": gaps[i]}
+        for i in range(len(windows), len(gaps))
+    ]
+    return [dict(task, task=i) for i, task in enumerate(tasks)]
+
+
+def fan_out_designs(state: MasterState):
+    """Conditional edge after the ready barrier: one Send per design task, each carrying only its own inputs."""
+    from langgraph.types import Send
+
+    tasks = _design_tasks(state)
+    if not tasks:
+        return "designs_ready"
+
+    shared = {key: state[key] for key in ("customer_insights", "market_trends_summary")}
+    return [Send("design_pair", {"design_task": task, **shared}) for task in tasks]
+
+
+def pair_designer_node(state: MasterState):
+    """Designs FANOUT_OFFERS_PER_CALL offers for one (context window, strategy) pair."""
+
+    print("✅ Offer Designer (fan-out) RUNNING")
+
+    task = state["design_task"]
+    content = _complete_text("design_pair", _pair_designer_request(state))
+    offers, errors = _pair_offers(content, task)
+
+    # A pair with nothing usable gets one targeted repair, then drops out of the run
+    if not offers:
+        content = _complete_text("design_pair", _pair_repair_request(content, errors, task))
+        offers, errors = _pair_offers(content, task)
+
+    return _pair_output(task, offers)
+
+
+async def apair_designer_node(state: MasterState):
+    """Async variant of pair_designer_node."""
+
+    print("✅ Offer Designer (fan-out) RUNNING")
+
+    task = state["design_task"]
+    content = await _acomplete_text("design_pair", _pair_designer_request(state))
+    offers, errors = _pair_offers(content, task)
+
+    if not offers:
+        content = await _acomplete_text("design_pair", _pair_repair_request(content, errors, task))
+        offers, errors = _pair_offers(content, task)
+
+    return _pair_output(task, offers)
+
+
+def _pair_designer_request(state):
+    task = state["design_task"]
+    window_header, window_rows = records_table([task["window"]])
+
+    # Small, fixed-shape prompt: one window, one gap, then the shared context as budget allows
+    prompt = assemble("design_pair", PAIR_DESIGNER_INSTRUCTIONS, [
+        Section("TASK", [f"Strategy: {task['strategy']}", f"Offers: {FANOUT_OFFERS_PER_CALL}"], priority=0),
+        Section("CONTEXT WINDOW", window_rows, priority=0, header=window_header),
+        Section("COMPETITOR GAP", [task["gap"]] if task["gap"] else [], priority=1),
+        Section("CUSTOMER INSIGHTS", text_lines(state["customer_insights"]), priority=3),
+        Section("TRENDS & CONTEXT", text_lines(state["market_trends_summary"]), priority=2)
+    ])
+
+    return {
+        "model": MODEL_NAME,
+        "response_format": {"type": "json_object"},
+        "messages": prompt.messages
+    }
+
+
+def _pair_repair_request(content, errors, task):
+    return _repair_request(content, errors, {task["window"]["signal_id"]}, instructions=PAIR_REPAIR_INSTRUCTIONS)
+
+
+def _pair_offers(content, task):
+    """(usable offers, problems): offers of the task's strategy that cite its window and pass the contract."""
+    known_signals = {task["window"]["signal_id"]}
+    offers, errors = parse_offers(content, known_signals=known_signals, required_types=(task["strategy"],))
+    usable = [
+        offer for offer in (offers if isinstance(offers, list) else [])
+        if isinstance(offer, dict) and offer.get("type") == task["strategy"]
+        and not validate_offers([offer], known_signals=known_signals, required_types=())
+    ]
+    return usable[:FANOUT_OFFERS_PER_CALL], errors
+
+
+def _pair_output(task, offers):
+    return {"offer_candidates": [{"task": task["task"], "rank": rank, "offer": offer} for rank, offer in enumerate(offers)]}
+
+
+def offers_ready_gate(state: MasterState):
+    """Fan-in barrier: validation is batched once every design task has finished."""
+    return {}
+
+
+def fan_out_validation(state: MasterState):
+    """Conditional edge after the design barrier: candidates in task order, VALIDATION_BATCH_SIZE per Send."""
+    from langgraph.types import Send
+
+    candidates = sorted(state.get("offer_candidates") or [], key=lambda c: (c["task"], c["rank"]))
+    if not candidates:
+        return "merge_offers"
+
+    known_signals = sorted(_known_signals(state))
+    return [
+        Send("validate_batch", {"validation_batch": {
+            "batch": batch,
+            "candidates": candidates[start:start + VALIDATION_BATCH_SIZE],
+            "known_signals": known_signals
+        }})
+        for batch, start in enumerate(range(0, len(candidates), VALIDATION_BATCH_SIZE))
+    ]
+
+
+def batch_validator_node(state: MasterState):
+    """Refines one batch of candidates with Wendy's brand voice in a single call."""
+    batch = state["validation_batch"]
+    content = _complete_text("validate_batch", _batch_validator_request(batch))
+
+    return _batch_validator_output(batch, content)
+
+
+async def abatch_validator_node(state: MasterState):
+    """Async variant of batch_validator_node."""
+    batch = state["validation_batch"]
+    content = await _acomplete_text("validate_batch", _batch_validator_request(batch))
+
+    return _batch_validator_output(batch, content)
+
+
+def _batch_validator_request(batch):
+    prompt = assemble("validate_batch", BATCH_VALIDATOR_INSTRUCTIONS, [
+        Section("CONCEPTS", [compact_json(candidate["offer"]) for candidate in batch["candidates"]])
+    ])
+    return {
+        "model": MODEL_NAME,
+        "response_format": {"type": "json_object"},
+        "messages": prompt.messages
+    }
+
+
+def _batch_validator_output(batch, content):
+    """
+    Pairs refined offers with their candidates by position. A refinement is
+    kept only if it passes the contract with the candidate's type and
+    evidence; otherwise (or if the answer has the wrong number of offers)
+    the locally validated candidate stands.
+    """
+    known_signals = set(batch["known_signals"])
+    data, _ = parse_report(content, known_signals=known_signals, required_types=())
+    data = data if isinstance(data, dict) else {}
+    refined = data.get("offers")
+    if not isinstance(refined, list) or len(refined) != len(batch["candidates"]):
+        refined = [None] * len(batch["candidates"])
+
+    offers = []
+    for candidate, offer in zip(batch["candidates"], refined):
+        original = candidate["offer"]
+        kept = (
+            isinstance(offer, dict)
+            and offer.get("type") == original["type"]
+            and offer.get("evidence_signals") == original["evidence_signals"]
+            and not validate_offers([offer], known_signals=known_signals, required_types=())
+        )
+        offers.append({"task": candidate["task"], "rank": candidate["rank"], "offer": offer if kept else original,
+                       "refined": kept})
+
+    intro = data.get("report_intro") if isinstance(data.get("report_intro"), str) else ""
+    return {"validated_offers": [{"batch": batch["batch"], "intro": intro, "offers": offers}]}
+
+
+def merge_offers_node(state: MasterState):
+    """Reduce step: validated offers in task order, repeated names dropped, into structured_concepts."""
+    batches = sorted(state.get("validated_offers") or [], key=lambda b: b["batch"])
+    entries = sorted((entry for batch in batches for entry in batch["offers"]), key=lambda e: (e["task"], e["rank"]))
+
+    offers, seen = [], set()
+    for entry in entries:
+        name = entry["offer"]["name"].strip().casefold()
+        if name not in seen:
+            seen.add(name)
+            offers.append(entry["offer"])
+
+    if not offers:
+        raise ValueError("Fan-out design produced no valid offers")
+
+    intro = next((batch["intro"] for batch in batches if batch["intro"].strip()), "")
+    return {
+        "raw_concepts": compact_json(offers),
+        "structured_concepts": offers,
+        "final_report_text": intro or f"{len(offers)} candidate offers across the top context windows and competitor gaps."
+    }
+
 ### 7c. Visualization Scorecard
 
 def visualization_node(state: MasterState):
@@ -494,53 +1234,176 @@ def visualization_node(state: MasterState):
 
 ### 8a. Build the Graph Architecture
 
-builder = StateGraph(MasterState) # Initialize the graph with the defined MasterState schema
-
-builder.add_node("ready", context_ready_gate)
-
-
-# Add all agent nodes to the graph
-builder.add_node("comp", competitor_analyst_node) # Node for Competitor Intelligence
-builder.add_node("cust", customer_analyst_node) # Node for Customer Insights
-builder.add_node("mkt_gen", market_context_generator)
-builder.add_node("mkt_ctx", market_context_analyst)
-builder.add_node("trend", market_trends_narrator)
-builder.add_node("design", offer_designer_node) # Node for Offer Design (Creative Strategist)
-builder.add_node("validate", brand_validator_node) # Node for Brand Validation and Structuring
-builder.add_node("viz", visualization_node) # Node for Visualization/Prioritization Table
-
-### 8b. Orchestration Flow
+# LLM-backed nodes have blocking and async implementations; deterministic nodes are shared
+SYNC_LLM_NODES = {
+    "cust": customer_analyst_node,
+    "trend": market_trends_narrator,
+    "design": offer_designer_node,
+    "design_structured": structured_designer_node,
+    "validate": brand_validator_node,
+    "design_pair": pair_designer_node,
+    "validate_batch": batch_validator_node
+}
+ASYNC_LLM_NODES = {
+    "cust": acustomer_analyst_node,
+    "trend": amarket_trends_narrator,
+    "design": aoffer_designer_node,
+    "design_structured": astructured_designer_node,
+    "validate": abrand_validator_node,
+    "design_pair": apair_designer_node,
+    "validate_batch": abatch_validator_node
+}
 
-# Step 1: Define edges for parallel execution of initial analytical agents
-# All three analytical agents start their work concurrently from the initial state.
-# Parallel starts
-builder.add_edge(START, "comp")
-builder.add_edge(START, "cust")
-builder.add_edge(START, "mkt_gen")
 
-# Market context chain
-builder.add_edge("mkt_gen", "mkt_ctx")
-builder.add_edge("mkt_ctx", "trend")
+def build_graph(async_nodes: bool = False, node_wrapper=None, structured_design: bool = False,
+                refine: bool = False, fanout_design: bool = False) -> "StateGraph":
+    """
+    Wires the fan-out/fan-in graph.
+
+    async_nodes=True swaps in the AsyncOpenAI-backed LLM nodes.
+    node_wrapper(name, fn) -> fn, if given, is applied to every node (timing, tracing, ...).
+    structured_design=True runs the single-hop structured designer as "design"
+    and drops the Brand Validator from the critical path; refine=True keeps
+    it as an optional voice-refinement pass (design -> validate -> viz).
+    fanout_design=True replaces design/validate with a map-reduce stage:
+    ready -Send-> design_pair (one call per context window x strategy)
+    -> designs_ready -Send-> validate_batch (VALIDATION_BATCH_SIZE candidates
+    per call) -> merge_offers -> viz. How many of those calls run at once is
+    the compiled graph's max_concurrency (build_app sets design_concurrency).
+    """
+    from langgraph.graph import StateGraph, START, END # For building the LangGraph agent orchestration
+
+    if structured_design and fanout_design:
+        raise ValueError("structured_design and fanout_design are alternative design modes; pick one")
+
+    llm_nodes = ASYNC_LLM_NODES if async_nodes else SYNC_LLM_NODES
+
+    builder = StateGraph(MasterState) # Initialize the graph with the defined MasterState schema
+
+    def add_node(name, fn):
+        builder.add_node(name, node_wrapper(name, fn) if node_wrapper else fn)
+
+    add_node("deadline", set_context_deadline)
+    add_node("ready", context_ready_gate)
+
+    # Add all agent nodes to the graph
+    add_node("comp", competitor_analyst_node) # Node for Competitor Intelligence
+    add_node("cust", llm_nodes["cust"]) # Node for Customer Insights
+    add_node("mkt_gen", market_context_generator)
+    add_node("mkt_ctx", market_context_analyst)
+    add_node("trend", llm_nodes["trend"])
+    if fanout_design:
+        add_node("design_pair", llm_nodes["design_pair"]) # One Offer Designer call per (window, strategy) task
+        add_node("designs_ready", offers_ready_gate)
+        add_node("validate_batch", llm_nodes["validate_batch"]) # Brand Validation over a batch of candidates
+        add_node("merge_offers", merge_offers_node)
+    else:
+        add_node("design", llm_nodes["design_structured" if structured_design else "design"]) # Node for Offer Design (Creative Strategist)
+    validate = not fanout_design and (not structured_design or refine)
+    if validate:
+        add_node("validate", llm_nodes["validate"]) # Node for Brand Validation and Structuring
+    add_node("viz", visualization_node) # Node for Visualization/Prioritization Table
+
+    ### 8b. Orchestration Flow
+
+    # Step 1: Define edges for parallel execution of initial analytical agents
+    # All three analytical agents start their work concurrently from the initial state.
+    # Parallel starts, after the run's context deadline is stamped
+    builder.add_edge(START, "deadline")
+    builder.add_edge("deadline", "comp")
+    builder.add_edge("deadline", "cust")
+    builder.add_edge("deadline", "mkt_gen")
+
+    # Market context chain
+    builder.add_edge("mkt_gen", "mkt_ctx")
+    builder.add_edge("mkt_ctx", "trend")
+
+    # Step 2: Define edges for the orchestrator (Offer Designer) and subsequent validation
+    # All three analytical agents' outputs feed into the Offer Designer.
+    # Fan-in barrier: design waits for all three branches (each bounded by the context deadline)
+    builder.add_edge(["comp", "cust", "trend"], "ready")
+    if fanout_design:
+        # Map-reduce: Send per design task -> barrier -> Send per validation batch -> merge
+        builder.add_conditional_edges("ready", fan_out_designs, ["design_pair", "designs_ready"])
+        builder.add_edge("design_pair", "designs_ready")
+        builder.add_conditional_edges("designs_ready", fan_out_validation, ["validate_batch", "merge_offers"])
+        builder.add_edge("validate_batch", "merge_offers")
+    else:
+        builder.add_edge("ready", "design")
+
+    # Step 3: Link the Brand Validator to the Visualizer and then to the end of the graph
+    # The structured concepts from the Validator are used to create the visualization.
+    if fanout_design:
+        builder.add_edge("merge_offers", "viz")
+    elif validate:
+        builder.add_edge("design", "validate")
+        builder.add_edge("validate", "viz")
+    else:
+        builder.add_edge("design", "viz")
+    # The graph concludes after the visualization is prepared.
+    builder.add_edge("viz", END)
+
+    return builder
 
 
-# Step 2: Define edges for the orchestrator (Offer Designer) and subsequent validation
-# All three analytical agents' outputs feed into the Offer Designer.
-# All intelligence must finish first
-# Design must wait for trend (hard dependency)
-builder.add_edge("trend", "design")
+#9. Compile the Final App
 
-# Downstream
-builder.add_edge("design", "validate")
-builder.add_edge("validate", "viz")
-builder.add_edge("viz", END)
+def build_app(config: EngineConfig = None, async_nodes: bool = False, incremental: bool = False,
+              checkpoint: bool = False, structured_design: bool = False, refine: bool = False,
+              fanout_design: bool = False):
+    """
+    Compiles the graph with every node wrapped by the runtime tracer.
 
+    Passing a config (re)installs the process-wide runtime; otherwise the
+    current one (from the environment) is reused. LLM clients are still only
+    built when the first LLM node runs. Streamlit should cache the result
+    once per process (st.cache_resource).
 
-# Step 3: Link the Brand Validator to the Visualizer and then to the end of the graph
-# The structured concepts from the Validator are used to create the visualization.
-builder.add_edge("validate", "viz")
-# The graph concludes after the visualization is prepared.
-builder.add_edge("viz", END)
+    incremental=True additionally routes every node through runtime.memo:
+    a node whose input keys hash the same as on an earlier run is skipped
+    and its stored output replayed (no span is recorded for it).
 
-#9. Compile the Final App
+    checkpoint=True persists every superstep to runtime.checkpointer; runs
+    then need checkpointing.run_config(run_id), and a failed run resumes
+    from its last successful node with app.invoke(resume_input(), run_config(run_id)).
 
-app = builder.compile()
+    structured_design / refine select the single-hop design mode, fanout_design
+    the map-reduce design stage (see build_graph); the fan-out graph runs at
+    most config.design_concurrency tasks at once (a per-call max_concurrency
+    overrides it).
+    """
+    runtime = configure(config) if config is not None else get_runtime()
+
+    node_wrapper = runtime.tracer.wrap
+    if incremental:
+        def node_wrapper(name, fn):
+            return runtime.memo.wrap(name, runtime.tracer.wrap(name, fn))
+
+    builder = build_graph(
+        async_nodes=async_nodes,
+        node_wrapper=node_wrapper,
+        structured_design=structured_design,
+        refine=refine,
+        fanout_design=fanout_design
+    )
+    app = builder.compile(checkpointer=runtime.checkpointer if checkpoint else None)
+    if fanout_design:
+        app = app.with_config(max_concurrency=runtime.config.design_concurrency)
+    return app
+
+
+_RUNTIME_ATTRIBUTES = ("llm", "client", "async_client", "llm_cache", "tracer", "memo", "checkpointer", "resilience", "rate_limiter", "coordinator", "monte_carlo")
+
+
+def __getattr__(name):
+    """Backwards-compatible lazy module attributes (engine.app, engine.tracer, ...)."""
+    if name in ("app", "async_app"):
+        with _default_apps_lock:
+            if name not in _default_apps:
+                _default_apps[name] = build_app(async_nodes=name == "async_app")
+        return _default_apps[name]
+    if name in ("builder", "async_builder"):
+        return build_graph(async_nodes=name == "async_builder", node_wrapper=get_runtime().tracer.wrap)
+    if name in _RUNTIME_ATTRIBUTES:
+        return getattr(get_runtime(), name)
+    raise AttributeError(f"module 'engine' has no attribute {name!r}")
@@ -0,0 +1,94 @@
+# frames.py
+#
+# Compact, columnar payloads for large tabular graph state.
+#
+# TableRef is a small handle around an immutable Arrow table. Graph state,
+# memo entries and checkpoints carry the handle instead of a DataFrame or a
+# row-by-row dict: LangGraph passes it by reference, its repr and
+# fingerprint are O(1) in the row count, and consumers materialize only
+# the columns they read with to_pandas(columns=[...]).
+#
+# Categorical columns stay dictionary-encoded (codes + one copy of the
+# labels) and datetime64 units round-trip exactly. pyarrow is imported on
+# first use, so `import engine` stays light.
+
+import uuid
+
+
+class TableRef:
+    """
+    Immutable Arrow-backed table referenced by ID.
+
+    Usage:
+        ref = TableRef.from_pandas(df)
+        ref.num_rows, ref.nbytes
+        ref.to_pandas(columns=["trend_type", "observed_date"])
+    """
+
+    __slots__ = ("ref_id", "_table")
+
+    def __init__(self, table, ref_id=None):
+        self._table = table
+        self.ref_id = ref_id or uuid.uuid4().hex[:16]
+
+    @classmethod
+    def from_pandas(cls, df, ref_id=None):
+        """One columnar copy of df; a non-default index is kept as a column and restored on read."""
+        import pyarrow as pa
+
+        return cls(pa.Table.from_pandas(df, preserve_index=None), ref_id)
+
+    @property
+    def table(self):
+        return self._table
+
+    @property
+    def num_rows(self) -> int:
+        return self._table.num_rows
+
+    @property
+    def column_names(self) -> list:
+        return [name for name in self._table.column_names if name not in self._index_columns()]
+
+    @property
+    def nbytes(self) -> int:
+        return self._table.nbytes
+
+    def __len__(self):
+        return self.num_rows
+
+    def __repr__(self):
+        return f"TableRef({self.ref_id}, rows={self.num_rows}, columns={self.column_names})"
+
+    def _index_columns(self) -> list:
+        metadata = self._table.schema.pandas_metadata or {}
+        return [col for col in metadata.get("index_columns", []) if isinstance(col, str)]
+
+    def to_pandas(self, columns=None):
+        """DataFrame of the selected columns (all by default), with the original index."""
+        table = self._table
+        if columns is not None:
+            table = table.select(list(columns) + self._index_columns())
+        return table.to_pandas()
+
+    # ---------------------------------------------------
+    # IPC (checkpoints, pickling)
+    # ---------------------------------------------------
+    def to_ipc(self, compression="zstd") -> bytes:
+        """Arrow IPC stream bytes of the table."""
+        import pyarrow as pa
+
+        sink = pa.BufferOutputStream()
+        options = pa.ipc.IpcWriteOptions(compression=compression)
+        with pa.ipc.new_stream(sink, self._table.schema, options=options) as writer:
+            writer.write_table(self._table)
+        return sink.getvalue().to_pybytes()
+
+    @classmethod
+    def from_ipc(cls, data, ref_id=None):
+        import pyarrow as pa
+
+        return cls(pa.ipc.open_stream(data).read_all(), ref_id)
+
+    def __reduce__(self):
+        return TableRef.from_ipc, (self.to_ipc(), self.ref_id)
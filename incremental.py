@@ -0,0 +1,215 @@
+# incremental.py
+#
+# Dependency-aware incremental re-execution for the compiled graph.
+#
+# IncrementalExecutor.wrap is a node_wrapper for engine.build_graph. On every
+# run it hands the node a state view that records which MasterState keys the
+# node reads ([], .get(), `in`), fingerprints exactly that input slice and
+# stores the node's output under the fingerprint. On the next run the node
+# is skipped, and its prior output replayed, when the same slice hashes the
+# same. Outputs then hash the same downstream, so a change to wendys_active
+# only re-executes comp -> design -> validate -> viz.
+#
+# Nodes are assumed to be functions of the keys they read; nodes whose
+# output should still vary between runs (e.g. unseeded signal draws, LLM
+# calls sampled at temperature > 0) are kept out of the memo by replay_if.
+
+import datetime
+import hashlib
+import inspect
+import threading
+from collections import Counter, OrderedDict, defaultdict
+
+import numpy as np
+import pandas as pd
+
+from frames import TableRef
+
+
+class _Unfingerprintable(Exception):
+    """Raised for values without a stable content hash (the node always runs)."""
+
+
+def _feed(h, value):
+    if value is None or isinstance(value, (bool, int, float, str, bytes)):
+        h.update(f"{type(value).__name__}:{value!r};".encode("utf-8"))
+    elif isinstance(value, pd.DataFrame):
+        h.update(f"df:{list(value.columns)!r}:{list(value.dtypes.astype(str))!r};".encode("utf-8"))
+        h.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+    elif isinstance(value, pd.Series):
+        h.update(f"series:{value.name!r}:{value.dtype};".encode("utf-8"))
+        h.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+    elif isinstance(value, TableRef):
+        # Immutable: the handle ID stands for the content
+        h.update(f"tableref:{value.ref_id};".encode("utf-8"))
+    elif isinstance(value, np.ndarray):
+        h.update(f"ndarray:{value.dtype}:{value.shape};".encode("utf-8"))
+        h.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, dict):
+        h.update(f"dict:{len(value)};".encode("utf-8"))
+        for key, item in value.items():
+            _feed(h, key)
+            _feed(h, item)
+    elif isinstance(value, (list, tuple)):
+        h.update(f"{type(value).__name__}:{len(value)};".encode("utf-8"))
+        for item in value:
+            _feed(h, item)
+    elif isinstance(value, (frozenset, set)):
+        h.update(f"set:{sorted(map(repr, value))!r};".encode("utf-8"))
+    elif isinstance(value, (pd.Timestamp, datetime.date, np.generic)):
+        h.update(f"{type(value).__name__}:{value!r};".encode("utf-8"))
+    else:
+        # Live objects (e.g. a DecayedSignalAggregator) can change in place
+        raise _Unfingerprintable(type(value).__name__)
+
+
+_MISSING = object()
+
+
+def fingerprint(state, keys) -> str:
+    """SHA-256 of the given state keys (missing keys hash as missing)."""
+    h = hashlib.sha256()
+    for key in sorted(keys):
+        value = state.get(key, _MISSING)
+        h.update(f"{key}=".encode("utf-8"))
+        if value is _MISSING:
+            h.update(b"<missing>;")
+        else:
+            _feed(h, value)
+    return h.hexdigest()
+
+
+class _ReadRecorder(dict):
+    """State copy that records the keys a node reads."""
+
+    def __init__(self, state):
+        super().__init__(state)
+        self.reads = set()
+
+    def __getitem__(self, key):
+        self.reads.add(key)
+        return super().__getitem__(key)
+
+    def get(self, key, default=None):
+        self.reads.add(key)
+        return super().get(key, default)
+
+    def __contains__(self, key):
+        self.reads.add(key)
+        return super().__contains__(key)
+
+
+class IncrementalExecutor:
+    """Per-node memo of outputs keyed by the fingerprint of the keys each node read."""
+
+    def __init__(self, max_entries_per_node=8, ignore_keys=(), store_if=None, node_max_entries=None,
+                 replay_if=None):
+        self.max_entries_per_node = max_entries_per_node
+        self.node_max_entries = dict(node_max_entries or {})   # per-node overrides (e.g. fan-out nodes)
+        self.ignore_keys = frozenset(ignore_keys)   # read but not part of the input slice (e.g. UI flags)
+        self.store_if = store_if                    # output -> bool; False keeps it out of the memo (e.g. fallbacks)
+        self.replay_if = replay_if                  # (node, state) -> bool; False always runs the node, unmemoized
+        self._entries = defaultdict(OrderedDict)   # node -> {(read_keys, digest): output}
+        self._lock = threading.Lock()
+        self.stats = Counter()                     # reused / executed / unhashable, plus per-node counters
+
+    # ---------------------------------------------------
+    # MEMO LOOKUP / STORE
+    # ---------------------------------------------------
+    def _lookup(self, name, state):
+        with self._lock:
+            candidates = list(self._entries[name].items())
+        for (keys, digest), output in reversed(candidates):
+            try:
+                if fingerprint(state, keys) == digest:
+                    with self._lock:
+                        self._entries[name].move_to_end((keys, digest))
+                    return output
+            except _Unfingerprintable:
+                return None
+        return None
+
+    def _store(self, name, recorder, output):
+        if self.store_if is not None and not self.store_if(output):
+            return
+        keys = frozenset(recorder.reads - self.ignore_keys)
+        try:
+            digest = fingerprint(recorder, keys)
+        except _Unfingerprintable:
+            self._count(name, "unhashable")
+            return
+        with self._lock:
+            entries = self._entries[name]
+            entries[(keys, digest)] = output
+            entries.move_to_end((keys, digest))
+            while len(entries) > self.node_max_entries.get(name, self.max_entries_per_node):
+                entries.popitem(last=False)
+
+    def _replayable(self, name, state):
+        return self.replay_if is None or self.replay_if(name, state)
+
+    def _count(self, name, outcome):
+        with self._lock:
+            self.stats[outcome] += 1
+            self.stats[f"{name}.{outcome}"] += 1
+
+    def clear(self, node=None):
+        """Forgets stored outputs (of one node, or all)."""
+        with self._lock:
+            if node is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(node, None)
+
+    # ---------------------------------------------------
+    # NODE WRAPPING
+    # ---------------------------------------------------
+    def wrap(self, name, fn):
+        """node_wrapper(name, fn) -> fn that replays prior output when its inputs are unchanged."""
+        memo = self
+
+        if inspect.iscoroutinefunction(fn):
+            async def incremental_async(state, config=None):
+                if not memo._replayable(name, state):
+                    output = await (fn(state, config) if _takes_config(fn) else fn(state))
+                    memo._count(name, "executed")
+                    return output
+                output = memo._lookup(name, state)
+                if output is not None:
+                    memo._count(name, "reused")
+                    return dict(output)
+                recorder = _ReadRecorder(state)
+                output = await (fn(recorder, config) if _takes_config(fn) else fn(recorder))
+                memo._count(name, "executed")
+                memo._store(name, recorder, output)
+                return output
+
+            incremental_async.__name__ = getattr(fn, "__name__", name)
+            return incremental_async
+
+        def incremental(state, config=None):
+            if not memo._replayable(name, state):
+                output = fn(state, config) if _takes_config(fn) else fn(state)
+                memo._count(name, "executed")
+                return output
+            output = memo._lookup(name, state)
+            if output is not None:
+                memo._count(name, "reused")
+                return dict(output)
+            recorder = _ReadRecorder(state)
+            output = fn(recorder, config) if _takes_config(fn) else fn(recorder)
+            memo._count(name, "executed")
+            memo._store(name, recorder, output)
+            return output
+
+        # No functools.wraps: LangGraph must see the (state, config) signature
+        incremental.__name__ = getattr(fn, "__name__", name)
+        return incremental
+
+
+def _takes_config(fn) -> bool:
+    """True for (state, config) callables, e.g. nodes already wrapped by Tracer.wrap."""
+    try:
+        return "config" in inspect.signature(fn).parameters
+    except (TypeError, ValueError):
+        return False
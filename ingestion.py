@@ -0,0 +1,274 @@
+# ingestion.py
+#
+# Chunked ingestion of real competitor / market observation exports.
+#
+# Files (CSV, JSONL or Parquet, optionally compressed) are read a bounded
+# chunk at a time, each chunk is validated and coerced to the exact columns
+# and dtypes the signal generator produces, and folded straight into a
+# DecayedSignalAggregator. Nothing but the current chunk and the
+# aggregator's per-(key, day) counts is ever held, so peak memory depends
+# on chunk_rows and the look-back windows, not on file size.
+#
+# The filled aggregator goes into graph state as `signal_aggregator`; the
+# competitor / market nodes then score it instead of synthetic rows:
+#
+#   aggregator, reports = ingest_signals(competitor=["obs.csv.gz"], market=["trends.parquet"])
+#   app.invoke({"wendys_active": ["BOGO"], "signal_aggregator": aggregator})
+
+import os
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from signal_aggregator import DecayedSignalAggregator
+from signal_generator import (
+    COMPETITOR_BRANDS,
+    COMPETITOR_MECHANICS,
+    COMPETITOR_WINDOW_DAYS,
+    DAYPARTS,
+    MARKET_WINDOW_DAYS,
+    SEASONS,
+    SITUATIONS,
+    SOURCES,
+    TREND_TYPES
+)
+
+DEFAULT_CHUNK_ROWS = 200_000
+
+
+class SchemaError(ValueError):
+    """An input file lacks required columns or is in an unsupported format."""
+
+
+@dataclass(frozen=True)
+class SignalSchema:
+    """
+    Column contract of one signal kind.
+
+    vocabularies maps categorical columns to their allowed labels (matched
+    case-insensitively, stored in this order); None accepts any label.
+    """
+    kind: str
+    id_column: str
+    date_column: str
+    vocabularies: dict
+    window_days: int
+
+    @property
+    def columns(self) -> list:
+        return ([self.id_column] if self.id_column else []) + list(self.vocabularies) + [self.date_column]
+
+
+COMPETITOR_SCHEMA = SignalSchema(
+    kind="competitor",
+    id_column="id",
+    date_column="obs_date",
+    vocabularies={"brand": COMPETITOR_BRANDS, "mechanic": COMPETITOR_MECHANICS},
+    window_days=COMPETITOR_WINDOW_DAYS
+)
+
+MARKET_SCHEMA = SignalSchema(
+    kind="market",
+    id_column=None,
+    date_column="observed_date",
+    vocabularies={
+        "trend_type": TREND_TYPES,
+        "season": SEASONS,
+        "daypart": DAYPARTS,
+        "situation": SITUATIONS,
+        "source": SOURCES
+    },
+    window_days=MARKET_WINDOW_DAYS
+)
+
+SCHEMAS = {schema.kind: schema for schema in (COMPETITOR_SCHEMA, MARKET_SCHEMA)}
+
+
+@dataclass
+class IngestionReport:
+    """Per-file outcome: rows read / folded in and rejected rows by reason."""
+    path: str
+    kind: str
+    chunks: int = 0
+    rows_read: int = 0
+    rows_accepted: int = 0
+    rejected: Counter = field(default_factory=Counter)
+    seconds: float = 0.0
+
+    @property
+    def rows_rejected(self) -> int:
+        return sum(self.rejected.values())
+
+
+# ---------------------------------------------------------
+# READING
+# ---------------------------------------------------------
+def _file_format(path) -> str:
+    name = os.path.basename(str(path)).lower()
+    for suffix in (".gz", ".bz2", ".zst", ".xz", ".zip"):
+        if name.endswith(suffix):
+            name = name[: -len(suffix)]
+    if name.endswith((".parquet", ".pq")):
+        return "parquet"
+    if name.endswith((".jsonl", ".ndjson", ".json")):
+        return "jsonl"
+    if name.endswith((".csv", ".tsv", ".txt")):
+        return "csv"
+    raise SchemaError(f"{path}: unsupported file type (expected CSV, JSONL or Parquet)")
+
+
+def _check_columns(path, found, schema):
+    missing = [col for col in schema.columns if col not in found]
+    if missing:
+        raise SchemaError(f"{path}: missing {schema.kind} columns {missing}")
+
+
+def read_chunks(path, schema: SignalSchema, chunk_rows=DEFAULT_CHUNK_ROWS, file_format=None):
+    """
+    Yields DataFrames of at most chunk_rows rows holding only the schema's
+    columns, as raw strings (CSV / JSONL) or native Arrow types (Parquet).
+    """
+    file_format = file_format or _file_format(path)
+
+    if file_format == "parquet":
+        import pyarrow.parquet as pq
+
+        parquet = pq.ParquetFile(path)
+        _check_columns(path, parquet.schema_arrow.names, schema)
+        for batch in parquet.iter_batches(batch_size=chunk_rows, columns=schema.columns):
+            yield batch.to_pandas()
+
+    elif file_format == "csv":
+        sep = "\t" if ".tsv" in os.path.basename(str(path)).lower() else ","
+        header = pd.read_csv(path, sep=sep, nrows=0).columns
+        _check_columns(path, header, schema)
+        yield from pd.read_csv(path, sep=sep, usecols=schema.columns, dtype=str,
+                               chunksize=chunk_rows, keep_default_na=False)
+
+    elif file_format == "jsonl":
+        # JSON lines can't be column-pruned while parsing; extra keys are dropped per chunk
+        for chunk in pd.read_json(path, lines=True, dtype=False, chunksize=chunk_rows):
+            _check_columns(path, chunk.columns, schema)
+            yield chunk[schema.columns]
+
+    else:
+        raise SchemaError(f"{path}: unsupported format {file_format!r}")
+
+
+# ---------------------------------------------------------
+# VALIDATION + COERCION
+# ---------------------------------------------------------
+def _clean_labels(values: pd.Series) -> pd.Series:
+    values = values.astype("string").str.strip()
+    return values.mask(values == "")
+
+
+def _coerce_categorical(values, vocabulary):
+    """
+    (Categorical, unknown mask). Labels are cleaned and matched once per
+    distinct value, not per row; labels outside the vocabulary are flagged.
+    """
+    codes, uniques = pd.factorize(values)   # -1 = missing
+    labels = _clean_labels(pd.Series(uniques))
+    if vocabulary is None:
+        vocabulary = sorted(set(labels.dropna()))
+
+    lookup = {label.lower(): i for i, label in enumerate(vocabulary)}
+    mapped = labels.str.lower().map(lookup)
+    unknown = (mapped.isna() & labels.notna()).to_numpy(dtype=bool)
+
+    # A trailing -1 slot serves the missing (-1) codes
+    targets = np.append(mapped.fillna(-1).to_numpy(dtype=np.int64), -1)
+    return (pd.Categorical.from_codes(targets[codes], categories=list(vocabulary)),
+            np.append(unknown, False)[codes])
+
+
+def _coerce_dates(values: pd.Series) -> np.ndarray:
+    """datetime64[D] array (NaT where unparseable); ISO-8601 strings or native timestamps, UTC days."""
+    if not pd.api.types.is_datetime64_any_dtype(values):
+        values = pd.to_datetime(values, errors="coerce", format="ISO8601", utc=True)
+    if isinstance(values.dtype, pd.DatetimeTZDtype):
+        values = values.dt.tz_convert(None)
+    return values.to_numpy(dtype="datetime64[D]")
+
+
+def coerce_chunk(df: pd.DataFrame, schema: SignalSchema, today_day: int, counts: Counter) -> pd.DataFrame:
+    """
+    Chunk with exactly the generator's columns and dtypes (string IDs,
+    fixed-category categoricals, day-resolution datetime64). Rows with a
+    missing field, an unknown label, an unparseable / future date, or a
+    date outside the look-back window are dropped and counted by reason.
+    """
+    out = {}
+    keep = np.ones(len(df), dtype=bool)
+
+    def reject(reason, mask):
+        nonlocal keep
+        mask = np.asarray(mask, dtype=bool) & keep
+        if mask.any():
+            counts[reason] += int(mask.sum())
+            keep &= ~mask
+
+    if schema.id_column:
+        ids = _clean_labels(df[schema.id_column])
+        reject(f"missing_{schema.id_column}", ids.isna())
+        out[schema.id_column] = ids
+
+    for col, vocabulary in schema.vocabularies.items():
+        values, unknown = _coerce_categorical(df[col], vocabulary)
+        reject(f"missing_{col}", (values.codes == -1) & ~unknown)
+        reject(f"unknown_{col}", unknown)
+        out[col] = values
+
+    dates = _coerce_dates(df[schema.date_column])
+    reject(f"invalid_{schema.date_column}", np.isnat(dates))
+    days = dates.astype(np.int64)
+    reject("future_date", days > today_day)
+    reject("outside_window", today_day - days > schema.window_days)
+    out[schema.date_column] = dates.astype("datetime64[ns]")
+
+    frame = pd.DataFrame(out, index=df.index)[schema.columns][keep]
+    if schema.id_column:
+        frame[schema.id_column] = frame[schema.id_column].astype(object)
+    return frame.reset_index(drop=True)
+
+
+# ---------------------------------------------------------
+# FOLDING INTO THE AGGREGATOR
+# ---------------------------------------------------------
+def ingest_file(path, kind, aggregator: DecayedSignalAggregator, chunk_rows=DEFAULT_CHUNK_ROWS,
+                file_format=None) -> IngestionReport:
+    """Streams one file into the aggregator chunk by chunk."""
+    schema = SCHEMAS[kind]
+    add = aggregator.add_competitor_batch if kind == "competitor" else aggregator.add_market_batch
+    report = IngestionReport(path=str(path), kind=kind)
+    start = time.perf_counter()
+
+    for chunk in read_chunks(path, schema, chunk_rows=chunk_rows, file_format=file_format):
+        clean = coerce_chunk(chunk, schema, aggregator.today, report.rejected)
+        report.chunks += 1
+        report.rows_read += len(chunk)
+        report.rows_accepted += len(clean)
+        if len(clean):
+            add(clean)
+
+    report.seconds = time.perf_counter() - start
+    return report
+
+
+def ingest_signals(competitor=(), market=(), as_of=None, aggregator=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Folds competitor and market files into one aggregator (a new one
+    referenced at as_of, default today, unless one is passed in).
+
+    Returns (aggregator, [IngestionReport, ...]).
+    """
+    if aggregator is None:
+        aggregator = DecayedSignalAggregator(as_of or pd.Timestamp.today().date())
+
+    reports = [ingest_file(path, "competitor", aggregator, chunk_rows) for path in competitor]
+    reports += [ingest_file(path, "market", aggregator, chunk_rows) for path in market]
+    return aggregator, reports
@@ -0,0 +1,312 @@
+# llm_cache.py
+#
+# Content-addressed cache for chat completions.
+#
+# Requests are keyed on a SHA-256 of (model, messages, temperature,
+# response_format). Lookups hit an in-memory LRU tier first, then a SQLite
+# tier with a TTL. Nodes opt in by name, so deterministic calls (e.g. the
+# temperature=0 customer analyst) are served from cache while creative
+# calls keep hitting the model.
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict
+
+CACHE_KEY_FIELDS = ("model", "messages", "temperature", "response_format")
+
+
+def cache_key(request: dict) -> str:
+    """Stable hash of the request fields that determine the completion."""
+    material = {field: request.get(field) for field in CACHE_KEY_FIELDS}
+    encoded = json.dumps(material, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """Two-tier (memory LRU + SQLite/TTL) store of serialized completions."""
+
+    def __init__(self, path=".llm_cache.sqlite", ttl_seconds=7 * 24 * 3600, max_memory_entries=256):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_memory_entries = max_memory_entries
+
+        self._memory = OrderedDict()   # key -> (stored_at, payload)
+        self._lock = threading.Lock()
+        self.stats = Counter()         # hits / misses / memory_hits / disk_hits, plus per-node counters
+
+        if self.path:
+            with self._connect() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS completions "
+                    "(key TEXT PRIMARY KEY, stored_at REAL NOT NULL, payload TEXT NOT NULL)"
+                )
+
+    def _connect(self):
+        # One short-lived connection per operation keeps parallel graph branches thread-safe
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _remember(self, key, stored_at, payload):
+        with self._lock:
+            self._memory[key] = (stored_at, payload)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_entries:
+                self._memory.popitem(last=False)
+
+    def _expired(self, stored_at):
+        return self.ttl_seconds is not None and time.time() - stored_at > self.ttl_seconds
+
+    def get(self, key, node=None):
+        """Returns the cached ChatCompletion or None."""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if self._expired(entry[0]):
+                    del self._memory[key]
+                    entry = None
+                else:
+                    self._memory.move_to_end(key)
+
+        tier = "memory"
+        if entry is None and self.path:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT stored_at, payload FROM completions WHERE key = ?", (key,)
+                ).fetchone()
+            if row is not None and not self._expired(row[0]):
+                entry, tier = row, "disk"
+                self._remember(key, *row)
+
+        self._count("hits" if entry else "misses", node)
+        if entry is None:
+            return None
+
+        self.stats[f"{tier}_hits"] += 1
+        from openai.types.chat import ChatCompletion  # deferred: keeps `import engine` light
+        return ChatCompletion.model_validate_json(entry[1])
+
+    def put(self, key, response):
+        payload = response.model_dump_json()
+        stored_at = time.time()
+        self._remember(key, stored_at, payload)
+
+        if self.path:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO completions (key, stored_at, payload) VALUES (?, ?, ?)",
+                    (key, stored_at, payload)
+                )
+                if self.ttl_seconds is not None:
+                    conn.execute("DELETE FROM completions WHERE stored_at < ?", (stored_at - self.ttl_seconds,))
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        if self.path:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM completions")
+
+    def _count(self, outcome, node):
+        with self._lock:
+            self.stats[outcome] += 1
+            if node:
+                self.stats[f"{node}.{outcome}"] += 1
+
+
+class _UsageStream:
+    """
+    Passes a completion stream through and calls on_end(usage_chunk) once it
+    is exhausted, closed or fails. With stream_options={"include_usage": True}
+    the final chunk carries the request's usage (else on_end gets None).
+    """
+
+    def __init__(self, stream, on_end):
+        self._stream = stream
+        self._on_end = on_end
+        self._usage_chunk = None
+        self._ended = False
+
+    def _seen(self, chunk):
+        if getattr(chunk, "usage", None) is not None:
+            self._usage_chunk = chunk
+        return chunk
+
+    def _end(self):
+        if not self._ended:
+            self._ended = True
+            self._on_end(self._usage_chunk)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return self._seen(next(self._stream))
+        except BaseException:
+            self._end()
+            raise
+
+    def close(self):
+        try:
+            self._stream.close()
+        finally:
+            self._end()
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+class _AsyncUsageStream(_UsageStream):
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return self._seen(await self._stream.__anext__())
+        except BaseException:
+            self._end()
+            raise
+
+    async def close(self):
+        try:
+            await self._stream.close()
+        finally:
+            self._end()
+
+
+def report_usage(stream, on_end):
+    """Wraps a (sync or async) completion stream so on_end sees its final usage chunk."""
+    wrapper = _AsyncUsageStream if hasattr(stream, "__aiter__") else _UsageStream
+    return wrapper(stream, on_end)
+
+
+class _CachedCompletions:
+    def __init__(self, completions, cache, node, observers=()):
+        self._completions = completions
+        self._cache = cache
+        self._node = node
+        self._observers = observers
+
+    def _observe(self, response, cached=False):
+        for observer in self._observers:
+            observer(self._node, response, cached)
+        return response
+
+    def create(self, **kwargs):
+        # Streams can't be replayed from a stored completion; observers see their usage chunk
+        if kwargs.get("stream"):
+            return report_usage(self._completions.create(**kwargs), self._observe)
+        if self._cache is None:
+            return self._observe(self._completions.create(**kwargs))
+
+        key = cache_key(kwargs)
+        cached = self._cache.get(key, node=self._node)
+        if cached is not None:
+            return self._observe(cached, cached=True)
+
+        response = self._completions.create(**kwargs)
+        self._cache.put(key, response)
+        return self._observe(response)
+
+
+class _AsyncCachedCompletions(_CachedCompletions):
+    async def create(self, **kwargs):
+        if kwargs.get("stream"):
+            return report_usage(await self._completions.create(**kwargs), self._observe)
+        if self._cache is None:
+            return self._observe(await self._completions.create(**kwargs))
+
+        # SQLite lookups run off the event loop
+        key = cache_key(kwargs)
+        cached = await asyncio.to_thread(self._cache.get, key, self._node)
+        if cached is not None:
+            return self._observe(cached, cached=True)
+
+        response = await self._completions.create(**kwargs)
+        await asyncio.to_thread(self._cache.put, key, response)
+        return self._observe(response)
+
+
+class CachedChatClient:
+    """
+    Wraps OpenAI-compatible clients (blocking and async) with per-node opt-in caching.
+
+    Usage:
+        llm = CachedChatClient(client, cache, nodes={"cust"}, async_client_factory=make_async_client)
+        llm.for_node("cust").chat.completions.create(...)
+        await llm.for_node_async("cust").chat.completions.create(...)
+
+    async_client_factory: zero-argument callable building an async client. An
+    async client's connection pool is tied to the event loop it first ran on,
+    so one client is built per running loop (and dropped once that loop
+    closes) instead of sharing a single async_client across loops.
+    observers: callables (node, response, cached) notified after every call;
+    for streams, once the stream ends, with its final usage chunk (or None).
+    resilience: optional resilience.ResilientCaller applied to cache misses
+    (deadlines, retries, hedging).
+    limiter: optional coordinator.RateLimiter applied to every gateway request
+    (each retry and hedge included).
+    """
+
+    def __init__(self, client, cache, nodes=(), async_client=None, observers=None, resilience=None,
+                 limiter=None, async_client_factory=None):
+        self.client = client
+        self._async_client = async_client
+        self._async_client_factory = async_client_factory
+        self._loop_clients = {} # event loop -> async client built by the factory
+        self._loop_lock = threading.Lock()
+        self.cache = cache
+        self.nodes = set(nodes)
+        self.observers = list(observers or [])
+        self.resilience = resilience
+        self.limiter = limiter
+
+    def _cache_for(self, node):
+        return self.cache if self.cache is not None and node in self.nodes else None
+
+    def for_node(self, node):
+        completions = self.client.chat.completions
+        if self.limiter is not None:
+            completions = self.limiter.wrap(completions)
+        if self.resilience is not None:
+            completions = self.resilience.wrap(node, completions)
+        return _NodeClient(_CachedCompletions(completions, self._cache_for(node), node, self.observers))
+
+    @property
+    def async_client(self):
+        """Async client for the running event loop (or the fixed async_client)."""
+        if self._async_client_factory is None:
+            return self._async_client
+        loop = asyncio.get_running_loop()
+        with self._loop_lock:
+            for closed in [other for other in self._loop_clients if other.is_closed()]:
+                del self._loop_clients[closed]
+            if loop not in self._loop_clients:
+                self._loop_clients[loop] = self._async_client_factory()
+            return self._loop_clients[loop]
+
+    def for_node_async(self, node):
+        async_client = self.async_client
+        if async_client is None:
+            raise RuntimeError("CachedChatClient was built without an async_client")
+        completions = async_client.chat.completions
+        if self.limiter is not None:
+            completions = self.limiter.wrap_async(completions)
+        if self.resilience is not None:
+            completions = self.resilience.wrap_async(node, completions)
+        return _NodeClient(_AsyncCachedCompletions(completions, self._cache_for(node), node, self.observers))
+
+
+class _NodeClient:
+    """Minimal client surface (.chat.completions.create) handed to a single node."""
+
+    def __init__(self, completions):
+        self.chat = _Chat(completions)
+
+
+class _Chat:
+    def __init__(self, completions):
+        self.completions = completions
@@ -0,0 +1,289 @@
+# montecarlo.py
+#
+# Monte Carlo confidence intervals for threat and context-window scores.
+#
+# A single signal draw ranks mechanics and context windows by one random
+# sample. Here N replicas of the deterministic signal -> score stages run
+# across a process pool:
+#   * replica i is exactly the graph's draw for signal_seed = seeds[i], with
+#     the seeds spawned from the run's seed by numpy.random.SeedSequence,
+#     so results do not depend on the worker count or on scheduling,
+#   * each worker writes its replicas' (mechanic, brand) and context-window
+#     weight sums straight into one shared-memory array (no pickled results),
+#   * the parent reduces that array into means, percentile intervals and
+#     top-K membership rates per mechanic and per context window.
+#
+# Replicas are independent, so throughput scales with the number of cores
+# up to the replica count. The pool is created once per process and reused.
+
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import pandas as pd
+
+from scoring import CONTEXT_DIMENSIONS, CONTEXT_LABELS, CONTEXT_TOP_K, RECENCY_DECAY, THREAT_SCORE_CAP
+from signal_generator import generate_competitor_signals, generate_market_signals
+
+# Lower / upper percentile of every reported interval
+INTERVAL = (5.0, 95.0)
+
+
+@dataclass(frozen=True)
+class _Layout:
+    """Column layout of one replica row: (mechanic, brand) sums, then context-window sums."""
+    mechanics: tuple
+    brands: tuple
+    dims: tuple
+    categories: tuple   # per context dimension
+
+    @property
+    def shape(self) -> tuple:
+        return tuple(len(c) for c in self.categories)
+
+    @property
+    def pair_columns(self) -> int:
+        return len(self.mechanics) * len(self.brands)
+
+    @property
+    def width(self) -> int:
+        return self.pair_columns + int(np.prod(self.shape))
+
+
+def _layout(today, dims) -> _Layout:
+    """Category orders come from the generators themselves (a one-row draw)."""
+    competitor = generate_competitor_signals(today, size=1, seed=0)
+    market = generate_market_signals(today, size=1, seed=0)
+    return _Layout(
+        mechanics=tuple(competitor["mechanic"].cat.categories),
+        brands=tuple(competitor["brand"].cat.categories),
+        dims=tuple(dims),
+        categories=tuple(tuple(market[dim].cat.categories) for dim in dims)
+    )
+
+
+def _recency_weights(dates, today) -> np.ndarray:
+    return np.exp(-RECENCY_DECAY * (pd.Timestamp(today) - dates).dt.days.to_numpy())
+
+
+def _replica(seed, today, competitor_size, market_size, layout) -> np.ndarray:
+    """Weight sums of one draw: the competitor / market nodes' aggregations as flat bincounts."""
+    competitor = generate_competitor_signals(today, size=competitor_size, seed=seed)
+    pairs = (competitor["mechanic"].cat.codes.to_numpy(np.int64) * len(layout.brands)
+             + competitor["brand"].cat.codes.to_numpy(np.int64))
+    pair_sums = np.bincount(pairs, weights=_recency_weights(competitor["obs_date"], today),
+                            minlength=layout.pair_columns)
+
+    market = generate_market_signals(today, size=market_size, seed=seed)
+    codes = tuple(market[dim].cat.codes.to_numpy(np.int64) for dim in layout.dims)
+    windows = np.ravel_multi_index(codes, layout.shape)
+    window_sums = np.bincount(windows, weights=_recency_weights(market["observed_date"], today),
+                              minlength=int(np.prod(layout.shape)))
+
+    return np.concatenate([pair_sums, window_sums])
+
+
+def _fill(out, start, seeds, today, competitor_size, market_size, layout):
+    for offset, seed in enumerate(seeds):
+        out[start + offset] = _replica(int(seed), today, competitor_size, market_size, layout)
+
+
+def _replica_block(shm_name, shape, start, seeds, *args):
+    """Worker task: computes a contiguous block of replicas into the shared result array."""
+    # Spawned workers share the parent's resource tracker, which unlinks the block if the parent dies
+    shm = SharedMemory(name=shm_name)
+    try:
+        out = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+        _fill(out, start, seeds, *args)
+        del out
+    finally:
+        shm.close()
+    return len(seeds)
+
+
+# ---------------------------------------------------------
+# SAMPLING
+# ---------------------------------------------------------
+class MonteCarloSampler:
+    """
+    Process pool running seeded signal -> score replicas.
+
+    Usage:
+        sampler = MonteCarloSampler(workers=8)
+        samples = sampler.sample(200, seed=7, today=TODAY, competitor_size=500, market_size=900)
+        samples.threats(wendys_active, trace_ids), samples.windows(evidence, k=5)
+
+    Seeded samples are kept for the last cache_size argument sets, so the
+    competitor and market nodes of one run share a single sampling pass.
+    """
+
+    def __init__(self, workers=None, tasks_per_worker=4, cache_size=8):
+        self.workers = workers or os.cpu_count() or 1
+        self.tasks_per_worker = tasks_per_worker
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _executor(self):
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    # spawn: the engine process runs threads (HTTP pools, graph workers) that fork can't copy safely
+                    self._pool = ProcessPoolExecutor(self.workers, mp_context=get_context("spawn"))
+        return self._pool
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+    def sample(self, replicas, seed, today, competitor_size, market_size, dims=None) -> "MonteCarloSamples":
+        """replicas draws spawned from seed (None = fresh entropy, never cached)."""
+        key = (replicas, seed, today, competitor_size, market_size, tuple(dims or CONTEXT_DIMENSIONS))
+        with self._lock:
+            if seed is not None and key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+
+        samples = self._sample(replicas, seed, today, competitor_size, market_size, key[-1])
+        if seed is not None:
+            with self._lock:
+                self._cache[key] = samples
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return samples
+
+    def _sample(self, replicas, seed, today, competitor_size, market_size, dims):
+        layout = _layout(today, dims)
+        seeds = np.random.SeedSequence(seed).generate_state(replicas, dtype=np.uint32)
+        shape = (replicas, layout.width)
+
+        shm = SharedMemory(create=True, size=max(1, replicas * layout.width * 8))
+        try:
+            blocks = np.array_split(np.arange(replicas), min(replicas, self.workers * self.tasks_per_worker))
+            args = (today, competitor_size, market_size, layout)
+            if self.workers == 1:
+                values = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+                _fill(values, 0, seeds, *args)
+                del values
+            else:
+                pool = self._executor()
+                futures = [pool.submit(_replica_block, shm.name, shape, int(block[0]), seeds[block], *args)
+                           for block in blocks]
+                for future in futures:
+                    future.result()
+            values = np.ndarray(shape, dtype=np.float64, buffer=shm.buf).copy()
+        finally:
+            shm.close()
+            shm.unlink()
+
+        return MonteCarloSamples(values, layout, seeds)
+
+
+# ---------------------------------------------------------
+# REDUCTION
+# ---------------------------------------------------------
+def _interval(values, axis=0):
+    low, high = np.percentile(values, INTERVAL, axis=axis)
+    return values.mean(axis=axis), low, high
+
+
+class MonteCarloSamples:
+    """Replica weight sums (replicas x columns) with reductions into the node output shapes."""
+
+    def __init__(self, values, layout, seeds):
+        self.values = values
+        self.layout = layout
+        self.seeds = seeds
+
+    @property
+    def replicas(self) -> int:
+        return len(self.values)
+
+    def threats(self, wendys_active, trace_ids=None) -> pd.DataFrame:
+        """
+        Threat table over the gap mechanics with mean scores and intervals.
+
+        score / raw_score are replica means; *_p05 / *_p95 the interval;
+        top_brand is the brand leading in most replicas.
+        """
+        layout = self.layout
+        pairs = self.values[:, :layout.pair_columns].reshape(self.replicas, len(layout.mechanics), len(layout.brands))
+        raw = pairs.sum(axis=2)
+        score = np.minimum(THREAT_SCORE_CAP, raw)
+        leaders = pairs.argmax(axis=2)
+
+        rows = []
+        for m, mechanic in enumerate(layout.mechanics):
+            if mechanic in set(wendys_active) or not raw[:, m].any():
+                continue
+            raw_mean, raw_low, raw_high = _interval(raw[:, m])
+            score_mean, score_low, score_high = _interval(score[:, m])
+            rows.append({
+                "mechanic": mechanic,
+                "top_brand": layout.brands[np.bincount(leaders[:, m], minlength=len(layout.brands)).argmax()],
+                "raw_score": raw_mean,
+                "raw_p05": round(raw_low, 1),
+                "raw_p95": round(raw_high, 1),
+                "score": round(score_mean, 1),
+                "score_p05": round(score_low, 1),
+                "score_p95": round(score_high, 1),
+                "trace_id": (trace_ids or {}).get(mechanic)
+            })
+        return pd.DataFrame(rows)
+
+    def windows(self, evidence, k=CONTEXT_TOP_K) -> list:
+        """
+        Top-K context windows ranked by mean relevance across
+        replicas (top-K membership rate breaks ties).
+
+        evidence maps a window key tuple to its signal_id in the run's own
+        draw; windows never observed there have no traceable evidence and
+        are skipped.
+        """
+        layout = self.layout
+        strength = self.values[:, layout.pair_columns:]
+        peak = strength.max(axis=1, keepdims=True)
+        relevance = np.divide(strength * 10, peak, out=np.zeros_like(strength), where=peak > 0)
+        confidence = np.minimum(1.0, np.divide(strength, 0.75 * peak, out=np.zeros_like(strength), where=peak > 0))
+
+        top = np.argpartition(-relevance, min(k, relevance.shape[1]) - 1, axis=1)[:, :k]
+        top_k_rate = np.bincount(top.ravel(), minlength=relevance.shape[1]) / self.replicas
+
+        mean, low, high = _interval(relevance)
+        order = np.lexsort((-top_k_rate, -mean))
+
+        windows = []
+        for flat in order:
+            if len(windows) == k or mean[flat] <= 0:
+                break
+            key = tuple(cats[i] for cats, i in zip(layout.categories, np.unravel_index(flat, layout.shape)))
+            if key not in evidence:
+                continue
+            window = {"signal_id": evidence[key]}
+            window.update({CONTEXT_LABELS.get(dim, dim): value for dim, value in zip(layout.dims, key)})
+            window.update({
+                "timing_strength": round(float(strength[:, flat].mean()), 2),
+                "relevance_score": round(float(mean[flat]), 1),
+                "relevance_p05": round(float(low[flat]), 1),
+                "relevance_p95": round(float(high[flat]), 1),
+                "top_k_rate": round(float(top_k_rate[flat]), 2),
+                "confidence": round(float(confidence[:, flat].mean()), 2),
+                "action": "Act Now" if mean[flat] >= 7 else "Monitor"
+            })
+            windows.append(window)
+        return windows
+
+
+def window_evidence(df: pd.DataFrame, dims=None) -> dict:
+    """Window key -> signal_id (first row) of every context combination present in df."""
+    dims = list(dims or CONTEXT_DIMENSIONS)
+    first = df[dims].assign(_row=df.index).groupby(dims, observed=True)["_row"].first()
+    return {key if isinstance(key, tuple) else (key,): f"CTX-{row}" for key, row in first.items()}
@@ -0,0 +1,125 @@
+# offer_schema.py
+#
+# The offer report contract shared by the Brand Validator, the single-hop
+# structured designer and the fan-out designer / validator calls (which
+# exchange bare {"offers": [...]} documents):
+#
+#   {"report_intro": str,
+#    "offers": [{"name", "witty_rationale", "type", "evidence_signals",
+#                "feasibility", "impact"}, ...]}
+#
+# validate_report() is a dependency-free local check (no jsonschema), so a
+# malformed model answer is caught before it reaches the visualization node
+# and can be fixed with a small targeted repair call instead of a rerun.
+
+import json
+import re
+
+OFFER_TYPES = ("Defensive", "First-to-Market")
+SCORE_RANGE = (0.0, 10.0)
+SIGNAL_ID_PATTERN = re.compile(r"^CTX-\d+$")
+
+# JSON Schema of the report (documentation / response_format json_schema)
+REPORT_SCHEMA = {
+    "type": "object",
+    "required": ["report_intro", "offers"],
+    "properties": {
+        "report_intro": {"type": "string"},
+        "offers": {
+            "type": "array",
+            "minItems": 1,
+            "items": {
+                "type": "object",
+                "required": ["name", "witty_rationale", "type", "evidence_signals", "feasibility", "impact"],
+                "properties": {
+                    "name": {"type": "string"},
+                    "witty_rationale": {"type": "string"},
+                    "type": {"enum": list(OFFER_TYPES)},
+                    "evidence_signals": {"type": "array", "minItems": 1, "items": {"type": "string", "pattern": SIGNAL_ID_PATTERN.pattern}},
+                    "feasibility": {"type": "number", "minimum": SCORE_RANGE[0], "maximum": SCORE_RANGE[1]},
+                    "impact": {"type": "number", "minimum": SCORE_RANGE[0], "maximum": SCORE_RANGE[1]}
+                }
+            }
+        }
+    }
+}
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def validate_offers(offers, known_signals=None, required_types=OFFER_TYPES) -> list:
+    """
+    Problems with a parsed offers list (empty list = valid).
+
+    known_signals: signal IDs the model was shown; evidence outside it is flagged.
+    required_types: offer types that must each appear at least once.
+    """
+    if not isinstance(offers, list) or not offers:
+        return ["offers must be a non-empty list"]
+
+    errors = []
+    for i, offer in enumerate(offers):
+        where = f"offers[{i}]"
+        if not isinstance(offer, dict):
+            errors.append(f"{where} must be an object")
+            continue
+        for key in ("name", "witty_rationale"):
+            if not isinstance(offer.get(key), str) or not offer.get(key, "").strip():
+                errors.append(f"{where}.{key} must be a non-empty string")
+        if offer.get("type") not in OFFER_TYPES:
+            errors.append(f"{where}.type must be one of {list(OFFER_TYPES)}")
+        for key in ("feasibility", "impact"):
+            value = offer.get(key)
+            if not _is_number(value) or not SCORE_RANGE[0] <= value <= SCORE_RANGE[1]:
+                errors.append(f"{where}.{key} must be a number in [{SCORE_RANGE[0]:g}, {SCORE_RANGE[1]:g}]")
+        signals = offer.get("evidence_signals")
+        if not isinstance(signals, list) or not signals:
+            errors.append(f"{where}.evidence_signals must be a non-empty list")
+            continue
+        for signal in signals:
+            if not isinstance(signal, str) or not SIGNAL_ID_PATTERN.match(signal):
+                errors.append(f"{where}.evidence_signals has malformed ID {signal!r} (expected CTX-<n>)")
+            elif known_signals is not None and signal not in known_signals:
+                errors.append(f"{where}.evidence_signals cites {signal}, which is not among the provided signals")
+
+    present = {offer.get("type") for offer in offers if isinstance(offer, dict)}
+    for offer_type in required_types:
+        if offer_type not in present:
+            errors.append(f"offers must include a {offer_type} offer")
+
+    return errors
+
+
+def validate_report(data, known_signals=None, required_types=OFFER_TYPES) -> list:
+    """Problems with a parsed report (empty list = valid); offers are checked by validate_offers."""
+    if not isinstance(data, dict):
+        return ["top level must be a JSON object"]
+
+    errors = []
+    if not isinstance(data.get("report_intro"), str) or not data.get("report_intro", "").strip():
+        errors.append("report_intro must be a non-empty string")
+
+    return errors + validate_offers(data.get("offers"), known_signals=known_signals, required_types=required_types)
+
+
+def parse_report(content: str, known_signals=None, required_types=OFFER_TYPES):
+    """(data, errors) for a raw model answer; JSON syntax errors are reported, not raised."""
+    try:
+        data = json.loads(content)
+    except (TypeError, json.JSONDecodeError) as exc:
+        return None, [f"invalid JSON: {exc}"]
+    return data, validate_report(data, known_signals=known_signals, required_types=required_types)
+
+
+def parse_offers(content: str, known_signals=None, required_types=OFFER_TYPES):
+    """(offers, errors) for a raw {"offers": [...]} answer (no report_intro needed)."""
+    try:
+        data = json.loads(content)
+    except (TypeError, json.JSONDecodeError) as exc:
+        return None, [f"invalid JSON: {exc}"]
+    if not isinstance(data, dict):
+        return None, ["top level must be a JSON object"]
+    offers = data.get("offers")
+    return offers, validate_offers(offers, known_signals=known_signals, required_types=required_types)
@@ -0,0 +1,222 @@
+# prompts.py
+#
+# Token-budgeted prompt assembly for the LLM nodes.
+#
+# Every prompt is split into
+#   * a static instruction block (role, rules, output format, constant maps)
+#     sent first as the system message, byte-identical across runs, so
+#     provider-side prefix caching can reuse it, and
+#   * dynamic evidence sections sent as the user message, serialized
+#     compactly (minified JSON, pipe tables) and fitted to a per-node token
+#     budget. Sections are filled in priority order and items within a
+#     section are kept best-first, so truncation is deterministic and always
+#     drops the weakest evidence.
+#
+# Token counts use tiktoken when its encoding is available locally and a
+# tokenizer-shaped regex estimate otherwise (the gateway model is not an
+# OpenAI model, so either is an estimate).
+
+import json
+import re
+from dataclasses import dataclass, field
+
+# Dynamic-content budget (tokens) per graph node; static instructions are not counted
+NODE_TOKEN_BUDGETS = {
+    "cust": 400,
+    "trend": 800,
+    "design": 2000,
+    "validate": 2500,
+    "repair": 2500,
+    # Fan-out: one window + one gap per designer call; one batch of candidates per validator call
+    "design_pair": 600,
+    "validate_batch": 2500
+}
+
+TIKTOKEN_ENCODING = "o200k_base"
+
+# Word pieces of up to 4 characters (with their leading space), whitespace runs, punctuation
+_TOKEN_PATTERN = re.compile(r" ?\w{1,4}|\s+|[^\w\s]")
+
+_encoding = None
+
+
+def _load_encoding():
+    try:
+        import tiktoken
+        return tiktoken.get_encoding(TIKTOKEN_ENCODING)
+    except Exception:  # noqa: BLE001 - not installed, or the BPE file can't be fetched offline
+        return False
+
+
+def count_tokens(text: str) -> int:
+    """Token count of text (tiktoken if available, else a regex estimate)."""
+    global _encoding
+    if _encoding is None:
+        _encoding = _load_encoding()
+    if _encoding:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return len(_TOKEN_PATTERN.findall(text))
+
+
+def message_tokens(messages: list) -> int:
+    """Token count of a chat request's message contents."""
+    return sum(count_tokens(str(m.get("content", ""))) for m in messages)
+
+
+# ---------------------------------------------------------
+# COMPACT ENCODINGS
+# ---------------------------------------------------------
+def compact_json(obj) -> str:
+    """Minified JSON (no indentation or spaces after separators)."""
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+
+def records_table(records: list, columns: list = None):
+    """
+    Uniform dicts as a pipe table: (header, rows). Keys are written once in
+    the header instead of once per record.
+    """
+    if not records:
+        return "", []
+    columns = columns or list(records[0])
+    header = "|".join(columns)
+    rows = ["|".join(_cell(record.get(col)) for col in columns) for record in records]
+    return header, rows
+
+
+def _cell(value) -> str:
+    if isinstance(value, float):
+        return f"{value:g}"
+    return "" if value is None else str(value).replace("|", "/")
+
+
+def text_lines(text: str) -> list:
+    """Non-empty, stripped lines of free text (LLM summaries, bullet lists)."""
+    return [line.strip() for line in (text or "").splitlines() if line.strip()]
+
+
+# ---------------------------------------------------------
+# ASSEMBLY
+# ---------------------------------------------------------
+@dataclass
+class Section:
+    """
+    One block of dynamic evidence.
+
+    items are kept best-first; when the budget runs out the tail is dropped.
+    header (e.g. a table's column line) is emitted once if any item is kept.
+    Lower priority values are filled first.
+    """
+    title: str
+    items: list
+    priority: int = 0
+    header: str = ""
+
+
+@dataclass
+class AssembledPrompt:
+    node: str
+    messages: list
+    static_tokens: int
+    dynamic_tokens: int
+    budget: int
+    omitted: dict = field(default_factory=dict)  # section title -> items dropped
+
+    @property
+    def tokens(self) -> int:
+        return self.static_tokens + self.dynamic_tokens
+
+
+def _split(text: str):
+    """(open, parts, separator, close) of one item: JSON members, pipe-table cells or words."""
+    if text[:1] in "{[":
+        try:
+            value = json.loads(text)
+        except ValueError:
+            value = None
+        if isinstance(value, dict):
+            return "{", [f"{compact_json(key)}:{compact_json(item)}" for key, item in value.items()], ",", "}"
+        if isinstance(value, list):
+            return "[", [compact_json(item) for item in value], ",", "]"
+    if "|" in text:
+        return "", text.split("|"), "|", ""
+    return "", text.split(" "), " ", ""
+
+
+def _clip(text: str, max_tokens: int) -> str:
+    """
+    Longest prefix of a single oversized item within max_tokens, cut only
+    between whole JSON members, table cells or words (never inside a value).
+    """
+    opening, parts, separator, closing = _split(text)
+
+    def prefix(n):
+        return opening + separator.join(parts[:n]) + closing + " …"
+
+    lo, hi = 0, len(parts)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if count_tokens(prefix(mid)) <= max_tokens:
+            lo = mid
+        else:
+            hi = mid - 1
+    return prefix(lo) if lo else ""
+
+
+def assemble(node: str, static: str, sections: list, budget: int = None) -> AssembledPrompt:
+    """
+    Static instructions first (system message), then the sections that fit
+    the node's dynamic-token budget (user message), in declaration order.
+    """
+    budget = budget if budget is not None else NODE_TOKEN_BUDGETS.get(node, 2000)
+    remaining = budget
+    kept = {}
+    omitted = {}
+
+    for section in sorted(sections, key=lambda s: s.priority):
+        frame = f"{section.title}:\n" + (f"{section.header}\n" if section.header else "")
+        frame_cost = count_tokens(frame)
+        chosen = []
+
+        if section.items and frame_cost < remaining:
+            spent = frame_cost
+            for item in section.items:
+                cost = count_tokens(item + "\n")
+                if spent + cost > remaining:
+                    if not chosen:
+                        clipped = _clip(item, remaining - spent - 1)
+                        if clipped:
+                            chosen.append(clipped)
+                            spent += count_tokens(clipped + "\n")
+                    break
+                chosen.append(item)
+                spent += cost
+            if chosen:
+                remaining -= spent
+
+        kept[section.title] = (frame, chosen)
+        dropped = len(section.items) - len(chosen)
+        if dropped:
+            omitted[section.title] = dropped
+
+    blocks = []
+    for section in sections:
+        frame, chosen = kept[section.title]
+        if chosen:
+            block = frame + "\n".join(chosen)
+            if section.title in omitted:
+                block += f"\n(+{omitted[section.title]} lower-priority items omitted)"
+            blocks.append(block)
+    dynamic = "\n\n".join(blocks)
+
+    return AssembledPrompt(
+        node=node,
+        messages=[
+            {"role": "system", "content": static},
+            {"role": "user", "content": dynamic}
+        ],
+        static_tokens=count_tokens(static),
+        dynamic_tokens=count_tokens(dynamic),
+        budget=budget,
+        omitted=omitted
+    )
@@ -0,0 +1,145 @@
+# redemption_analytics.py
+#
+# Columnar coupon-redemption analytics for the customer insights node.
+#
+# Logs are integer-coded NumPy arrays (segment code, channel code, redeemed
+# flag). Each batch is folded into one (segment, channel, redeemed) count
+# cube with a single bincount over ravel_multi_index, in bounded slices, so
+# tens of millions of rows cost a few fixed-size passes and the state kept
+# between batches is 18 integers. Every metric (marginal shares, the
+# segment x channel joint distribution, redemption rates) is read off the
+# cube, and cubes from separate streams simply add up.
+
+import numpy as np
+import pandas as pd
+
+from signal_generator import CUSTOMER_SEGMENTS, REDEMPTION_CHANNELS
+
+# Rows per bincount pass (bounds the int64 index temporaries to ~32 MB)
+SLICE_ROWS = 1 << 22
+
+
+class RedemptionAnalytics:
+    """
+    Streaming segment x channel x redeemed counts.
+
+    Usage:
+        analytics = RedemptionAnalytics()
+        analytics.add_frame(generate_redemption_logs(10_000_000, seed=1))
+        analytics.add(segment_codes, channel_codes, redeemed)   # raw coded arrays
+        analytics.metrics()                                     # customer node metrics
+    """
+
+    def __init__(self, segments=CUSTOMER_SEGMENTS, channels=REDEMPTION_CHANNELS):
+        self.segments = list(segments)
+        self.channels = list(channels)
+        self.counts = np.zeros((len(self.segments), len(self.channels), 2), dtype=np.int64)
+
+    # ---------------------------------------------------
+    # UPDATES
+    # ---------------------------------------------------
+    def add(self, segment_codes, channel_codes, redeemed):
+        """Folds coded rows in; codes index self.segments / self.channels, -1 rows are skipped."""
+        segment_codes = np.asarray(segment_codes)
+        channel_codes = np.asarray(channel_codes)
+        redeemed = np.asarray(redeemed)
+        if not len(segment_codes) == len(channel_codes) == len(redeemed):
+            raise ValueError("segment, channel and redeemed arrays must have the same length")
+
+        for start in range(0, len(segment_codes), SLICE_ROWS):
+            codes = (
+                segment_codes[start:start + SLICE_ROWS].astype(np.int64),
+                channel_codes[start:start + SLICE_ROWS].astype(np.int64),
+                redeemed[start:start + SLICE_ROWS].astype(np.int64)
+            )
+            valid = (codes[0] >= 0) & (codes[1] >= 0)
+            if not valid.all():
+                codes = tuple(c[valid] for c in codes)
+            # ravel_multi_index raises on out-of-range codes
+            flat = np.ravel_multi_index(codes, self.counts.shape)
+            self.counts += np.bincount(flat, minlength=self.counts.size).reshape(self.counts.shape)
+        return self
+
+    def add_frame(self, df: pd.DataFrame):
+        """Folds a customer_type / channel / coupon_used frame in (labels outside the vocabularies are skipped)."""
+        return self.add(
+            _codes(df["customer_type"], self.segments),
+            _codes(df["channel"], self.channels),
+            df["coupon_used"].to_numpy(dtype=bool)
+        )
+
+    def merge(self, other: "RedemptionAnalytics"):
+        """Adds another stream's counts (same vocabularies)."""
+        if other.segments != self.segments or other.channels != self.channels:
+            raise ValueError("cannot merge analytics with different segment / channel vocabularies")
+        self.counts += other.counts
+        return self
+
+    # ---------------------------------------------------
+    # READS
+    # ---------------------------------------------------
+    @property
+    def total_logs(self) -> int:
+        return int(self.counts.sum())
+
+    @property
+    def total_redemptions(self) -> int:
+        return int(self.counts[..., 1].sum())
+
+    def crosstab(self, redeemed_only=True) -> pd.DataFrame:
+        """Segment x channel counts (redemptions, or all logs)."""
+        table = self.counts[..., 1] if redeemed_only else self.counts.sum(axis=2)
+        return pd.DataFrame(table, index=pd.Index(self.segments, name="customer_type"),
+                            columns=pd.Index(self.channels, name="channel"))
+
+    def metrics(self):
+        """
+        The customer node's metrics dict (None when nothing was redeemed):
+        total_redemptions, segment_share and channel_share as before, plus
+        segment_channel_share (joint share of redemptions) and redemption_rate
+        (redeemed / logged, overall, per segment and per channel). Only
+        observed labels are listed.
+        """
+        # Python ints: 18 counts are cheaper to reduce and round without NumPy scalars
+        redeemed = self.counts[..., 1].tolist()
+        logged = self.counts.sum(axis=2).tolist()
+        total = sum(map(sum, redeemed))
+        if total == 0:
+            return None
+
+        def shares(labels, counts, denominators=None):
+            # Shares list labels with redemptions; rates list every label that was logged
+            listed = counts if denominators is None else denominators
+            denominators = [total] * len(counts) if denominators is None else denominators
+            return {
+                label: round(count / denominator, 3)
+                for label, count, denominator, shown in zip(labels, counts, denominators, listed)
+                if shown
+            }
+
+        by_segment, logged_by_segment = [sum(row) for row in redeemed], [sum(row) for row in logged]
+        by_channel, logged_by_channel = [sum(col) for col in zip(*redeemed)], [sum(col) for col in zip(*logged)]
+        return {
+            "total_redemptions": total,
+            "segment_share": shares(self.segments, by_segment),
+            "channel_share": shares(self.channels, by_channel),
+            "segment_channel_share": {
+                segment: joint
+                for segment, row in zip(self.segments, redeemed)
+                if (joint := shares(self.channels, row))
+            },
+            "redemption_rate": {
+                "overall": round(total / sum(logged_by_segment), 3),
+                "by_segment": shares(self.segments, by_segment, logged_by_segment),
+                "by_channel": shares(self.channels, by_channel, logged_by_channel)
+            }
+        }
+
+
+def _codes(values: pd.Series, vocabulary) -> np.ndarray:
+    """Integer codes of values in vocabulary order (-1 = not in it); zero-copy for matching categoricals."""
+    dtype = values.dtype
+    if isinstance(dtype, pd.CategoricalDtype) and list(dtype.categories) == list(vocabulary):
+        # Categorical.codes directly: the .cat accessor costs more than a 100-row sample's counting
+        return values.array.codes
+    return pd.Index(vocabulary).get_indexer(values)
@@ -0,0 +1,323 @@
+# resilience.py
+#
+# Deadlines, retries and hedging for LLM calls.
+#
+# ResilientCaller wraps a raw `chat.completions` object per graph node:
+#   * every call gets a node deadline (tightened by a per-call `timeout`
+#     kwarg, e.g. the run's context deadline); each attempt's HTTP timeout is
+#     the time left, so one slow response can't hold a node past its budget,
+#   * transient failures (connection errors, timeouts, 408/409/429/5xx) are
+#     retried with full-jitter exponential backoff (Retry-After honoured),
+#     drawing on a shared retry budget so an outage doesn't multiply load,
+#   * on hedged nodes, a duplicate request is sent once the call has run
+#     longer than the node's observed p95 latency; the first success wins
+#     and the loser is abandoned (cancelled on the async path).
+#
+# It sits below llm_cache (cache hits never reach the gateway) and replaces
+# the SDK's own retries, so clients should be built with max_retries=0.
+
+import asyncio
+import random
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+
+TRANSIENT_STATUSES = frozenset({408, 409, 429, 500, 502, 503, 504})
+
+
+class DeadlineExceeded(TimeoutError):
+    """An LLM call (including its retries and hedges) ran past its node deadline."""
+
+
+@dataclass
+class CallPolicy:
+    deadline_seconds: float = 120.0
+    max_retries: int = 3
+    backoff_base: float = 0.5       # first retry waits up to this long (full jitter)
+    backoff_max: float = 8.0
+    hedge: bool = False
+    hedge_quantile: float = 0.95    # hedge once a call outlives this latency quantile
+    hedge_min_samples: int = 20     # no hedging until the quantile is meaningful
+    hedge_min_delay: float = 0.05
+
+
+def _is_transient(exc) -> bool:
+    import openai  # deferred: the resilient layer only runs once a client exists
+
+    if isinstance(exc, DeadlineExceeded):
+        return False
+    if isinstance(exc, (openai.APIConnectionError, asyncio.TimeoutError)):
+        return True
+    return getattr(exc, "status_code", None) in TRANSIENT_STATUSES
+
+
+def _retry_after(exc):
+    response = getattr(exc, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class ResilientCaller:
+    """
+    Per-node deadlines, retries and p95 hedging around chat completions.
+
+    Usage:
+        caller = ResilientCaller({"design": CallPolicy(deadline_seconds=60, hedge=True)})
+        completions = caller.wrap("design", client.chat.completions)
+        completions.create(...)
+
+    stats counts calls / retries / deadline_exceeded / hedges_fired / hedges_won
+    (plus per-node counters); snapshot() adds the current hedge delays.
+    """
+
+    def __init__(self, policies=None, default=None, window=200, retry_budget=10.0,
+                 retry_ratio=0.2, max_hedge_workers=32):
+        self.policies = dict(policies or {})
+        self.default = default or CallPolicy()
+        self.stats = Counter()
+        self._latencies = defaultdict(lambda: deque(maxlen=window))   # node -> recent successful call seconds
+        self._lock = threading.Lock()
+        # Each call earns retry_ratio retries, up to retry_budget banked
+        self._retry_cap = retry_budget
+        self._retry_tokens = retry_budget
+        self._retry_ratio = retry_ratio
+        self._max_hedge_workers = max_hedge_workers
+        self._pool = None
+
+    def policy(self, node) -> CallPolicy:
+        return self.policies.get(node, self.default)
+
+    # ---------------------------------------------------
+    # BOOKKEEPING
+    # ---------------------------------------------------
+    def _count(self, node, outcome):
+        with self._lock:
+            self.stats[outcome] += 1
+            self.stats[f"{node}.{outcome}"] += 1
+
+    def _record(self, node, seconds):
+        with self._lock:
+            self._latencies[node].append(seconds)
+
+    def hedge_delay(self, node):
+        """Seconds before a duplicate is sent (None = not hedging this node yet)."""
+        policy = self.policy(node)
+        with self._lock:
+            samples = sorted(self._latencies[node])
+        if not policy.hedge or len(samples) < policy.hedge_min_samples:
+            return None
+        index = min(len(samples) - 1, int(policy.hedge_quantile * len(samples)))
+        return max(policy.hedge_min_delay, samples[index])
+
+    def _take_retry(self, node):
+        with self._lock:
+            if self._retry_tokens < 1:
+                self.stats["retry_budget_exhausted"] += 1
+                return False
+            self._retry_tokens -= 1
+        self._count(node, "retries")
+        return True
+
+    def _start_call(self, node):
+        with self._lock:
+            self._retry_tokens = min(self._retry_cap, self._retry_tokens + self._retry_ratio)
+        self._count(node, "calls")
+
+    def _backoff(self, policy, attempt, exc):
+        pause = random.uniform(0, min(policy.backoff_max, policy.backoff_base * 2 ** attempt))
+        return max(pause, _retry_after(exc) or 0.0)
+
+    @staticmethod
+    def _budget(policy, kwargs):
+        """Seconds for the whole call: the node deadline, or a tighter per-call timeout."""
+        timeout = kwargs.pop("timeout", None)
+        return policy.deadline_seconds if timeout is None else min(policy.deadline_seconds, timeout)
+
+    def _deadline_exceeded(self, node, message):
+        self._count(node, "deadline_exceeded")
+        return DeadlineExceeded(f"{node}: {message}")
+
+    def _hedge_pool(self):
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(self._max_hedge_workers, thread_name_prefix="llm-hedge")
+        return self._pool
+
+    def snapshot(self) -> dict:
+        """Counters plus the current hedge delay of every node seen so far."""
+        with self._lock:
+            nodes = list(self._latencies)
+            stats = dict(self.stats)
+        stats["hedge_delay_seconds"] = {node: self.hedge_delay(node) for node in nodes}
+        return stats
+
+    # ---------------------------------------------------
+    # BLOCKING PATH
+    # ---------------------------------------------------
+    def call(self, node, create, kwargs):
+        """create(**kwargs) under the node's deadline, retry and hedge policy."""
+        policy = self.policy(node)
+        deadline = time.monotonic() + self._budget(policy, kwargs)
+        hedged = policy.hedge and not kwargs.get("stream")
+        self._start_call(node)
+
+        attempt = 0
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise self._deadline_exceeded(node, f"no time left for attempt {attempt + 1}")
+            start = time.monotonic()
+            try:
+                if hedged:
+                    response = self._hedged(node, create, kwargs, deadline)
+                else:
+                    response = create(**kwargs, timeout=remaining)
+            except Exception as exc:
+                if not _is_transient(exc):
+                    raise
+                pause = self._backoff(policy, attempt, exc)
+                if time.monotonic() + pause >= deadline:
+                    raise self._deadline_exceeded(node, "deadline exceeded while retrying") from exc
+                if attempt >= policy.max_retries or not self._take_retry(node):
+                    raise
+                time.sleep(pause)
+                attempt += 1
+                continue
+            if not kwargs.get("stream"):
+                self._record(node, time.monotonic() - start)
+            return response
+
+    def _hedged(self, node, create, kwargs, deadline):
+        delay = self.hedge_delay(node)
+        pool = self._hedge_pool()
+
+        def submit():
+            return pool.submit(lambda: create(**kwargs, timeout=max(0.001, deadline - time.monotonic())))
+
+        primary = submit()
+        remaining = deadline - time.monotonic()
+        if wait([primary], timeout=max(0.0, remaining if delay is None else min(delay, remaining))).done:
+            return primary.result()
+        if delay is None or time.monotonic() >= deadline:
+            raise self._deadline_exceeded(node, "no response within the deadline")
+
+        self._count(node, "hedges_fired")
+        roles = {primary: "primary", submit(): "hedge"}
+        pending, error = set(roles), None
+        while pending:
+            done, pending = wait(pending, timeout=max(0.0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+            if not done:
+                raise self._deadline_exceeded(node, "no response within the deadline")
+            for future in done:
+                if future.exception() is None:
+                    if roles[future] == "hedge":
+                        self._count(node, "hedges_won")
+                    for loser in pending:
+                        loser.cancel()   # a request already in flight finishes and is discarded
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    # ---------------------------------------------------
+    # ASYNC PATH
+    # ---------------------------------------------------
+    async def acall(self, node, create, kwargs):
+        """Async variant of call(); hedge losers are cancelled."""
+        policy = self.policy(node)
+        deadline = time.monotonic() + self._budget(policy, kwargs)
+        hedged = policy.hedge and not kwargs.get("stream")
+        self._start_call(node)
+
+        attempt = 0
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise self._deadline_exceeded(node, f"no time left for attempt {attempt + 1}")
+            start = time.monotonic()
+            try:
+                if hedged:
+                    response = await self._ahedged(node, create, kwargs, deadline)
+                else:
+                    response = await create(**kwargs, timeout=remaining)
+            except Exception as exc:
+                if not _is_transient(exc):
+                    raise
+                pause = self._backoff(policy, attempt, exc)
+                if time.monotonic() + pause >= deadline:
+                    raise self._deadline_exceeded(node, "deadline exceeded while retrying") from exc
+                if attempt >= policy.max_retries or not self._take_retry(node):
+                    raise
+                await asyncio.sleep(pause)
+                attempt += 1
+                continue
+            if not kwargs.get("stream"):
+                self._record(node, time.monotonic() - start)
+            return response
+
+    async def _ahedged(self, node, create, kwargs, deadline):
+        delay = self.hedge_delay(node)
+
+        def submit():
+            return asyncio.ensure_future(create(**kwargs, timeout=max(0.001, deadline - time.monotonic())))
+
+        roles = {submit(): "primary"}
+        try:
+            remaining = deadline - time.monotonic()
+            done, _ = await asyncio.wait(list(roles), timeout=max(0.0, remaining if delay is None else min(delay, remaining)))
+            if done:
+                return done.pop().result()
+            if delay is None or time.monotonic() >= deadline:
+                raise self._deadline_exceeded(node, "no response within the deadline")
+
+            self._count(node, "hedges_fired")
+            roles[submit()] = "hedge"
+            pending, error = set(roles), None
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, timeout=max(0.0, deadline - time.monotonic()), return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    raise self._deadline_exceeded(node, "no response within the deadline")
+                for task in done:
+                    if task.exception() is None:
+                        if roles[task] == "hedge":
+                            self._count(node, "hedges_won")
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in roles:
+                if not task.done():
+                    task.cancel()
+
+    # ---------------------------------------------------
+    # CLIENT WRAPPING
+    # ---------------------------------------------------
+    def wrap(self, node, completions):
+        """Blocking `chat.completions` stand-in for one node."""
+        return _ResilientCompletions(self, node, completions)
+
+    def wrap_async(self, node, completions):
+        """Async `chat.completions` stand-in for one node."""
+        return _AsyncResilientCompletions(self, node, completions)
+
+
+class _ResilientCompletions:
+    def __init__(self, caller, node, completions):
+        self._caller = caller
+        self._node = node
+        self._completions = completions
+
+    def create(self, **kwargs):
+        return self._caller.call(self._node, self._completions.create, kwargs)
+
+
+class _AsyncResilientCompletions(_ResilientCompletions):
+    async def create(self, **kwargs):
+        return await self._caller.acall(self._node, self._completions.create, kwargs)
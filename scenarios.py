@@ -0,0 +1,169 @@
+# scenarios.py
+#
+# Batch scenario mode: evaluates many wendys_active selections in one pass.
+#
+# Only the competitor gap filter depends on wendys_active, so signals are
+# generated and scored once, the shared branches (customer insights, market
+# context, trend narrative) run once, and the per-scenario threat tables come
+# from one SignalCube, scored once per distinct gap set. Scenarios
+# whose gap sets coincide share one design -> validate -> viz run; the
+# distinct runs execute in parallel.
+#
+# Usage:
+#   from scenarios import run_scenarios, scenario_table
+#   results = run_scenarios(signal_seed=7)          # all 32 combinations
+#   results[("4 for $4", "Biggie Bag")]["structured_concepts"]
+#   scenario_table(results)                          # one row per (scenario, offer)
+
+from concurrent.futures import ThreadPoolExecutor
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+import engine
+from frames import TableRef
+from signal_cube import SignalCube
+from signal_generator import generate_competitor_signals
+
+
+def scenario_combinations(options=None) -> list:
+    """Every subset of the promo options (2^n scenarios), as sorted tuples."""
+    options = sorted(options if options is not None else engine.PROMO_OPTIONS)
+    return [
+        combo
+        for size in range(len(options) + 1)
+        for combo in combinations(options, size)
+    ]
+
+
+def _competitor_signals(signal_seed=None) -> pd.DataFrame:
+    """Same draw as competitor_analyst_node."""
+    return generate_competitor_signals(
+        engine.TODAY,
+        size=engine.COMPETITOR_SAMPLE_SIZE,
+        seed=signal_seed
+    )
+
+
+def scenario_competitor_intel(df: pd.DataFrame, scenarios: list):
+    """
+    Per-scenario competitor_intel from one signal cube.
+
+    Returns (group_of, intel): group_of[i] indexes the distinct gap set of
+    scenarios[i]; intel[g] is the competitor_intel dict of that gap set,
+    scored by the same SignalCube call competitor_analyst_node makes, so it
+    is identical to what the node returns for any member.
+    """
+    # One pass over the rows: day-bucketed counts shared by every scenario
+    cube = SignalCube().add_competitor_batch(df)
+
+    # gap[s, m]: observed mechanic m is a gap (not active) in scenario s
+    mechanics = np.asarray(df["mechanic"].astype(object).unique())
+    active = np.array(
+        [np.isin(mechanics, list(scenario)) for scenario in scenarios],
+        dtype=bool
+    ).reshape(len(scenarios), len(mechanics))
+    gap_sets, group_of = np.unique(~active, axis=0, return_inverse=True)
+    group_of = group_of.ravel().tolist()
+
+    # Score each distinct gap set once, through one of its scenarios
+    members = {}
+    for scenario, group in zip(scenarios, group_of):
+        members.setdefault(group, list(scenario))
+
+    intel = []
+    for group in range(len(gap_sets)):
+        wendys_active = members[group]
+        intel.append({
+            **cube.competitor_intel(wendys_active, engine.TODAY),
+            "raw": TableRef.from_pandas(df[~df["mechanic"].isin(wendys_active)])
+        })
+
+    return group_of, intel
+
+
+def _shared_context(signal_seed, config):
+    """Customer and market branches, run once and in parallel for every scenario."""
+    tracer = engine.get_runtime().tracer
+    state = {"signal_seed": signal_seed}
+
+    def market_chain():
+        market = dict(state)
+        for name, fn in (
+            ("mkt_gen", engine.market_context_generator),
+            ("mkt_ctx", engine.market_context_analyst),
+            ("trend", engine.market_trends_narrator)
+        ):
+            market.update(tracer.wrap(name, fn)(market, config))
+        return market
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        cust = pool.submit(tracer.wrap("cust", engine.customer_analyst_node), state, config)
+        market = pool.submit(market_chain)
+        state.update(market.result())
+        state.update(cust.result())
+
+    return state
+
+
+def _design_chain(state, config):
+    tracer = engine.get_runtime().tracer
+    for name, fn in (
+        ("design", engine.offer_designer_node),
+        ("validate", engine.brand_validator_node),
+        ("viz", engine.visualization_node)
+    ):
+        state.update(tracer.wrap(name, fn)(state, config))
+    return state
+
+
+def run_scenarios(scenarios=None, options=None, signal_seed=None, max_workers=8, run_id=None) -> dict:
+    """
+    Evaluates every scenario (default: all combinations of the promo options).
+
+    Returns {scenario: final state}, keyed by the sorted wendys_active tuple.
+    Each state carries "scenario_group"; scenarios with the same group share
+    one design/validate run (and therefore the same offers). Node spans are
+    recorded on the runtime tracer under run_id.
+    """
+    if scenarios is None:
+        scenarios = scenario_combinations(options)
+    scenarios = [tuple(sorted(s)) for s in scenarios]
+    config = {"configurable": {"run_id": run_id or engine.get_runtime().tracer.new_run_id()}}
+
+    shared = _shared_context(signal_seed, config)
+
+    group_of, intel = scenario_competitor_intel(_competitor_signals(signal_seed), scenarios)
+
+    # One representative selection per distinct gap set
+    representatives = {}
+    for scenario, group in zip(scenarios, group_of):
+        representatives.setdefault(group, scenario)
+
+    def design(group):
+        state = dict(shared, wendys_active=list(representatives[group]), competitor_intel=intel[group])
+        return _design_chain(state, config)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(intel)))) as pool:
+        designed = dict(zip(range(len(intel)), pool.map(design, range(len(intel)))))
+
+    return {
+        scenario: dict(designed[group], wendys_active=list(scenario), scenario_group=group)
+        for scenario, group in zip(scenarios, group_of)
+    }
+
+
+def scenario_table(results: dict) -> pd.DataFrame:
+    """Prioritization tables of all scenarios stacked, one row per (scenario, offer)."""
+    frames = [
+        state["prioritization_table"].assign(
+            scenario=" + ".join(scenario) or "(none)",
+            scenario_group=state["scenario_group"]
+        )
+        for scenario, state in results.items()
+    ]
+    if not frames:
+        return pd.DataFrame()
+    table = pd.concat(frames, ignore_index=True)
+    return table[["scenario", "scenario_group"] + [c for c in table.columns if c not in ("scenario", "scenario_group")]]
@@ -0,0 +1,166 @@
+# scoring.py
+#
+# Vectorized scoring engines for the analytical nodes.
+#
+# Each engine is split in two layers:
+#   * an aggregate layer that works on pre-summed weights, and
+#   * a row layer that turns raw observations into those sums in one pass.
+# Keeping the layers apart lets any producer of decayed sums reuse the
+# exact same scoring and formatting rules.
+
+import numpy as np
+import pandas as pd
+
+# Recency decay constant: weight = exp(-RECENCY_DECAY * days_ago)
+RECENCY_DECAY = 0.05
+
+# Hard cap applied to every competitor threat score
+THREAT_SCORE_CAP = 10.0
+
+THREAT_COLUMNS = ["mechanic", "top_brand", "raw_score", "score", "trace_id"]
+
+
+# ---------------------------------------------------------
+# COMPETITOR THREATS
+# ---------------------------------------------------------
+def threats_from_aggregates(pair_weights: pd.Series, trace_ids: pd.Series) -> pd.DataFrame:
+    """
+    Builds the threats table from pre-aggregated weights.
+
+    pair_weights: decayed weight sums indexed by (mechanic, brand)
+    trace_ids:    strongest observation ID per mechanic
+    """
+    if pair_weights.empty:
+        return pd.DataFrame(columns=THREAT_COLUMNS)
+
+    by_mechanic = pair_weights.groupby(level=0, observed=True, sort=True)
+
+    raw_score = by_mechanic.sum()
+    # idxmax returns the (mechanic, brand) tuple of the leading brand
+    top_brand = by_mechanic.idxmax().map(lambda key: key[1])
+
+    table = pd.DataFrame({
+        "mechanic": raw_score.index.astype(object),
+        "top_brand": top_brand.to_numpy(dtype=object),
+        "raw_score": raw_score.to_numpy(),
+        "score": np.minimum(THREAT_SCORE_CAP, raw_score.to_numpy()).round(1),  # 🔒 NEVER > 10
+        "trace_id": trace_ids.reindex(raw_score.index).to_numpy(dtype=object)
+    })
+
+    return table
+
+
+def score_competitor_threats(gaps: pd.DataFrame):
+    """
+    Single-pass threat scoring over weighted gap observations.
+
+    Expects columns: id, brand, mechanic, weight.
+    Returns (threats_table, summary_text).
+    """
+    if gaps.empty:
+        return pd.DataFrame(columns=THREAT_COLUMNS), ""
+
+    # One multi-key aggregation for weight sums per (mechanic, brand)
+    pair_weights = gaps.groupby(["mechanic", "brand"], observed=True)["weight"].sum()
+
+    # Traceability: strongest observation per mechanic, no sorting
+    top_rows = gaps.groupby("mechanic", observed=True)["weight"].idxmax()
+    trace_ids = pd.Series(gaps.loc[top_rows.to_numpy(), "id"].to_numpy(), index=top_rows.index)
+
+    table = threats_from_aggregates(pair_weights, trace_ids)
+
+    return table, format_threat_summary(table)
+
+
+def format_threat_summary(table: pd.DataFrame) -> str:
+    """
+    Renders the threats table in the summary format consumed by the designer prompt.
+
+    Monte Carlo tables (raw_p05 / raw_p95 columns) also show the raw score interval,
+    since the capped score is often pinned at the cap.
+    """
+    intervals = {"raw_p05", "raw_p95"}.issubset(table.columns)
+    return "\n".join(
+        f"{row.mechanic} driven by {row.top_brand} "
+        f"(Threat: {row.score}/10"
+        + (f", raw {row.raw_score:.1f}, 90% interval {row.raw_p05}-{row.raw_p95}" if intervals else "")
+        + f") [Ref ID: {row.trace_id}]"
+        for row in table.itertuples(index=False)
+    )
+
+
+# ---------------------------------------------------------
+# MARKET CONTEXT WINDOWS
+# ---------------------------------------------------------
+# Default grouping dimensions; extend (e.g. "region", "store_format") as columns appear
+CONTEXT_DIMENSIONS = ["trend_type", "season", "daypart", "situation"]
+CONTEXT_TOP_K = 5
+
+# Output key per grouping column (kept compatible with the designer prompt)
+CONTEXT_LABELS = {"trend_type": "trend"}
+
+
+def windows_from_aggregates(agg: pd.DataFrame, k: int = CONTEXT_TOP_K) -> list:
+    """
+    Scores aggregated context groups and materializes only the top-K as dicts.
+
+    agg: indexed by the grouping dimensions, with columns
+         timing_strength (decayed weight sum) and ref_id (first row per group)
+    """
+    if agg.empty:
+        return []
+
+    strength = agg["timing_strength"].round(2)
+    max_strength = strength.max()
+
+    # Guardrail (prevents divide-by-zero)
+    if max_strength <= 0:
+        return []
+
+    scored = pd.DataFrame({
+        "timing_strength": strength,
+        "relevance_score": (strength / max_strength * 10).round(1),
+        "ref_id": agg["ref_id"]
+    })
+
+    # Top-K without sorting every group; ties keep aggregation order
+    top = scored.nlargest(k, "relevance_score", keep="first")
+
+    dims = list(agg.index.names)
+    windows = []
+    for keys, row in zip(top.index, top.itertuples(index=False)):
+        keys = keys if isinstance(keys, tuple) else (keys,)
+        window = {"signal_id": f"CTX-{row.ref_id}"}
+        window.update({CONTEXT_LABELS.get(dim, dim): key for dim, key in zip(dims, keys)})
+        window.update({
+            "timing_strength": float(row.timing_strength),
+            "relevance_score": float(row.relevance_score),
+            "confidence": round(min(1.0, row.timing_strength / (0.75 * max_strength)), 2),
+            "action": "Act Now" if row.relevance_score >= 7 else "Monitor"
+        })
+        windows.append(window)
+
+    return windows
+
+
+def score_context_windows(df: pd.DataFrame, dims=None, k: int = CONTEXT_TOP_K) -> list:
+    """
+    Vectorized context-window scoring over weighted market observations.
+
+    Expects the grouping columns plus a weight column. Only observed
+    combinations are aggregated, so extra dimensions grow the work with
+    the data, not with the cartesian product of categories.
+    """
+    dims = list(dims or CONTEXT_DIMENSIONS)
+
+    if df.empty:
+        return []
+
+    agg = (
+        df[dims + ["weight"]]
+        .assign(ref_id=df.index)
+        .groupby(dims, observed=True, sort=True)
+        .agg(timing_strength=("weight", "sum"), ref_id=("ref_id", "first"))
+    )
+
+    return windows_from_aggregates(agg, k=k)
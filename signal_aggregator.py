@@ -0,0 +1,304 @@
+# signal_aggregator.py
+#
+# Incremental, exponentially-decayed aggregation of competitor and market signals.
+#
+# exp(-λ·days_ago) factorizes over time: when the reference date moves forward
+# by Δ days every running sum is simply multiplied by exp(-λ·Δ). New
+# observations are folded in per (key, day) bucket, and per-day counts allow
+# exact eviction once a bucket falls outside its look-back window. A pipeline
+# run then reads these sums instead of rescanning raw rows.
+
+import math
+from collections import Counter, defaultdict
+
+import numpy as np
+import pandas as pd
+
+from scoring import (
+    CONTEXT_DIMENSIONS,
+    CONTEXT_TOP_K,
+    RECENCY_DECAY,
+    format_threat_summary,
+    threats_from_aggregates,
+    windows_from_aggregates
+)
+from signal_generator import COMPETITOR_WINDOW_DAYS, MARKET_WINDOW_DAYS
+
+_EPOCH = pd.Timestamp("1970-01-01")
+
+
+def _plain(value):
+    """NumPy scalars as Python scalars (msgpack-friendly)."""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _key_list(key) -> list:
+    return [_plain(part) for part in key]
+
+
+def _day_numbers(dates) -> np.ndarray:
+    """Day resolution integers (days since epoch) for a date-like column."""
+    return ((pd.to_datetime(dates) - _EPOCH) // pd.Timedelta(days=1)).to_numpy(dtype=np.int64)
+
+
+class _DecayedTable:
+    """Decayed weight sums per key, with per-day counts for exact window eviction."""
+
+    def __init__(self, decay_rate, window_days):
+        self.decay_rate = decay_rate
+        self.window_days = window_days
+        self.sums = {}                      # key -> decayed weight at the reference day
+        self.counts = Counter()             # key -> observations still in window
+        self.days = defaultdict(Counter)    # day -> {key: count}
+
+    def rescale(self, delta_days):
+        factor = math.exp(-self.decay_rate * delta_days)
+        for key in self.sums:
+            self.sums[key] *= factor
+
+    def evict(self, today):
+        """Drops every day bucket older than the window; returns the keys that emptied."""
+        emptied = []
+        for day in [d for d in self.days if today - d > self.window_days]:
+            weight = math.exp(-self.decay_rate * (today - day))
+            for key, count in self.days.pop(day).items():
+                self.counts[key] -= count
+                if self.counts[key] <= 0:
+                    # Drop the key entirely so float residue never lingers
+                    del self.counts[key]
+                    del self.sums[key]
+                    emptied.append(key)
+                else:
+                    self.sums[key] -= count * weight
+        return emptied
+
+    def add(self, today, buckets: pd.Series):
+        """Folds a (key..., day) -> count series into the running sums."""
+        for index, count in buckets.items():
+            *key, day = index
+            key = tuple(key)
+            count = int(count)
+            self.sums[key] = self.sums.get(key, 0.0) + count * math.exp(-self.decay_rate * (today - day))
+            self.counts[key] += count
+            self.days[day][key] += count
+
+    def to_state(self) -> dict:
+        return {
+            "decay_rate": self.decay_rate,
+            "window_days": self.window_days,
+            "sums": [[_key_list(key), float(weight)] for key, weight in self.sums.items()],
+            "counts": [[_key_list(key), int(count)] for key, count in self.counts.items()],
+            "days": [[int(day), [[_key_list(key), int(count)] for key, count in keys.items()]]
+                     for day, keys in self.days.items()]
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        table = cls(state["decay_rate"], state["window_days"])
+        table.sums = {tuple(key): weight for key, weight in state["sums"]}
+        table.counts = Counter({tuple(key): count for key, count in state["counts"]})
+        for day, keys in state["days"]:
+            table.days[day] = Counter({tuple(key): count for key, count in keys})
+        return table
+
+
+class DecayedSignalAggregator:
+    """
+    Streaming aggregator holding decayed weight sums per (mechanic, brand)
+    and per context-window key, relative to a moving reference date.
+
+    Batches are append-only DataFrames shaped like the generator output:
+      competitor: id, brand, mechanic, obs_date
+      market:     trend_type, season, daypart, situation, source, observed_date
+    """
+
+    def __init__(
+        self,
+        as_of,
+        decay_rate=RECENCY_DECAY,
+        competitor_window_days=COMPETITOR_WINDOW_DAYS,
+        market_window_days=MARKET_WINDOW_DAYS,
+        context_dims=None
+    ):
+        self.decay_rate = decay_rate
+        self.context_dims = list(context_dims or CONTEXT_DIMENSIONS)
+        self.today = int(_day_numbers(pd.Series([as_of]))[0])
+
+        self._pairs = _DecayedTable(decay_rate, competitor_window_days)
+        self._contexts = _DecayedTable(decay_rate, market_window_days)
+
+        self._trace = {}          # mechanic -> (day, id) of the strongest observation
+        self._context_refs = {}   # context key -> first in-window row number
+        self._context_firsts = defaultdict(dict)   # day -> {context key: first row number that day}
+        self._market_rows = 0     # running row counter (traceability IDs)
+        self._categories = {}     # column -> category order from the first categorical batch
+
+    # ---------------------------------------------------
+    # TIME
+    # ---------------------------------------------------
+    @property
+    def as_of(self):
+        return (_EPOCH + pd.Timedelta(days=self.today)).date()
+
+    def advance(self, as_of):
+        """Moves the reference date forward: O(keys) rescale + window eviction."""
+        today = int(_day_numbers(pd.Series([as_of]))[0])
+        if today < self.today:
+            raise ValueError(f"Aggregator cannot move back in time ({as_of} < {self.as_of})")
+        if today == self.today:
+            return
+
+        delta = today - self.today
+        self.today = today
+        self._pairs.rescale(delta)
+        self._contexts.rescale(delta)
+
+        for mech, brand in self._pairs.evict(today):
+            if not any(key[0] == mech for key in self._pairs.counts):
+                self._trace.pop(mech, None)
+        self._contexts.evict(today)
+        self._evict_context_refs()
+
+    def _evict_context_refs(self):
+        """Re-points keys whose first row aged out at their first row still in the window."""
+        stale = set()
+        for day in [d for d in self._context_firsts if self.today - d > self._contexts.window_days]:
+            stale.update(self._context_firsts.pop(day))
+        for key in stale:
+            rows = [firsts[key] for firsts in self._context_firsts.values() if key in firsts]
+            if rows:
+                self._context_refs[key] = min(rows)
+            else:
+                self._context_refs.pop(key, None)
+
+    # ---------------------------------------------------
+    # PERSISTENCE (plain lists / numbers / strings, e.g. for checkpoints)
+    # ---------------------------------------------------
+    def to_state(self) -> dict:
+        """Snapshot of the running sums; DecayedSignalAggregator.from_state rebuilds it exactly."""
+        return {
+            "decay_rate": self.decay_rate,
+            "context_dims": list(self.context_dims),
+            "today": self.today,
+            "pairs": self._pairs.to_state(),
+            "contexts": self._contexts.to_state(),
+            "trace": [[_plain(mech), int(day), _plain(obs_id)] for mech, (day, obs_id) in self._trace.items()],
+            "context_refs": [[_key_list(key), int(row)] for key, row in self._context_refs.items()],
+            "context_firsts": [[int(day), [[_key_list(key), int(row)] for key, row in firsts.items()]]
+                               for day, firsts in self._context_firsts.items()],
+            "market_rows": self._market_rows,
+            "categories": {col: _key_list(cats) for col, cats in self._categories.items()}
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        aggregator = cls.__new__(cls)
+        aggregator.decay_rate = state["decay_rate"]
+        aggregator.context_dims = list(state["context_dims"])
+        aggregator.today = state["today"]
+        aggregator._pairs = _DecayedTable.from_state(state["pairs"])
+        aggregator._contexts = _DecayedTable.from_state(state["contexts"])
+        aggregator._trace = {mech: (day, obs_id) for mech, day, obs_id in state["trace"]}
+        aggregator._context_refs = {tuple(key): row for key, row in state["context_refs"]}
+        aggregator._context_firsts = defaultdict(dict)
+        for day, firsts in state["context_firsts"]:
+            aggregator._context_firsts[day] = {tuple(key): row for key, row in firsts}
+        aggregator._market_rows = state["market_rows"]
+        aggregator._categories = {col: list(cats) for col, cats in state["categories"].items()}
+        return aggregator
+
+    # ---------------------------------------------------
+    # INGESTION
+    # ---------------------------------------------------
+    def _remember_categories(self, df, columns):
+        for col in columns:
+            if col not in self._categories and isinstance(df[col].dtype, pd.CategoricalDtype):
+                self._categories[col] = list(df[col].cat.categories)
+
+    def _in_window(self, df, date_col, window_days):
+        days = _day_numbers(df[date_col])
+        if len(days) and days.max() > self.today:
+            self.advance((_EPOCH + pd.Timedelta(days=int(days.max()))).date())
+        keep = (self.today - days) <= window_days
+        return df.assign(_day=days)[keep]
+
+    def add_competitor_batch(self, df: pd.DataFrame):
+        """Folds competitor observations into the (mechanic, brand) sums."""
+        self._remember_categories(df, ["mechanic", "brand"])
+        df = self._in_window(df.reset_index(drop=True), "obs_date", self._pairs.window_days)
+        if df.empty:
+            return
+
+        buckets = df.groupby(["mechanic", "brand", "_day"], observed=True).size()
+        self._pairs.add(self.today, buckets[buckets > 0])
+
+        # Strongest observation per mechanic = most recent day, first seen wins ties
+        newest = df.groupby("mechanic", observed=True)["_day"].idxmax()
+        for mech, row in newest.items():
+            day, obs_id = int(df.at[row, "_day"]), df.at[row, "id"]
+            if mech not in self._trace or day > self._trace[mech][0]:
+                self._trace[mech] = (day, obs_id)
+
+    def add_market_batch(self, df: pd.DataFrame):
+        """Folds market observations into the context-window sums."""
+        dims = self.context_dims
+        self._remember_categories(df, dims)
+
+        df = df.reset_index(drop=True)
+        df.index += self._market_rows
+        self._market_rows += len(df)
+
+        df = self._in_window(df, "observed_date", self._contexts.window_days)
+        if df.empty:
+            return
+
+        buckets = df.groupby(dims + ["_day"], observed=True).size()
+        self._contexts.add(self.today, buckets[buckets > 0])
+
+        # First row per (key, day), so a key's reference can move on when its first day ages out;
+        # row numbers only grow across batches, so earlier entries always win
+        first_rows = df[dims + ["_day"]].assign(_row=df.index).groupby(dims + ["_day"], observed=True)["_row"].min()
+        batch_refs = {}
+        for (*key, day), row in first_rows.items():
+            key, row = tuple(key), int(row)
+            self._context_firsts[int(day)].setdefault(key, row)
+            batch_refs[key] = min(row, batch_refs.get(key, row))
+        for key, row in batch_refs.items():
+            self._context_refs.setdefault(key, row)
+
+    # ---------------------------------------------------
+    # OUTPUTS (same shapes the analytical nodes return)
+    # ---------------------------------------------------
+    def _keyed_series(self, sums, columns):
+        """Sums as a Series whose index sorts like a categorical groupby would."""
+        keys = pd.DataFrame(list(sums.keys()), columns=columns)
+        for col in columns:
+            if col in self._categories:
+                known = self._categories[col]
+                unseen = sorted(set(keys[col]) - set(known))
+                keys[col] = pd.Categorical(keys[col], categories=known + unseen)
+        series = pd.Series(list(sums.values()), index=pd.MultiIndex.from_frame(keys))
+        return series.sort_index()
+
+    def competitor_intel(self, wendys_active):
+        """Threat table + summary over mechanics Wendy's is NOT active in."""
+        pairs = {key: w for key, w in self._pairs.sums.items() if key[0] not in set(wendys_active)}
+        if not pairs:
+            return {"summary": "", "threats": threats_from_aggregates(pd.Series(dtype=float), None)}
+
+        pair_weights = self._keyed_series(pairs, ["mechanic", "brand"])
+        trace_ids = pd.Series({mech: obs_id for mech, (_, obs_id) in self._trace.items()})
+        table = threats_from_aggregates(pair_weights, trace_ids)
+
+        return {"summary": format_threat_summary(table), "threats": table}
+
+    def market_context_windows(self, k=CONTEXT_TOP_K):
+        """Top-K scored context windows from the decayed sums."""
+        if not self._contexts.sums:
+            return []
+
+        strength = self._keyed_series(self._contexts.sums, self.context_dims)
+        refs = [self._context_refs[tuple(key)] for key in strength.index]
+        agg = pd.DataFrame({"timing_strength": strength, "ref_id": refs}, index=strength.index)
+
+        return windows_from_aggregates(agg, k=k)
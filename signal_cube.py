@@ -0,0 +1,279 @@
+# signal_cube.py
+#
+# Day-bucketed signal cube: re-scoring at any date, decay rate or window.
+#
+# Observations only have day resolution, so every row sharing a key and a
+# day shares one recency weight. The cube keeps observation counts as dense
+# NumPy arrays over
+#   competitor: (mechanic, brand, day)
+#   market:     (trend_type, season, daypart, situation, day)
+# and scoring is one matrix-vector product of the (keys x days) counts with
+# a decay kernel over the day axis:
+#   weight[key] = sum_day counts[key, day] * exp(-decay * (today - day))
+# where days after `today` or older than the look-back window get a zero
+# kernel entry. A new reference date, decay constant or window only rebuilds
+# the kernel (one entry per day), so re-scoring costs microseconds, and a
+# (days x decays) kernel matrix scores a whole what-if sweep in one matmul.
+#
+# The first row seen per (key, day) is kept alongside the counts, so trace
+# and signal IDs point at the same observations the row-level scorers pick.
+# Unlike DecayedSignalAggregator nothing is ever evicted or rescaled: the
+# cube answers for any reference date, at the cost of one cell per day.
+
+import numpy as np
+import pandas as pd
+
+from scoring import (
+    CONTEXT_DIMENSIONS,
+    CONTEXT_TOP_K,
+    RECENCY_DECAY,
+    format_threat_summary,
+    threats_from_aggregates,
+    windows_from_aggregates
+)
+from signal_generator import COMPETITOR_WINDOW_DAYS, MARKET_WINDOW_DAYS
+
+# first_row value of a (key, day) cell that holds no observation
+_NO_ROW = np.iinfo(np.int64).max
+
+
+def _day_numbers(dates) -> np.ndarray:
+    """Days since the epoch for a date-like column (a datetime64[D] cast, no Timedelta arithmetic)."""
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = pd.to_datetime(dates)
+    return dates.to_numpy(dtype="datetime64[D]").astype(np.int64)
+
+
+def _day_number(value) -> int:
+    """Days since the epoch of a single date (kept off pandas' Series path: it dominates a re-score)."""
+    return int(np.datetime64(pd.Timestamp(value).date(), "D").astype(np.int64))
+
+
+def _codes(values: pd.Series, categories) -> np.ndarray:
+    """Integer codes in the cube's category order; zero-copy for matching categoricals."""
+    if isinstance(values.dtype, pd.CategoricalDtype) and tuple(values.cat.categories) == categories:
+        codes = values.cat.codes.to_numpy()
+    else:
+        codes = pd.Categorical(values, categories=categories).codes
+    if len(codes) and codes.min() < 0:
+        unknown = sorted(set(values[codes < 0].astype(str)))
+        raise ValueError(f"{values.name} labels {unknown} are not in the cube's categories")
+    return codes.astype(np.int64)
+
+
+class _DayCube:
+    """Counts and first-row references over (key..., day), with a day axis that grows as dates arrive."""
+
+    def __init__(self, categories, window_days):
+        self.categories = tuple(tuple(c) for c in categories)
+        self.key_shape = tuple(len(c) for c in self.categories)
+        self.window_days = window_days
+        self.first_day = 0
+        self.counts = np.zeros(self.key_shape + (0,), dtype=np.int64)
+        self.first_row = np.full(self.key_shape + (0,), _NO_ROW, dtype=np.int64)
+
+    @property
+    def days(self) -> np.ndarray:
+        return self.first_day + np.arange(self.counts.shape[-1])
+
+    def _cover(self, low, high):
+        """Pads the day axis so it spans [low, high]."""
+        if self.counts.shape[-1] == 0:
+            self.first_day = low
+        before = max(0, self.first_day - low)
+        after = max(0, high - (self.first_day + self.counts.shape[-1] - 1))
+        if before or after:
+            pad = [(0, 0)] * len(self.key_shape) + [(before, after)]
+            self.counts = np.pad(self.counts, pad)
+            self.first_row = np.pad(self.first_row, pad, constant_values=_NO_ROW)
+            self.first_day -= before
+
+    def add(self, codes, days, rows):
+        """Folds coded rows in: one bincount for the counts, one minimum.at for the first rows."""
+        self._cover(int(days.min()), int(days.max()))
+        cells = np.ravel_multi_index(tuple(codes) + (days - self.first_day,), self.counts.shape)
+        self.counts += np.bincount(cells, minlength=self.counts.size).reshape(self.counts.shape)
+        np.minimum.at(self.first_row.reshape(-1), cells, rows)
+
+    def live_days(self, today, window_days) -> np.ndarray:
+        """Mask of the days inside [today - window, today]."""
+        ages = today - self.days
+        return (ages >= 0) & (ages <= (self.window_days if window_days is None else window_days))
+
+    def kernel(self, today, decay, window_days=None) -> np.ndarray:
+        """Decay kernel: (days,) for a scalar decay, (days, len(decay)) for a sweep."""
+        ages = (today - self.days).astype(np.float64)
+        kernel = np.exp(-np.multiply.outer(ages, np.asarray(decay, dtype=np.float64)))
+        kernel[~self.live_days(today, window_days)] = 0.0
+        return kernel
+
+    def weights(self, today, decay, window_days=None) -> np.ndarray:
+        """Decayed weight per key: key_shape, plus a trailing decay axis for a sweep."""
+        kernel = self.kernel(today, decay, window_days)
+        flat = self.counts.reshape(-1, self.counts.shape[-1]) @ kernel
+        return flat.reshape(self.key_shape + kernel.shape[1:])
+
+    def first_rows(self, today, window_days=None) -> np.ndarray:
+        """First row per (key, day) with days outside the window blanked out."""
+        return np.where(self.live_days(today, window_days), self.first_row, _NO_ROW)
+
+
+class SignalCube:
+    """
+    Dense (key, day) counts of competitor and market signals, scored for
+    any reference date by a decay-kernel product.
+
+    Batches are append-only DataFrames shaped like the generator output:
+      competitor: id, brand, mechanic, obs_date
+      market:     trend_type, season, daypart, situation, source, observed_date
+    Category orders come from the first batch (categoricals keep theirs,
+    other columns are sorted); later batches must stay within them.
+
+    Usage:
+        cube = SignalCube().add_competitor_batch(competitor_df).add_market_batch(market_df)
+        cube.competitor_intel(wendys_active, today)                  # competitor_analyst_node shape
+        cube.market_context_windows(today, decay=0.1, window_days=30)
+        cube.context_weights(today, decay=np.linspace(0.01, 0.2, 50))   # decay sweep in one matmul
+    """
+
+    def __init__(
+        self,
+        decay_rate=RECENCY_DECAY,
+        competitor_window_days=COMPETITOR_WINDOW_DAYS,
+        market_window_days=MARKET_WINDOW_DAYS,
+        context_dims=None
+    ):
+        self.decay_rate = decay_rate
+        self.context_dims = list(context_dims or CONTEXT_DIMENSIONS)
+        self._windows = {"competitor": competitor_window_days, "market": market_window_days}
+
+        self._pairs = None        # _DayCube over (mechanic, brand, day)
+        self._contexts = None     # _DayCube over (*context_dims, day)
+        self._ids = {}            # competitor row -> id, kept only for first rows of a cell
+        self._competitor_rows = 0
+        self._market_rows = 0     # running row counter (traceability IDs)
+
+    # ---------------------------------------------------
+    # INGESTION
+    # ---------------------------------------------------
+    @staticmethod
+    def _new_cube(df, columns, window_days):
+        return _DayCube([
+            df[col].cat.categories if isinstance(df[col].dtype, pd.CategoricalDtype) else sorted(df[col].unique())
+            for col in columns
+        ], window_days)
+
+    def add_competitor_batch(self, df: pd.DataFrame):
+        """Folds competitor observations into the (mechanic, brand, day) counts."""
+        if df.empty:
+            return self
+        if self._pairs is None:
+            self._pairs = self._new_cube(df, ["mechanic", "brand"], self._windows["competitor"])
+        cube = self._pairs
+
+        start = self._competitor_rows
+        self._competitor_rows += len(df)
+        codes = [_codes(df[col], cats) for col, cats in zip(["mechanic", "brand"], cube.categories)]
+        cube.add(codes, _day_numbers(df["obs_date"]), np.arange(start, self._competitor_rows, dtype=np.int64))
+
+        # Trace IDs can only ever come from a cell's first row: keep just those
+        firsts = np.unique(cube.first_row[cube.first_row != _NO_ROW])
+        new = firsts[firsts >= start]
+        self._ids.update(zip(new.tolist(), df["id"].iloc[new - start].tolist()))
+        self._ids = {row: self._ids[row] for row in firsts.tolist()}
+        return self
+
+    def add_market_batch(self, df: pd.DataFrame):
+        """Folds market observations into the (context key, day) counts."""
+        if df.empty:
+            return self
+        if self._contexts is None:
+            self._contexts = self._new_cube(df, self.context_dims, self._windows["market"])
+        cube = self._contexts
+
+        start = self._market_rows
+        self._market_rows += len(df)
+        codes = [_codes(df[col], cats) for col, cats in zip(self.context_dims, cube.categories)]
+        cube.add(codes, _day_numbers(df["observed_date"]), np.arange(start, self._market_rows, dtype=np.int64))
+        return self
+
+    @classmethod
+    def from_frames(cls, competitor=None, market=None, **kwargs) -> "SignalCube":
+        cube = cls(**kwargs)
+        if competitor is not None:
+            cube.add_competitor_batch(competitor)
+        if market is not None:
+            cube.add_market_batch(market)
+        return cube
+
+    # ---------------------------------------------------
+    # RAW WEIGHTS (dense; an array of decays adds a sweep axis)
+    # ---------------------------------------------------
+    def pair_weights(self, today, decay=None, window_days=None) -> np.ndarray:
+        """Decayed weight per (mechanic, brand) [, decay]."""
+        return self._pairs.weights(_day_number(today), self._decay(decay), window_days)
+
+    def context_weights(self, today, decay=None, window_days=None) -> np.ndarray:
+        """Decayed timing strength per context cell (*context_dims) [, decay]."""
+        return self._contexts.weights(_day_number(today), self._decay(decay), window_days)
+
+    def _decay(self, decay):
+        return self.decay_rate if decay is None else decay
+
+    # ---------------------------------------------------
+    # OUTPUTS (same shapes the analytical nodes return)
+    # ---------------------------------------------------
+    def competitor_intel(self, wendys_active, today, decay=None, window_days=None):
+        """Threat table + summary over mechanics Wendy's is NOT active in."""
+        cube = self._pairs
+        empty = {"summary": "", "threats": threats_from_aggregates(pd.Series(dtype=float), None)}
+        if cube is None:
+            return empty
+
+        today = _day_number(today)
+        first_rows = cube.first_rows(today, window_days)          # (mechanic, brand, day)
+        mechanics, brands = cube.categories
+        gaps = np.array([mech not in set(wendys_active) for mech in mechanics])
+        observed = (first_rows != _NO_ROW).any(axis=-1) & gaps[:, None]
+        if not observed.any():
+            return empty
+
+        weights = cube.weights(today, self._decay(decay), window_days)
+        m_idx, b_idx = np.nonzero(observed)
+        index = pd.MultiIndex.from_arrays([
+            pd.Categorical.from_codes(m_idx, categories=mechanics),
+            pd.Categorical.from_codes(b_idx, categories=brands)
+        ], names=["mechanic", "brand"])
+        pair_weights = pd.Series(weights[m_idx, b_idx], index=index)
+
+        # Strongest observation per mechanic = most recent live day, first row wins ties
+        by_day = first_rows.min(axis=1)                           # (mechanic, day)
+        newest = by_day.shape[1] - 1 - np.argmax((by_day != _NO_ROW)[:, ::-1], axis=1)
+        trace_ids = pd.Series({
+            mechanics[m]: self._ids[int(by_day[m, newest[m]])] for m in np.unique(m_idx)
+        })
+
+        table = threats_from_aggregates(pair_weights, trace_ids)
+        return {"summary": format_threat_summary(table), "threats": table}
+
+    def market_context_windows(self, today, decay=None, window_days=None, k=CONTEXT_TOP_K):
+        """Top-K scored context windows."""
+        cube = self._contexts
+        if cube is None:
+            return []
+
+        today = _day_number(today)
+        refs = cube.first_rows(today, window_days).min(axis=-1).reshape(-1)
+        cells = np.flatnonzero(refs != _NO_ROW)   # observed combinations, in category order
+        if not len(cells):
+            return []
+
+        strength = cube.weights(today, self._decay(decay), window_days).reshape(-1)
+        keys = np.unravel_index(cells, cube.key_shape)
+        index = pd.MultiIndex.from_arrays(
+            [pd.Categorical.from_codes(codes, categories=cats) for codes, cats in zip(keys, cube.categories)],
+            names=self.context_dims
+        )
+        agg = pd.DataFrame({"timing_strength": strength[cells], "ref_id": refs[cells]}, index=index)
+
+        return windows_from_aggregates(agg, k=k)
@@ -0,0 +1,109 @@
+# signal_generator.py
+#
+# Batched, seedable synthetic signal generation.
+#
+# Replaces the per-row Faker loops in engine.py: every column is drawn as a
+# NumPy array from ONE seeded numpy.random.Generator and the DataFrame is
+# assembled in a single step with categorical dtypes. The same seed always
+# yields the same frame, and millions of rows cost milliseconds, not minutes.
+# Each generator draws from its own child stream of the seed (SeedSequence
+# spawn key), so competitor, market and redemption rows sharing one
+# signal_seed are independent rather than built from the same bit stream.
+
+import numpy as np
+import pandas as pd
+
+# ---------------------------------------------------------
+# VOCABULARIES (category order is part of the output contract)
+# ---------------------------------------------------------
+COMPETITOR_BRANDS = ["McDonald's", "Burger King", "Taco Bell"]
+COMPETITOR_MECHANICS = ["BOGO", "Gamified App Challenge", "Loyalty Multiplier"]
+
+TREND_TYPES = [
+    "Gamified Rewards",
+    "Subscription Meal Bundles",
+    "Surprise & Delight",
+    "Late-Night Value",
+    "App-Exclusive Perks"
+]
+SEASONS = ["Winter", "Spring", "Summer", "Fall"]
+DAYPARTS = ["Breakfast", "Lunch", "Dinner", "Late Night"]
+SITUATIONS = ["Cold Weather", "Payday", "Commute", "Weekend"]
+SOURCES = ["Reddit", "TikTok", "Press", "Food Blogs"]
+
+CUSTOMER_SEGMENTS = ["Loyalty Member", "Guest", "First-Timer"]
+REDEMPTION_CHANNELS = ["Mobile App", "Drive-Thru", "In-Store"]
+
+# Look-back windows (days, inclusive of TODAY)
+COMPETITOR_WINDOW_DAYS = 60
+MARKET_WINDOW_DAYS = 120
+
+# Lookup table used to hex-encode random bytes without a Python loop
+_HEX_BYTES = np.array([f"{i:02x}" for i in range(256)])
+
+# Child stream per generator (SeedSequence spawn key)
+_COMPETITOR_STREAM, _MARKET_STREAM, _REDEMPTION_STREAM = range(3)
+
+
+def _rng(seed, stream):
+    """Generator for one stream of seed: SeedSequence(seed).spawn(3)[stream], without spawning."""
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(stream,)))
+
+
+def _categorical(rng, categories, size):
+    """Draws uniform category codes and wraps them without materializing strings."""
+    codes = rng.integers(0, len(categories), size=size, dtype=np.int8)
+    return pd.Categorical.from_codes(codes, categories=categories)
+
+
+def _dates(rng, today, window_days, size):
+    """Uniform day-resolution dates in [today - window_days, today]."""
+    days_ago = rng.integers(0, window_days + 1, size=size)
+    return pd.Timestamp(today) - pd.to_timedelta(days_ago, unit="D")
+
+
+def _short_ids(rng, size):
+    """8-char hex trace IDs (same shape as fake.uuid4()[:8])."""
+    raw = rng.integers(0, 256, size=(size, 4), dtype=np.uint8)
+    hexed = _HEX_BYTES[raw]
+    ids = hexed[:, 0]
+    for col in range(1, 4):
+        ids = np.char.add(ids, hexed[:, col])
+    return ids.astype(object)
+
+
+def generate_competitor_signals(today, size=500, seed=None):
+    """Competitor observations: id, brand, mechanic, obs_date."""
+    rng = _rng(seed, _COMPETITOR_STREAM)
+
+    return pd.DataFrame({
+        "id": _short_ids(rng, size),
+        "brand": _categorical(rng, COMPETITOR_BRANDS, size),
+        "mechanic": _categorical(rng, COMPETITOR_MECHANICS, size),
+        "obs_date": _dates(rng, today, COMPETITOR_WINDOW_DAYS, size)
+    })
+
+
+def generate_market_signals(today, size=900, seed=None):
+    """Market context observations: trend_type, season, daypart, situation, source, observed_date."""
+    rng = _rng(seed, _MARKET_STREAM)
+
+    return pd.DataFrame({
+        "trend_type": _categorical(rng, TREND_TYPES, size),
+        "season": _categorical(rng, SEASONS, size),
+        "daypart": _categorical(rng, DAYPARTS, size),
+        "situation": _categorical(rng, SITUATIONS, size),
+        "source": _categorical(rng, SOURCES, size),
+        "observed_date": _dates(rng, today, MARKET_WINDOW_DAYS, size)
+    })
+
+
+def generate_redemption_logs(size=100, seed=None):
+    """Coupon redemption logs: customer_type, channel, coupon_used."""
+    rng = _rng(seed, _REDEMPTION_STREAM)
+
+    return pd.DataFrame({
+        "customer_type": _categorical(rng, CUSTOMER_SEGMENTS, size),
+        "channel": _categorical(rng, REDEMPTION_CHANNELS, size),
+        "coupon_used": rng.integers(0, 2, size=size, dtype=np.int8).astype(bool)
+    })
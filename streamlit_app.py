@@ -2,7 +2,58 @@
 
 import streamlit as st
 import pandas as pd
-from engine import app  
+import altair as alt
+from engine import MONTE_CARLO_REPLICAS, PROMO_OPTIONS, EngineConfig, build_app, configure, resume_input
+from checkpointing import pending_nodes, run_config
+from coordinator import QueueFull, run_key
+
+
+@st.cache_resource
+def load_runtime():
+    """
+    Installs the process-wide runtime once: every design mode shares its LLM
+    clients, admission control, rate limits, tracer and memo.
+    """
+    return configure(EngineConfig.from_env())
+
+
+@st.cache_resource
+def load_engine(structured_design=False, fanout_design=False):
+    """
+    Compiles the graph once per process and design mode against the shared
+    runtime; LLM clients are built on first use. Nodes whose inputs did not
+    change since an earlier run are replayed, and every superstep is
+    checkpointed so a failed run can be resumed.
+    """
+    load_runtime()
+    return build_app(
+        incremental=True,
+        checkpoint=True,
+        structured_design=structured_design,
+        fanout_design=fanout_design
+    )
+
+
+def render_offers(container, offers):
+    """Offer cards from the structured report (Brand Validator, structured designer or fan-out merge)."""
+    for offer in offers:
+        with container.container(border=True):
+            st.subheader(offer["name"])
+            st.write(offer["witty_rationale"])
+
+            cols = st.columns(4)
+            cols[0].metric("Type", offer["type"])
+            cols[1].metric("Feasibility", offer["feasibility"])
+            cols[2].metric("Impact", offer["impact"])
+            cols[3].metric(
+                "Confidence",
+                round((offer["impact"] + offer["feasibility"]) / 20, 2)
+            )
+
+            st.caption(
+                f"Evidence Signals: {', '.join(offer['evidence_signals'])}"
+            )
+
 
 st.set_page_config(
     page_title="Wendy’s Signal-to-Offer Engine",
@@ -26,64 +77,87 @@ st.subheader("1️⃣ Configure Current Wendy’s Context")
 
 wendys_active = st.multiselect(
     "Select currently active Wendy’s offers:",
-    options=[
-        "Biggie Bag",
-        "4 for $4",
-        "Breakfast Combo",
-        "Frosty Promo",
-        "Rewards Multiplier"
-    ],
+    options=PROMO_OPTIONS,
     default=["Biggie Bag", "4 for $4"]
 )
 
+fanout_design = st.toggle(
+    "🧩 Fan-out design",
+    help="One designer call per top context window x strategy (with competitor gaps dealt to the "
+         "defensive calls), run in parallel and brand-validated in batches: dozens of candidates per run."
+)
+
+structured_design = st.toggle(
+    "⚡ Single-hop structured design",
+    disabled=fanout_design,
+    help="The designer returns the final JSON report directly (checked locally, "
+         "repaired only if invalid) instead of a separate brand-validation call."
+) and not fanout_design
+
+monte_carlo = st.toggle(
+    "🎲 Monte Carlo score intervals",
+    help=f"Scores {MONTE_CARLO_REPLICAS} seeded signal replicas across worker processes; threats and "
+         "context windows carry 90% intervals and the designer sees replica-mean scores, which vary far "
+         "less between runs than a single draw's."
+)
+
 run_button = st.button("🚀 Generate Offers", type="primary")
 
+# A failed run keeps its checkpoints; resuming skips every node that already finished
+failed_run_id = st.session_state.get("failed_run_id")
+resume_button = failed_run_id is not None and st.button(
+    f"↩️ Resume failed run {failed_run_id}", key="resume_run"
+)
+
 # ---------------------------------------------------------
 # EXECUTION
 # ---------------------------------------------------------
-if run_button:
-    with st.spinner("Running multi-agent analysis..."):
-        result = app.invoke({
-            "wendys_active": wendys_active
-        })
+if run_button or resume_button:
+    if resume_button:
+        # Resume on the graph the run started with
+        structured_design = st.session_state.get("failed_run_structured", False)
+        fanout_design = st.session_state.get("failed_run_fanout", False)
 
-    st.success("Analysis complete")
+    # Graph identity: runs only coalesce with identical runs on the same compiled graph
+    graph = {"structured_design": structured_design, "fanout_design": fanout_design}
+    app = load_engine(**graph)
+    tracer = load_runtime().tracer
+
+    if resume_button:
+        run_id = failed_run_id
+        payload = None # None = continue from the last checkpoint
+    else:
+        run_id = tracer.new_run_id()
+        payload = {"wendys_active": wendys_active, "stream_tokens": True}
+        if monte_carlo:
+            payload["monte_carlo_replicas"] = MONTE_CARLO_REPLICAS
+
+    # ---------------------------------------------------------
+    # LAYOUT (placeholders filled as each node completes)
+    # ---------------------------------------------------------
+    status = st.status("Running multi-agent analysis...", expanded=False)
 
     st.divider()
     st.header("🔍 Agent Intelligence")
 
-    with st.expander("🧠 Competitor Intelligence"):
-        st.text(result["competitor_intel"]["summary"])
+    with st.expander("🧠 Competitor Intelligence", expanded=True):
+        comp_slot = st.empty()
+        comp_slot.caption("Waiting for competitor analyst...")
 
-    with st.expander("👤 Customer Insights"):
-        st.text(result["customer_insights"])
+    with st.expander("👤 Customer Insights", expanded=True):
+        cust_slot = st.empty()
+        cust_slot.caption("Waiting for customer analyst...")
 
-    with st.expander("📈 Market Trends & Timing"):
-        st.markdown(result["market_trends_summary"])
-        st.json(result["market_context_windows"])
+    with st.expander("📈 Market Trends & Timing", expanded=True):
+        trend_slot = st.empty()
+        trend_slot.caption("Waiting for market trends narrator...")
+        windows_slot = st.empty()
 
     st.divider()
     st.header("🎨 Designed Wendy’s Offers")
 
-    st.markdown(result["final_report_text"])
-
-    for offer in result["structured_concepts"]:
-        with st.container(border=True):
-            st.subheader(offer["name"])
-            st.write(offer["witty_rationale"])
-
-            cols = st.columns(4)
-            cols[0].metric("Type", offer["type"])
-            cols[1].metric("Feasibility", offer["feasibility"])
-            cols[2].metric("Impact", offer["impact"])
-            cols[3].metric(
-                "Confidence",
-                round((offer["impact"] + offer["feasibility"]) / 20, 2)
-            )
-
-            st.caption(
-                f"Evidence Signals: {', '.join(offer['evidence_signals'])}"
-            )
+    design_slot = st.empty()
+    offers_slot = st.container()
 
     st.divider()
     st.header("📊 Executive Prioritization View")
@@ -91,8 +165,197 @@ if run_button:
     st.markdown(
         "**Higher impact + feasibility should be prioritized for immediate launch.**"
     )
+    table_slot = st.empty()
+
+    # ---------------------------------------------------------
+    # STREAMED EXECUTION (node updates + LLM tokens)
+    # ---------------------------------------------------------
+    result = {"wendys_active": wendys_active}
+    degraded = set() # inputs that missed the context deadline and use a deterministic fallback
+    finished = []
+    streamed = {"trend": "", "design": ""}
+
+    def flagged(slot, key):
+        """Slot container, headed by a warning when key was filled by a fallback."""
+        box = slot.container()
+        if key in degraded:
+            box.warning(
+                "⏱️ The AI narration missed the run's context deadline; "
+                "showing the deterministic fallback instead."
+            )
+        return box
+
+    def render(node):
+        if node == "comp":
+            comp_slot.text(result["competitor_intel"]["summary"])
+
+        elif node == "cust":
+            flagged(cust_slot, "customer_insights").text(result["customer_insights"])
+
+        elif node == "mkt_ctx":
+            windows_slot.json(result["market_context_windows"])
+
+        elif node == "trend":
+            flagged(trend_slot, "market_trends_summary").markdown(result["market_trends_summary"])
+
+        elif node in ("validate", "merge_offers") or (node == "design" and "structured_concepts" in result):
+            design_slot.markdown(result["final_report_text"])
+            render_offers(offers_slot, result["structured_concepts"])
+
+        elif node == "viz":
+            table_slot.dataframe(
+                result["prioritization_table"],
+                use_container_width=True
+            )
+
+    if payload is None:
+        # Sections of nodes that finished before the failure come from the checkpoint
+        result.update(app.get_state(run_config(run_id)).values)
+        degraded.update(result.get("degraded_inputs", []))
+        for node, key in (
+            ("comp", "competitor_intel"),
+            ("cust", "customer_insights"),
+            ("mkt_ctx", "market_context_windows"),
+            ("trend", "market_trends_summary"),
+            ("validate", "structured_concepts")
+        ):
+            if key in result:
+                render(node)
 
-    st.dataframe(
-        result["prioritization_table"],
-        use_container_width=True
+    def execute():
+        """Streams the run into this page; the returned snapshot is shared with coalesced sessions."""
+        for mode, chunk in app.stream(
+            # A resume gets a fresh context deadline (the failed attempt's has passed)
+            payload if payload is not None else resume_input(),
+            config=run_config(run_id),
+            stream_mode=["updates", "custom"]
+        ):
+            if mode == "custom":
+                node = chunk["node"]
+                streamed[node] += chunk["token"]
+                if node == "trend":
+                    trend_slot.markdown(streamed[node] + "▌")
+                elif node == "design":
+                    design_slot.markdown("**Draft concepts (pre brand-validation)**\n\n" + streamed[node] + "▌")
+                continue
+
+            for node, update in chunk.items():
+                update = dict(update or {})
+                degraded.update(update.pop("degraded_inputs", []))
+                result.update(update)
+                finished.append(node)
+                status.write(f"✅ `{node}` finished")
+                render(node)
+
+        # A completed run is never resumed; only failed runs keep their checkpoints
+        load_runtime().checkpointer.delete_thread(run_id)
+        return {"run_id": run_id, "values": dict(result), "degraded": sorted(degraded), "finished": list(finished)}
+
+    # Process-wide admission: identical in-flight runs are shared, the rest queue for a slot
+    joined = []
+
+    def on_queue(position):
+        status.update(label=f"⏳ All analysis slots are busy — you are #{position} in the queue...")
+
+    def on_join():
+        joined.append(True)
+        status.update(label="🔗 An identical analysis is already running; sharing its result...")
+
+    try:
+        outcome, shared = load_runtime().coordinator.run(
+            run_key(payload, graph) if payload is not None else f"resume:{run_id}",
+            execute,
+            on_queue=on_queue,
+            on_join=on_join
+        )
+
+    except QueueFull as exc:
+        status.update(label="Engine at capacity", state="error")
+        st.warning(f"Too many analyses are running or queued ({exc}).")
+        st.stop()
+
+    except Exception as exc:
+        if joined:
+            status.update(label="Analysis failed", state="error")
+            st.error(f"The identical run this page joined failed: {exc}. Please run again.")
+            st.stop()
+        st.session_state["failed_run_id"] = run_id
+        st.session_state["failed_run_structured"] = structured_design
+        st.session_state["failed_run_fanout"] = fanout_design
+        status.update(label="Analysis failed", state="error")
+        st.error(
+            f"Run `{run_id}` failed before {', '.join(pending_nodes(app, run_id)) or 'completion'}: {exc}. "
+            "Completed steps are checkpointed; use Resume to continue from there."
+        )
+        if not resume_button:
+            # Same key as the top-level button, so the click resumes on the next rerun
+            st.button(f"↩️ Resume failed run {run_id}", key="resume_run")
+        st.stop()
+
+    if shared:
+        # Render the leader's final state (and show its run profile)
+        run_id = outcome["run_id"]
+        result.update(outcome["values"])
+        degraded.update(outcome["degraded"])
+        finished = outcome["finished"]
+        for node in finished:
+            render(node)
+
+    st.session_state.pop("failed_run_id", None)
+    st.session_state.pop("failed_run_structured", None)
+    st.session_state.pop("failed_run_fanout", None)
+    status.update(
+        label="Analysis complete" + (" (shared with an identical run)" if shared else ""),
+        state="complete"
     )
+
+    # ---------------------------------------------------------
+    # RUN PROFILE (per-node spans + critical path)
+    # ---------------------------------------------------------
+    st.divider()
+    st.header("⏱️ Run Profile")
+
+    waterfall = tracer.waterfall(run_id)
+
+    executed = set(waterfall["node"]) if not waterfall.empty else set()
+    reused = [node for node in finished if node not in executed]
+    if reused:
+        st.caption(
+            "Reused from an earlier run (inputs unchanged): "
+            + ", ".join(f"`{node}`" for node in reused)
+        )
+
+    calls = load_runtime().resilience.stats
+    if calls["hedges_fired"] or calls["retries"]:
+        st.caption(
+            f"LLM calls this session: {calls['hedges_fired']} hedged after a slow response "
+            f"({calls['hedges_won']} answered first by the duplicate), {calls['retries']} retried"
+        )
+
+    if not waterfall.empty:
+        st.caption(
+            "Each bar is one agent node; highlighted bars form the critical path "
+            "of the fan-out/fan-in graph."
+        )
+
+        chart = alt.Chart(waterfall).mark_bar().encode(
+            x=alt.X("start_s:Q", title="Seconds since run start"),
+            x2="end_s:Q",
+            y=alt.Y("node:N", sort=list(waterfall["node"]), title=None),
+            color=alt.condition(
+                alt.datum.critical,
+                alt.value("#EE2737"),
+                alt.value("#B0BEC5")
+            ),
+            tooltip=[
+                "node", "wall_s", "cpu_s", "prompt_tokens",
+                "completion_tokens", "input_state_bytes", "output_state_bytes"
+            ]
+        )
+        st.altair_chart(chart, use_container_width=True)
+
+        with st.expander("Span details"):
+            st.dataframe(
+                waterfall.drop(columns=["run_id", "timestamp"]),
+                use_container_width=True
+            )
@@ -0,0 +1,67 @@
+# test_bench_suite.py
+#
+# The benchmark regression gate: points slower or heavier than the baseline
+# beyond the thresholds fail, points under the noise floors never do, and a
+# real (small) suite run exits 1 against a baseline it cannot meet.
+
+import json
+import os
+import subprocess
+import sys
+from types import SimpleNamespace
+
+from bench_suite import compare, scaling_exponent
+
+SUITE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks", "bench_suite.py")
+GATE = SimpleNamespace(threshold=0.25, memory_threshold=0.25, min_seconds=0.02, min_memory_mb=32.0)
+
+
+def point(rows, seconds, peak_delta_mb=0.0, case="comp"):
+    return {"case": case, "rows": rows, "seconds": seconds, "peak_delta_mb": peak_delta_mb}
+
+
+def statuses(current, baseline):
+    report = compare({"comp": current}, {"results": {"comp": baseline}}, GATE)
+    return {(rows, metric): status for _, rows, metric, _, _, _, status in report}
+
+
+def test_gate_flags_slowdowns_and_memory_growth_past_the_thresholds():
+    baseline = [point(1_000, 0.010), point(10_000, 0.100, 100.0), point(100_000, 1.0, 200.0)]
+    current = [point(1_000, 0.019), point(10_000, 0.120, 300.0), point(100_000, 1.5, 210.0)]
+
+    assert statuses(current, baseline) == {
+        (1_000, "seconds"): "noise", (1_000, "peak_delta_mb"): "noise",
+        (10_000, "seconds"): "ok", (10_000, "peak_delta_mb"): "FAIL",
+        (100_000, "seconds"): "FAIL", (100_000, "peak_delta_mb"): "ok"
+    }
+    # Points missing from the baseline are not compared
+    assert statuses([point(1_000_000, 9.0)], baseline) == {}
+
+
+def test_scaling_exponent_ignores_points_under_the_noise_floor():
+    points = [point(10 ** k, 10 ** (k - 5)) for k in range(3, 7)]   # linear: 0.01 s .. 10 s
+    assert scaling_exponent(points, min_seconds=0.02) == 1.0
+    assert scaling_exponent(points[:2], min_seconds=0.02) is None
+
+
+def run_suite(tmp_path, *args):
+    return subprocess.run(
+        [sys.executable, SUITE, "--sizes", "1000", "--cases", "cust_metrics", "--repeats", "1",
+         "--json", str(tmp_path / "suite.json"), *args],
+        capture_output=True, text=True, timeout=300
+    )
+
+
+def test_suite_run_fails_against_an_unmeetable_baseline(tmp_path):
+    proc = run_suite(tmp_path)
+    assert proc.returncode == 0, proc.stderr
+    results = json.loads((tmp_path / "suite.json").read_text())
+    (measured,) = results["results"]["cust_metrics"]
+    assert measured["rows"] == 1000 and measured["seconds"] > 0
+
+    impossible = dict(results, results={"cust_metrics": [dict(measured, seconds=measured["seconds"] / 100)]})
+    (tmp_path / "baseline.json").write_text(json.dumps(impossible))
+
+    gated = run_suite(tmp_path, "--baseline", str(tmp_path / "baseline.json"), "--min-seconds", "0")
+    assert gated.returncode == 1
+    assert "regression(s) beyond the thresholds" in gated.stdout
@@ -0,0 +1,110 @@
+# test_checkpointing.py
+#
+# Checkpointed runs: a run that fails in the validator resumes from the
+# last successful node with exactly one more LLM call (under a fresh context
+# deadline), and checkpoints hold plain data only (no pickles).
+
+import sqlite3
+import time
+from datetime import date
+
+import numpy as np
+import pytest
+
+from checkpointing import FrameSerializer, pending_nodes, run_config
+from signal_aggregator import DecayedSignalAggregator
+from signal_generator import generate_competitor_signals, generate_market_signals
+
+TODAY = date(2026, 1, 24)
+PAYLOAD = {"wendys_active": ["BOGO"], "signal_seed": 7}
+
+
+def stored_types(path):
+    with sqlite3.connect(path) as conn:
+        return {row[0] for row in conn.execute("SELECT type FROM blobs UNION SELECT type FROM writes")}
+
+
+def test_failed_run_resumes_with_one_llm_call(engine_runtime, llm_gateway, monkeypatch):
+    import engine
+
+    validator_output = engine._validator_output
+    failures = iter([ValueError("malformed validator JSON")])
+
+    def flaky(content):
+        for exc in failures:
+            raise exc
+        return validator_output(content)
+
+    monkeypatch.setattr(engine, "_validator_output", flaky)
+    app = engine.build_app(checkpoint=True)
+    config = run_config("resume-test")
+
+    with pytest.raises(ValueError, match="malformed"):
+        app.invoke(PAYLOAD, config)
+    assert pending_nodes(app, "resume-test") == ("validate",)
+
+    before = llm_gateway.requests.count
+    result = app.invoke(None, config)
+
+    assert llm_gateway.requests.count - before == 1
+    assert pending_nodes(app, "resume-test") == ()
+    assert result["structured_concepts"]
+    assert "pickle" not in stored_types(engine_runtime.config.checkpoint_path)
+
+
+def test_resume_after_the_deadline_still_asks_the_model(engine_runtime, llm_gateway, monkeypatch):
+    import engine
+
+    customer_request = engine._customer_request
+    failures = iter([ValueError("gateway hiccup")])
+
+    def flaky(state):
+        for exc in failures:
+            raise exc
+        return customer_request(state)
+
+    monkeypatch.setattr(engine, "_customer_request", flaky)
+    app = engine.build_app(checkpoint=True)
+    config = run_config("late-resume")
+
+    # The first attempt's deadline has long passed by the time the run is resumed
+    with pytest.raises(ValueError, match="hiccup"):
+        app.invoke({**PAYLOAD, "context_deadline": time.time() - 60}, config)
+    assert pending_nodes(app, "late-resume") == ("cust",)
+
+    before = llm_gateway.requests.count
+    result = app.invoke(engine.resume_input(), config)
+
+    assert not result.get("degraded_inputs")
+    assert result["context_deadline"] > time.time()
+    assert llm_gateway.requests.count - before == 4  # cust, trend, design, validate
+
+
+def test_completed_run_checkpoints_can_be_deleted(engine_runtime):
+    import engine
+
+    app = engine.build_app(checkpoint=True)
+    app.invoke(PAYLOAD, run_config("done"))
+    assert list(engine_runtime.checkpointer.list(run_config("done")))
+
+    engine_runtime.checkpointer.delete_thread("done")
+    assert not list(engine_runtime.checkpointer.list(run_config("done")))
+
+
+def test_aggregator_round_trips_without_pickle():
+    aggregator = DecayedSignalAggregator(TODAY)
+    aggregator.add_competitor_batch(generate_competitor_signals(TODAY, size=2_000, seed=1))
+    aggregator.add_market_batch(generate_market_signals(TODAY, size=2_000, seed=1))
+    serde = FrameSerializer()
+
+    type_, payload = serde.dumps_typed({"signal_aggregator": aggregator, "score": np.float64(1.5)})
+    restored = serde.loads_typed((type_, payload))
+
+    assert "pickle" not in type_
+    assert restored["score"] == 1.5
+    assert restored["signal_aggregator"].market_context_windows() == aggregator.market_context_windows()
+
+
+def test_unknown_objects_are_not_pickled():
+    with pytest.raises(TypeError):
+        FrameSerializer().dumps_typed({"live": object()})
@@ -0,0 +1,159 @@
+# test_coordinator.py
+#
+# Run admission: identical in-flight runs execute once (singleflight), and
+# only runs of the same payload on the same graph count as identical; the
+# bounded queue rejects runs beyond its capacity. Gateway rate limits:
+# streamed calls settle the token bucket on their final usage chunk, like
+# plain calls settle on their usage.
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+
+from coordinator import ExecutionCoordinator, QueueFull, RateLimiter, run_key
+
+
+def started_leader(coordinator, key, fn):
+    """Runs key in the background and waits until fn is executing."""
+    running = threading.Event()
+
+    def leader_fn():
+        running.set()
+        return fn()
+
+    pool = ThreadPoolExecutor(1)
+    future = pool.submit(coordinator.run, key, leader_fn)
+    assert running.wait(5)
+    pool.shutdown(wait=False)
+    return future
+
+
+def test_identical_runs_execute_once():
+    coordinator = ExecutionCoordinator()
+    release, calls = threading.Event(), []
+
+    def fn():
+        calls.append(1)
+        release.wait(5)
+        return {"offers": 2}
+
+    leader = started_leader(coordinator, "k", fn)
+    joined = []
+    with ThreadPoolExecutor(3) as pool:
+        followers = [pool.submit(coordinator.run, "k", fn, on_join=lambda: joined.append(1)) for _ in range(3)]
+        while len(joined) < 3:
+            threading.Event().wait(0.01)
+        release.set()
+
+        assert leader.result(5) == ({"offers": 2}, False)
+        assert [f.result(5) for f in followers] == [({"offers": 2}, True)] * 3
+
+    assert len(calls) == 1
+    assert coordinator.stats["runs"] == 1 and coordinator.stats["coalesced"] == 3
+
+
+def test_leader_failure_reaches_every_follower():
+    coordinator = ExecutionCoordinator()
+    release = threading.Event()
+
+    def fn():
+        release.wait(5)
+        raise RuntimeError("gateway down")
+
+    leader = started_leader(coordinator, "k", fn)
+    with ThreadPoolExecutor(1) as pool:
+        joined = threading.Event()
+        follower = pool.submit(coordinator.run, "k", fn, on_join=joined.set)
+        assert joined.wait(5)
+        release.set()
+        for future in (leader, follower):
+            with pytest.raises(RuntimeError, match="gateway down"):
+                future.result(5)
+
+    # Nothing stays in flight: the next identical run executes again
+    assert coordinator.run("k", lambda: "fresh") == ("fresh", False)
+
+
+def test_full_queue_rejects_runs():
+    coordinator = ExecutionCoordinator(max_concurrent_runs=1, max_queued_runs=1)
+    release = threading.Event()
+    busy = started_leader(coordinator, "a", lambda: release.wait(5))
+
+    queued_at = threading.Event()
+    with ThreadPoolExecutor(1) as pool:
+        queued = pool.submit(coordinator.run, "b", lambda: "b", on_queue=lambda position: queued_at.set())
+        assert queued_at.wait(5)
+        with pytest.raises(QueueFull):
+            coordinator.run("c", lambda: "c")
+        release.set()
+        assert busy.result(5) == (True, False)
+        assert queued.result(5) == ("b", False)
+
+    assert coordinator.stats["rejected"] == 1
+
+
+def test_run_key_ignores_delivery_keys_and_list_order():
+    day = date(2026, 1, 24)
+    assert run_key({"wendys_active": ["BOGO", "4 for $4"], "stream_tokens": True}, day=day) == \
+        run_key({"wendys_active": ["4 for $4", "BOGO"]}, day=day)
+    assert run_key({"wendys_active": ["BOGO"]}, day=day) != run_key({"wendys_active": ["BOGO"], "signal_seed": 1}, day=day)
+
+
+def test_run_key_tells_design_modes_apart():
+    day = date(2026, 1, 24)
+    payload = {"wendys_active": ["BOGO"]}
+    validator = {"structured_design": False, "fanout_design": False}
+    structured = {"structured_design": True, "fanout_design": False}
+
+    assert run_key(payload, validator, day=day) == run_key(dict(payload), dict(validator), day=day)
+    assert run_key(payload, validator, day=day) != run_key(payload, structured, day=day)
+    assert run_key(payload, structured, day=day) != run_key(payload, {**validator, "fanout_design": True}, day=day)
+
+
+def usage_chunk(total_tokens):
+    return SimpleNamespace(choices=[], usage=SimpleNamespace(total_tokens=total_tokens))
+
+
+class StreamingCompletions:
+    def __init__(self, total_tokens):
+        self.total_tokens = total_tokens
+
+    def create(self, **kwargs):
+        return iter([SimpleNamespace(choices=[], usage=None), usage_chunk(self.total_tokens)])
+
+
+class AsyncStreamingCompletions(StreamingCompletions):
+    async def create(self, **kwargs):
+        async def chunks():
+            yield SimpleNamespace(choices=[], usage=None)
+            yield usage_chunk(self.total_tokens)
+        return chunks()
+
+
+REQUEST = {"messages": [{"role": "user", "content": "hi"}], "max_tokens": 1_000, "stream": True}
+
+
+def test_stream_settles_tokens_on_its_usage_chunk():
+    limiter = RateLimiter(tokens_per_minute=10_000)
+    stream = limiter.wrap(StreamingCompletions(total_tokens=50)).create(**REQUEST)
+
+    reserved = limiter.tokens.level
+    list(stream)
+    assert limiter.tokens.level - reserved == limiter.estimate(REQUEST) - 50
+
+
+def test_async_stream_settles_tokens_on_its_usage_chunk():
+    limiter = RateLimiter(tokens_per_minute=10_000)
+
+    async def run():
+        stream = await limiter.wrap_async(AsyncStreamingCompletions(total_tokens=50)).create(**REQUEST)
+        reserved = limiter.tokens.level
+        [chunk async for chunk in stream]
+        return reserved
+
+    reserved = asyncio.run(run())
+    assert limiter.tokens.level - reserved == limiter.estimate(REQUEST) - 50
@@ -0,0 +1,170 @@
+# test_engine.py
+#
+# The graph end to end on the mock gateway: the async graph keeps working
+# when each run uses a fresh event loop (the gateway client is per loop),
+# and `import engine` stays light, with the runtime and apps built lazily.
+# The structured design mode answers in one hop and repairs a locally
+# invalid answer with a single targeted call; the fan-out mode makes one
+# designer call per (window, strategy) task, at most design_concurrency at
+# once, and validates the candidates in batches.
+
+import asyncio
+import dataclasses
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from offer_schema import validate_offers, validate_report
+
+PAYLOAD = {"wendys_active": ["BOGO"], "signal_seed": 3}
+
+
+def test_async_graph_runs_on_successive_event_loops(engine_runtime, llm_gateway):
+    import engine
+
+    for fanout_design in (False, True):
+        app = engine.build_app(async_nodes=True, fanout_design=fanout_design)
+        for _ in range(2):
+            before = llm_gateway.requests.count
+            result = asyncio.run(app.ainvoke(PAYLOAD))
+            assert result["structured_concepts"]
+            assert llm_gateway.requests.count > before
+
+
+def test_import_is_light_and_needs_no_api_key():
+    probe = "import sys, engine; print(sorted(m for m in ('openai', 'langgraph') if m in sys.modules))"
+    env = {key: value for key, value in os.environ.items() if key != "OPENAI_API_KEY"}
+    out = subprocess.run([sys.executable, "-c", probe], cwd=os.path.dirname(os.path.abspath(__file__)),
+                         env=env, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "[]"
+
+
+def test_missing_api_key_fails_on_first_llm_use_only(llm_gateway):
+    import engine
+
+    runtime = engine.configure(dataclasses.replace(engine.EngineConfig(), api_key=None, base_url=llm_gateway.url))
+    assert runtime.tracer is not None
+    with pytest.raises(ValueError, match="OPENAI_API_KEY"):
+        runtime.llm
+
+
+def test_default_app_is_compiled_once_per_runtime(engine_runtime):
+    import engine
+
+    app = engine.app
+    assert engine.app is app
+    engine.configure(engine_runtime.config)
+    assert engine.app is not app
+
+
+def test_config_from_env(monkeypatch):
+    import engine
+
+    monkeypatch.setenv("LLM_NODE_DEADLINES", "cust=5,design=7.5")
+    monkeypatch.setenv("LLM_CACHE_NODES", "cust,trend")
+    monkeypatch.setenv("MONTE_CARLO_WORKERS", "0")
+    config = engine.EngineConfig.from_env()
+
+    assert config.node_deadlines == {"cust": 5.0, "design": 7.5}
+    assert config.cache_nodes == frozenset({"cust", "trend"})
+    assert config.monte_carlo_workers is None
+
+
+def test_structured_design_skips_the_validator_hop(engine_runtime, llm_gateway):
+    import engine
+
+    before = llm_gateway.requests.count
+    result = engine.build_app(structured_design=True).invoke(PAYLOAD)
+
+    assert llm_gateway.requests.count - before == 3  # cust, trend, design
+    known = {window["signal_id"] for window in result["market_context_windows"]}
+    assert validate_report({"report_intro": result["final_report_text"], "offers": result["structured_concepts"]},
+                           known_signals=known) == []
+
+
+def test_structured_design_sends_one_targeted_repair(engine_runtime, llm_gateway, monkeypatch):
+    import engine
+
+    parse_report = engine.parse_report
+    outcomes = iter([["offers[0].impact must be a number in [0, 10]"]])
+    repairs = []
+
+    def first_answer_invalid(content, known_signals=None):
+        data, errors = parse_report(content, known_signals=known_signals)
+        return data, next(outcomes, errors)
+
+    def recorded_repair(content, errors, known_signals, **kwargs):
+        repairs.append(errors)
+        return repair_request(content, errors, known_signals, **kwargs)
+
+    repair_request = engine._repair_request
+    monkeypatch.setattr(engine, "parse_report", first_answer_invalid)
+    monkeypatch.setattr(engine, "_repair_request", recorded_repair)
+
+    before = llm_gateway.requests.count
+    result = engine.build_app(structured_design=True).invoke(PAYLOAD)
+
+    assert llm_gateway.requests.count - before == 4
+    assert repairs == [["offers[0].impact must be a number in [0, 10]"]]
+    assert result["structured_concepts"]
+
+
+def test_structured_design_fails_if_the_repair_is_still_invalid(engine_runtime, monkeypatch):
+    import engine
+
+    monkeypatch.setattr(engine, "parse_report", lambda content, known_signals=None: (None, ["offers must be a non-empty list"]))
+
+    with pytest.raises(ValueError, match="failed validation after repair"):
+        engine.build_app(structured_design=True).invoke(PAYLOAD)
+
+
+def test_fanout_designs_one_call_per_task_and_validates_in_batches(engine_runtime, llm_gateway):
+    import engine
+
+    before = llm_gateway.requests.count
+    result = engine.build_app(fanout_design=True).invoke(PAYLOAD)
+
+    tasks = engine._design_tasks(result)
+    windows = {window["signal_id"] for window in result["market_context_windows"]}
+    assert {task["window"]["signal_id"] for task in tasks} == windows
+    assert {task["strategy"] for task in tasks} == set(engine.OFFER_TYPES)
+
+    candidates = len(result["offer_candidates"])
+    batches = -(-candidates // engine.VALIDATION_BATCH_SIZE)
+    assert candidates >= len(tasks)
+    assert llm_gateway.requests.count - before == 2 + len(tasks) + batches  # cust, trend, designs, validations
+
+    offers = result["structured_concepts"]
+    assert len(offers) >= len(windows)
+    assert validate_offers(offers, known_signals=windows, required_types=()) == []
+    assert len({offer["name"] for offer in offers}) == len(offers)
+
+
+def test_fanout_concurrency_is_bounded_by_the_config(engine_runtime, monkeypatch):
+    import engine
+
+    engine.configure(dataclasses.replace(engine_runtime.config, design_concurrency=2))
+    complete_text = engine._complete_text
+    lock, in_flight, peak = threading.Lock(), [0], [0]
+
+    def tracked(node, request, **kwargs):
+        if node != "design_pair":
+            return complete_text(node, request, **kwargs)
+        with lock:
+            in_flight[0] += 1
+            peak[0] = max(peak[0], in_flight[0])
+        try:
+            time.sleep(0.05)
+            return complete_text(node, request, **kwargs)
+        finally:
+            with lock:
+                in_flight[0] -= 1
+
+    monkeypatch.setattr(engine, "_complete_text", tracked)
+    engine.build_app(fanout_design=True).invoke(PAYLOAD)
+
+    assert peak[0] == 2
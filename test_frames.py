@@ -0,0 +1,65 @@
+# test_frames.py
+#
+# TableRef round trips: categoricals stay categorical, datetimes keep their
+# unit, a non-default index is restored, and the IPC / pickle forms keep the
+# handle ID (the memo and checkpoints key on it). Graph state carries the
+# handles instead of DataFrames or row dicts.
+
+import pickle
+from datetime import date
+
+import pandas as pd
+from pandas.testing import assert_frame_equal
+
+from frames import TableRef
+from incremental import fingerprint
+from signal_generator import generate_market_signals
+
+TODAY = date(2026, 1, 24)
+
+
+def test_round_trip_keeps_dtypes_and_values():
+    df = generate_market_signals(TODAY, size=1_000, seed=5)
+    ref = TableRef.from_pandas(df)
+
+    assert ref.num_rows == len(ref) == 1_000
+    assert ref.column_names == list(df.columns)
+    assert_frame_equal(ref.to_pandas(), df)
+    assert ref.to_pandas()["observed_date"].dtype == df["observed_date"].dtype
+
+
+def test_column_selection_restores_the_index():
+    df = generate_market_signals(TODAY, size=200, seed=5).iloc[50:120]
+    ref = TableRef.from_pandas(df)
+
+    assert_frame_equal(ref.to_pandas(columns=["trend_type", "observed_date"]), df[["trend_type", "observed_date"]])
+    assert ref.column_names == list(df.columns)
+
+
+def test_ipc_and_pickle_keep_the_handle_id():
+    df = generate_market_signals(TODAY, size=500, seed=9)
+    ref = TableRef.from_pandas(df, ref_id="mkt-9")
+
+    for restored in (TableRef.from_ipc(ref.to_ipc(), ref.ref_id), pickle.loads(pickle.dumps(ref))):
+        assert restored.ref_id == "mkt-9"
+        assert_frame_equal(restored.to_pandas(), df)
+        assert fingerprint({"raw": restored}, ["raw"]) == fingerprint({"raw": ref}, ["raw"])
+
+
+def test_handle_is_small_next_to_the_frame():
+    df = generate_market_signals(TODAY, size=50_000, seed=1)
+    ref = TableRef.from_pandas(df)
+
+    assert len(repr(ref)) < 200
+    assert ref.nbytes < df.memory_usage(deep=True).sum()
+    assert TableRef.from_pandas(pd.DataFrame({"x": [1]})).ref_id != ref.ref_id
+
+
+def test_graph_state_carries_handles_not_row_dicts(engine_runtime):
+    import engine
+
+    result = engine.build_app().invoke({"wendys_active": ["BOGO"], "signal_seed": 3})
+
+    assert isinstance(result["raw_market_signals"], TableRef)
+    assert isinstance(result["competitor_intel"]["raw"], TableRef)
+    assert "mechanic" in result["competitor_intel"]["raw"].column_names
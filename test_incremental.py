@@ -0,0 +1,76 @@
+# test_incremental.py
+#
+# The incremental executor replays a node only when its input slice hashes
+# the same; runtime.memo keeps unseeded signal draws and creative LLM calls
+# out of the memo, so a repeat run still re-executes them.
+
+from incremental import IncrementalExecutor
+
+
+def counting_node(calls):
+    def node(state):
+        calls.append(state["x"])
+        return {"y": state["x"] * 2}
+    return node
+
+
+def test_unchanged_inputs_replay_the_stored_output():
+    memo = IncrementalExecutor()
+    calls = []
+    node = memo.wrap("double", counting_node(calls))
+
+    assert node({"x": 2, "other": 1}) == {"y": 4}
+    assert node({"x": 2, "other": 5}) == {"y": 4}
+    assert node({"x": 3}) == {"y": 6}
+    assert calls == [2, 3]
+    assert memo.stats["double.reused"] == 1
+
+
+def test_replay_if_false_always_runs_the_node():
+    memo = IncrementalExecutor(replay_if=lambda name, state: state.get("seed") is not None)
+    calls = []
+    node = memo.wrap("double", counting_node(calls))
+
+    node({"x": 2})
+    node({"x": 2})
+    assert calls == [2, 2]
+
+    node({"x": 2, "seed": 1})
+    node({"x": 2, "seed": 1})
+    assert calls == [2, 2, 2]
+
+
+def executed(memo, nodes):
+    return {node: memo.stats[f"{node}.executed"] for node in nodes}
+
+
+def test_repeat_unseeded_run_redraws_signals_and_asks_the_model_again(engine_runtime, llm_gateway):
+    import engine
+
+    app = engine.build_app(incremental=True)
+    sampling, creative = ("comp", "cust", "mkt_gen", "mkt_ctx"), ("trend", "design", "validate")
+
+    app.invoke({"wendys_active": ["BOGO"]})
+    before, requests = executed(engine_runtime.memo, sampling + creative), llm_gateway.requests.count
+    app.invoke({"wendys_active": ["BOGO"]})
+
+    after = executed(engine_runtime.memo, sampling + creative)
+    assert all(after[node] == before[node] + 1 for node in sampling + creative)
+    # cust, trend, design and validate all reach the gateway again
+    assert llm_gateway.requests.count - requests >= 4
+
+
+def test_seeded_run_replays_signals_but_not_creative_calls(engine_runtime):
+    import engine
+
+    app = engine.build_app(incremental=True)
+    payload = {"wendys_active": ["BOGO"], "signal_seed": 11}
+
+    app.invoke(payload)
+    app.invoke(payload)
+
+    stats = engine_runtime.memo.stats
+    for node in ("comp", "cust", "mkt_gen", "mkt_ctx"):
+        assert stats[f"{node}.reused"] == 1, node
+    for node in ("trend", "design", "validate"):
+        assert stats[f"{node}.executed"] == 2 and not stats[f"{node}.reused"], node
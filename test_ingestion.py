@@ -0,0 +1,101 @@
+# test_ingestion.py
+#
+# Chunked file ingestion: every malformed row is dropped and counted under
+# exactly one reason, whatever the file format or chunk size.
+
+import json
+from collections import Counter
+from datetime import date, timedelta
+
+import pandas as pd
+import pytest
+
+from ingestion import SchemaError, ingest_file, ingest_signals
+from signal_aggregator import DecayedSignalAggregator
+
+TODAY = date(2026, 1, 24)
+
+
+def day(offset):
+    return (TODAY + timedelta(days=offset)).isoformat()
+
+
+COMPETITOR_ROWS = [
+    # id, brand, mechanic, obs_date
+    ("a1", "Taco Bell", "BOGO", day(-1)),
+    ("a2", "  taco bell ", "bogo", day(0)),         # labels match case-insensitively
+    ("a3", "Burger King", "Loyalty Multiplier", day(-60)),
+    ("", "Taco Bell", "BOGO", day(-2)),              # missing_id
+    ("a5", "Wendy's", "BOGO", day(-2)),              # unknown_brand
+    ("a6", "Burger King", "", day(-2)),              # missing_mechanic
+    ("a7", "Burger King", "BOGO", "not-a-date"),     # invalid_obs_date
+    ("a8", "Burger King", "BOGO", day(3)),           # future_date
+    ("a9", "Burger King", "BOGO", day(-61)),         # outside_window
+]
+COMPETITOR_REJECTS = Counter({
+    "missing_id": 1, "unknown_brand": 1, "missing_mechanic": 1,
+    "invalid_obs_date": 1, "future_date": 1, "outside_window": 1
+})
+
+
+def write(tmp_path, rows, columns, file_format):
+    df = pd.DataFrame(rows, columns=columns).assign(extra="ignored")
+    path = tmp_path / f"signals.{file_format}"
+    if file_format == "csv":
+        df.to_csv(path, index=False)
+    elif file_format == "jsonl":
+        path.write_text("".join(json.dumps(record) + "\n" for record in df.to_dict("records")))
+    else:
+        df.to_parquet(path, index=False)
+    return path
+
+
+@pytest.mark.parametrize("file_format", ["csv", "jsonl", "parquet"])
+@pytest.mark.parametrize("chunk_rows", [2, 1_000])
+def test_competitor_rejects_are_counted_by_reason(tmp_path, file_format, chunk_rows):
+    path = write(tmp_path, COMPETITOR_ROWS, ["id", "brand", "mechanic", "obs_date"], file_format)
+    aggregator = DecayedSignalAggregator(TODAY)
+
+    report = ingest_file(path, "competitor", aggregator, chunk_rows=chunk_rows)
+
+    assert report.rows_read == len(COMPETITOR_ROWS)
+    assert report.rows_accepted == 3
+    assert report.rejected == COMPETITOR_REJECTS
+    assert report.rows_rejected == sum(COMPETITOR_REJECTS.values())
+    assert report.chunks == -(-len(COMPETITOR_ROWS) // chunk_rows)
+    assert aggregator.competitor_intel([])["summary"].splitlines() == [
+        "BOGO driven by Taco Bell (Threat: 2.0/10) [Ref ID: a2]",
+        "Loyalty Multiplier driven by Burger King (Threat: 0.0/10) [Ref ID: a3]"
+    ]
+
+
+def test_market_rejects_are_counted_by_reason(tmp_path):
+    rows = [
+        # trend_type, season, daypart, situation, source, observed_date
+        ("Late-Night Value", "Winter", "Late Night", "Payday", "Reddit", day(0)),
+        ("late-night value", "winter", "late night", "payday", "reddit", day(-10)),
+        ("Doomscrolling", "Winter", "Lunch", "Payday", "Reddit", day(0)),   # unknown_trend_type
+        ("Late-Night Value", "", "Lunch", "Payday", "Reddit", day(0)),      # missing_season
+        ("Late-Night Value", "Winter", "Lunch", "Payday", "Reddit", day(-121))  # outside_window
+    ]
+    path = write(tmp_path, rows, ["trend_type", "season", "daypart", "situation", "source", "observed_date"], "csv")
+
+    aggregator, [report] = ingest_signals(market=[path], as_of=TODAY)
+
+    assert report.rows_accepted == 2
+    assert report.rejected == Counter({"unknown_trend_type": 1, "missing_season": 1, "outside_window": 1})
+    [window] = aggregator.market_context_windows()
+    assert (window["trend"], window["signal_id"]) == ("Late-Night Value", "CTX-0")
+
+
+def test_missing_columns_raise_schema_error(tmp_path):
+    path = write(tmp_path, [("a1", "Taco Bell", day(0))], ["id", "brand", "obs_date"], "csv")
+    with pytest.raises(SchemaError, match="mechanic"):
+        ingest_file(path, "competitor", DecayedSignalAggregator(TODAY))
+
+
+def test_unsupported_file_type_raises_schema_error(tmp_path):
+    path = tmp_path / "signals.xlsx"
+    path.write_text("")
+    with pytest.raises(SchemaError, match="unsupported"):
+        ingest_file(path, "competitor", DecayedSignalAggregator(TODAY))
@@ -0,0 +1,115 @@
+# test_llm_cache.py
+#
+# Content-addressed completion cache: stable keys, per-node opt-in, the
+# memory LRU bound, the SQLite tier, TTL expiry and one async client per
+# event loop.
+
+import asyncio
+
+from openai.types.chat import ChatCompletion
+
+import llm_cache
+from llm_cache import CachedChatClient, LLMResponseCache, cache_key
+
+REQUEST = {"model": "gpt-4o", "messages": [{"role": "user", "content": "hi"}], "temperature": 0}
+
+
+def completion(content):
+    return ChatCompletion.model_validate({
+        "id": "c", "object": "chat.completion", "created": 0, "model": "gpt-4o",
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}]
+    })
+
+
+class FakeCompletions:
+    def __init__(self):
+        self.calls = 0
+
+    def create(self, **kwargs):
+        self.calls += 1
+        return completion(f"answer {self.calls}")
+
+
+class FakeClient:
+    def __init__(self):
+        self.chat = type("Chat", (), {"completions": FakeCompletions()})()
+
+
+def test_key_covers_completion_fields_only():
+    assert cache_key(REQUEST) == cache_key(dict(reversed(list(REQUEST.items()))))
+    assert cache_key(REQUEST) == cache_key({**REQUEST, "stream": False, "timeout": 5})
+    assert cache_key(REQUEST) != cache_key({**REQUEST, "temperature": 0.7})
+    assert cache_key(REQUEST) != cache_key({**REQUEST, "response_format": {"type": "json_object"}})
+
+
+def test_only_opted_in_nodes_are_cached():
+    client = FakeClient()
+    llm = CachedChatClient(client, LLMResponseCache(path=""), nodes={"cust"})
+
+    first = llm.for_node("cust").chat.completions.create(**REQUEST)
+    second = llm.for_node("cust").chat.completions.create(**REQUEST)
+    creative = [llm.for_node("design").chat.completions.create(**REQUEST) for _ in range(2)]
+
+    assert first.choices[0].message.content == second.choices[0].message.content == "answer 1"
+    assert [r.choices[0].message.content for r in creative] == ["answer 2", "answer 3"]
+    assert llm.cache.stats["cust.hits"] == 1 and llm.cache.stats["cust.misses"] == 1
+    assert "design.misses" not in llm.cache.stats
+
+
+def test_streams_bypass_the_cache():
+    client = FakeClient()
+    llm = CachedChatClient(client, LLMResponseCache(path=""), nodes={"trend"})
+    for _ in range(2):
+        llm.for_node("trend").chat.completions.create(**REQUEST, stream=True)
+    assert client.chat.completions.calls == 2
+
+
+def test_memory_tier_is_lru_bounded():
+    cache = LLMResponseCache(path="", max_memory_entries=2)
+    for key in "abc":
+        cache.put(key, completion(key))
+    cache.get("b")
+    cache.put("d", completion("d"))
+
+    assert cache.get("a") is None and cache.get("c") is None
+    assert cache.get("b").choices[0].message.content == "b"
+    assert cache.get("d") is not None
+
+
+def test_disk_tier_survives_a_new_process_cache(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    LLMResponseCache(path=path).put("k", completion("stored"))
+
+    fresh = LLMResponseCache(path=path)
+    assert fresh.get("k").choices[0].message.content == "stored"
+    assert fresh.stats["disk_hits"] == 1
+    assert fresh.get("k") is not None and fresh.stats["memory_hits"] == 1
+
+
+def test_entries_expire_after_ttl(tmp_path, monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(llm_cache.time, "time", lambda: now[0])
+    cache = LLMResponseCache(path=str(tmp_path / "cache.sqlite"), ttl_seconds=60)
+    cache.put("k", completion("old"))
+
+    now[0] += 59
+    assert cache.get("k") is not None
+    now[0] += 2
+    assert cache.get("k") is None
+    assert LLMResponseCache(path=cache.path, ttl_seconds=60).get("k") is None
+
+
+def test_async_client_is_built_per_event_loop():
+    built = []
+    llm = CachedChatClient(FakeClient(), None, async_client_factory=lambda: built.append(object()) or built[-1])
+
+    async def twice():
+        return llm.async_client, llm.async_client
+
+    first, same = asyncio.run(twice())
+    second, _ = asyncio.run(twice())
+
+    assert first is same
+    assert second is not first
+    assert len(built) == 2
+    assert len(llm._loop_clients) == 1   # the closed loop's client was dropped
@@ -0,0 +1,104 @@
+# test_mock_llm_server.py
+#
+# The offline gateway the load test and graph tests rely on: OpenAI-shaped
+# answers, valid JSON offers, SSE streaming and injected errors.
+
+import json
+import random
+import urllib.error
+import urllib.request
+
+import pytest
+
+from load_test import run_threads, summarize
+from mock_llm_server import ERROR_STATUSES, MockConfig, MockLLMServer, parse_latency
+from offer_schema import parse_offers, parse_report
+
+
+def post(server, body):
+    request = urllib.request.Request(
+        f"{server.url}/v1/chat/completions",
+        data=json.dumps(body).encode("utf-8"),
+        headers={"Content-Type": "application/json"}
+    )
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return response.read().decode("utf-8")
+
+
+@pytest.fixture
+def server():
+    with MockLLMServer(MockConfig(latency="fixed:0", tokens_per_second=0, seed=0)) as mock:
+        yield mock
+
+
+def test_json_answers_are_valid_offers(server):
+    body = {"model": "m", "response_format": {"type": "json_object"},
+            "messages": [{"role": "user", "content": "ALLOWED SIGNAL IDS:\nCTX-4, CTX-9"}]}
+    answer = json.loads(post(server, body))
+
+    assert answer["usage"]["completion_tokens"] > 0
+    report, errors = parse_report(answer["choices"][0]["message"]["content"], known_signals={"CTX-4", "CTX-9"})
+    assert errors == []
+    assert len(report["offers"]) == 2
+
+
+def test_fanout_task_gets_requested_offer_count(server):
+    body = {"model": "m", "response_format": {"type": "json_object"},
+            "messages": [{"role": "user", "content": "Strategy: Defensive\nOffers: 3\nCTX-1"}]}
+    offers, errors = parse_offers(json.loads(post(server, body))["choices"][0]["message"]["content"],
+                                  required_types=("Defensive",))
+    assert errors == []
+
+    assert [offer["type"] for offer in offers] == ["Defensive"] * 3
+    assert len({offer["name"] for offer in offers}) == 3
+
+
+def test_stream_reassembles_to_the_plain_answer(server):
+    messages = [{"role": "user", "content": "CTX-2 trends"}]
+    plain = json.loads(post(server, {"model": "m", "messages": messages}))["choices"][0]["message"]["content"]
+
+    events = [line[len("data: "):] for line in post(server, {"model": "m", "messages": messages, "stream": True}).splitlines()
+              if line.startswith("data: ")]
+    assert events[-1] == "[DONE]"
+    chunks = [json.loads(event) for event in events[:-1]]
+    assert chunks[-1]["choices"][0]["finish_reason"] == "stop"
+    streamed = "".join(chunk["choices"][0]["delta"].get("content", "") for chunk in chunks)
+    assert streamed.startswith("- Evidence CTX-2:") and plain.startswith("- Evidence CTX-2:")
+
+
+def test_error_injection():
+    with MockLLMServer(MockConfig(latency="fixed:0", error_rate=1.0, seed=0)) as mock:
+        with pytest.raises(urllib.error.HTTPError) as failure:
+            post(mock, {"model": "m", "messages": []})
+    assert failure.value.code in ERROR_STATUSES
+
+
+def test_latency_distributions():
+    rng = random.Random(0)
+    assert parse_latency("fixed:0.5")(rng) == 0.5
+    assert all(0.2 <= parse_latency("uniform:0.2,1.0")(rng) <= 1.0 for _ in range(100))
+    assert parse_latency("normal:0,1")(rng) >= 0
+    with pytest.raises(ValueError):
+        parse_latency("pareto:1")
+
+
+def test_load_test_records_latencies_and_errors():
+    class App:
+        def invoke(self, payload):
+            if payload["fail"]:
+                raise RuntimeError("boom")
+
+    latencies, errors = run_threads(App(), [{"fail": i % 4 == 0} for i in range(8)], concurrency=4)
+
+    assert len(latencies) == 6 and errors == ["RuntimeError('boom')"] * 2
+    stats = summarize([1.0, 2.0, 3.0])
+    assert stats["count"] == 3 and stats["mean"] == 2.0 and stats["p50"] == 2.0
+
+
+def test_stream_ends_with_usage_when_asked(server):
+    body = {"model": "m", "messages": [{"role": "user", "content": "hi"}], "stream": True,
+            "stream_options": {"include_usage": True}}
+    events = [line[len("data: "):] for line in post(server, body).splitlines() if line.startswith("data: ")]
+
+    last = json.loads(events[-2])
+    assert last["choices"] == [] and last["usage"]["completion_tokens"] > 0
@@ -0,0 +1,79 @@
+# test_montecarlo.py
+#
+# Monte Carlo score intervals: replicas are bit-identical whatever the
+# worker count, the reductions carry mean + 90% intervals, and one graph run
+# (seeded or not) draws a single replica pass shared by comp and mkt_ctx.
+
+from datetime import date
+
+import numpy as np
+
+from montecarlo import MonteCarloSampler, window_evidence
+from scoring import CONTEXT_DIMENSIONS
+from signal_generator import COMPETITOR_MECHANICS, generate_market_signals
+
+TODAY = date(2026, 1, 24)
+SIZES = {"competitor_size": 200, "market_size": 300}
+
+
+def test_replicas_do_not_depend_on_the_worker_count():
+    serial = MonteCarloSampler(workers=1, cache_size=0)
+    pooled = MonteCarloSampler(workers=2, cache_size=0, tasks_per_worker=2)
+    try:
+        one = serial.sample(12, 4, TODAY, **SIZES).values
+        two = pooled.sample(12, 4, TODAY, **SIZES).values
+    finally:
+        serial.shutdown()
+        pooled.shutdown()
+
+    assert np.array_equal(one, two)
+
+
+def test_reductions_carry_mean_and_interval():
+    sampler = MonteCarloSampler(workers=1)
+    samples = sampler.sample(40, 8, TODAY, **SIZES)
+    assert sampler.sample(40, 8, TODAY, **SIZES) is samples   # seeded passes are cached
+
+    threats = samples.threats(["BOGO"])
+    assert set(threats["mechanic"]) == set(COMPETITOR_MECHANICS) - {"BOGO"}
+    assert (threats["raw_p05"] <= threats["raw_score"].round(1)).all()
+    assert (threats["raw_score"].round(1) <= threats["raw_p95"]).all()
+
+    df = generate_market_signals(TODAY, size=SIZES["market_size"], seed=8)
+    windows = samples.windows(window_evidence(df, CONTEXT_DIMENSIONS), k=5)
+    assert len(windows) == 5
+    assert [w["relevance_score"] for w in windows] == sorted((w["relevance_score"] for w in windows), reverse=True)
+    assert all(w["relevance_p05"] <= w["relevance_score"] <= w["relevance_p95"] for w in windows)
+
+
+def count_passes(runtime, monkeypatch):
+    passes = []
+    sample = runtime.monte_carlo._sample
+
+    def counted(replicas, seed, *args):
+        passes.append(seed)
+        return sample(replicas, seed, *args)
+
+    monkeypatch.setattr(runtime.monte_carlo, "_sample", counted)
+    return passes
+
+
+def test_unseeded_run_shares_one_replica_pass(engine_runtime, monkeypatch):
+    import engine
+
+    monkeypatch.setattr(engine, "COMPETITOR_SAMPLE_SIZE", SIZES["competitor_size"])
+    monkeypatch.setattr(engine, "MARKET_SAMPLE_SIZE", SIZES["market_size"])
+    engine_runtime.monte_carlo = MonteCarloSampler(workers=1)
+    passes = count_passes(engine_runtime, monkeypatch)
+    app = engine.build_app()
+
+    first = app.invoke({"wendys_active": ["BOGO"], "monte_carlo_replicas": 20})
+    second = app.invoke({"wendys_active": ["BOGO"], "monte_carlo_replicas": 20})
+
+    assert len(passes) == 2 and None not in passes
+    assert passes == [first["monte_carlo_seed"], second["monte_carlo_seed"]]
+    assert "raw_p05" in first["competitor_intel"]["threats"]
+    assert "relevance_p05" in first["market_context_windows"][0]
+
+    app.invoke({"wendys_active": ["BOGO"], "monte_carlo_replicas": 20, "signal_seed": 5})
+    assert passes[2:] == [5]
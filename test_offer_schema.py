@@ -0,0 +1,53 @@
+# test_offer_schema.py
+#
+# The local offer-report check: valid reports pass, each broken field is
+# named in the problem list (which the repair call sends back), and JSON
+# syntax errors are reported rather than raised.
+
+import json
+
+from offer_schema import parse_offers, parse_report, validate_report
+
+
+def offer(**overrides):
+    base = {
+        "name": "Frosty Night Shift", "witty_rationale": "Cold nights, colder treats.", "type": "Defensive",
+        "evidence_signals": ["CTX-12"], "feasibility": 8.5, "impact": 7
+    }
+    return {**base, **overrides}
+
+
+REPORT = {"report_intro": "Tonight's picks.", "offers": [offer(), offer(name="First Bite", type="First-to-Market")]}
+
+
+def test_valid_report_has_no_problems():
+    data, errors = parse_report(json.dumps(REPORT), known_signals={"CTX-12"})
+    assert data == REPORT
+    assert errors == []
+
+
+def test_each_broken_field_is_reported():
+    report = {"report_intro": "", "offers": [
+        offer(type="Aggressive", impact=11, evidence_signals=["SIG-1", "CTX-99"]),
+        offer(name=" ", feasibility=True)
+    ]}
+
+    errors = validate_report(report, known_signals={"CTX-12"})
+
+    assert "report_intro must be a non-empty string" in errors
+    assert "offers[0].type must be one of ['Defensive', 'First-to-Market']" in errors
+    assert "offers[0].impact must be a number in [0, 10]" in errors
+    assert "offers[0].evidence_signals has malformed ID 'SIG-1' (expected CTX-<n>)" in errors
+    assert "offers[0].evidence_signals cites CTX-99, which is not among the provided signals" in errors
+    assert "offers[1].name must be a non-empty string" in errors
+    assert "offers[1].feasibility must be a number in [0, 10]" in errors
+    assert "offers must include a First-to-Market offer" in errors
+
+
+def test_syntax_errors_are_reported_not_raised():
+    data, errors = parse_report('{"report_intro": "cut off')
+    assert data is None
+    assert errors[0].startswith("invalid JSON:")
+
+    assert parse_offers("[]") == (None, ["top level must be a JSON object"])
+    assert parse_offers(json.dumps({"offers": [offer()]}), required_types=()) == ([offer()], [])
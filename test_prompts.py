@@ -0,0 +1,67 @@
+# test_prompts.py
+#
+# Budgeted prompt assembly: static instructions go first and unchanged,
+# sections are filled in priority order within the node budget, and an
+# oversized item is clipped only between whole JSON members, cells or words.
+
+import json
+
+from prompts import Section, _clip, assemble, compact_json, count_tokens, records_table
+
+
+def test_static_block_is_the_system_message_and_sections_follow_in_order():
+    prompt = assemble("trend", "STATIC RULES", [
+        Section("SECOND", ["b"], priority=1),
+        Section("FIRST", ["a"], priority=0)
+    ])
+
+    assert prompt.messages[0] == {"role": "system", "content": "STATIC RULES"}
+    user = prompt.messages[1]["content"]
+    assert user.index("SECOND:") < user.index("FIRST:")  # declaration order in the message
+    assert prompt.static_tokens == count_tokens("STATIC RULES")
+
+
+def test_budget_drops_the_weakest_items_of_the_lowest_priority_section():
+    rows = [f"signal {i} with some supporting evidence text" for i in range(200)]
+    prompt = assemble("trend", "rules", [
+        Section("KEY", ["must keep"], priority=0),
+        Section("ROWS", rows, priority=1)
+    ], budget=120)
+
+    user = prompt.messages[1]["content"]
+    assert "must keep" in user
+    assert rows[0] in user and rows[-1] not in user
+    assert prompt.omitted["ROWS"] > 0
+
+
+def test_clipped_json_keeps_whole_members():
+    offer = {"name": "Late Night Stack", "description": "word " * 60, "signal_ids": ["CTX-1", "MKT-2"]}
+    text = compact_json({"id": "OFF-1", "offer": offer, "tail": "x" * 400})
+
+    clipped = _clip(text, 150)
+    body, marker = clipped.rsplit(" ", 1)
+
+    assert marker == "…" and count_tokens(clipped) <= 150
+    assert json.loads(body) == {"id": "OFF-1", "offer": offer}
+
+
+def test_clipped_table_row_and_text_end_on_a_boundary():
+    header, (row,) = records_table([{"trend": "Late-Night Value " * 30, "season": "Fall", "action": "Act Now"}])
+    assert header == "trend|season|action"
+    assert _clip(row, 10) == ""  # the first cell alone does not fit
+
+    row = "Fall|" + "|".join(f"cell {i}" for i in range(100))
+    clipped = _clip(row, 30)
+    assert clipped.endswith(" …")
+    cells = clipped[:-2].split("|")
+    assert cells[0] == "Fall" and all(cell.startswith("cell ") for cell in cells[1:])
+
+    assert _clip("alpha beta gamma delta " * 50, 12).startswith("alpha beta")
+
+
+def test_oversized_single_json_item_is_clipped_not_dropped():
+    concept = compact_json({f"field_{i}": "value " * 10 for i in range(40)})
+    prompt = assemble("validate_batch", "rules", [Section("CONCEPTS", [concept])], budget=200)
+
+    kept = prompt.messages[1]["content"].split("CONCEPTS:\n", 1)[1]
+    assert json.loads(kept.rsplit(" ", 1)[0])
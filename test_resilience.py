@@ -0,0 +1,154 @@
+# test_resilience.py
+#
+# ResilientCaller against scripted completions: transient failures retry
+# within the shared retry budget, the deadline bounds retries and attempts,
+# and a hedged node answers from the duplicate when the primary stalls.
+
+import asyncio
+import itertools
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from resilience import CallPolicy, DeadlineExceeded, ResilientCaller
+
+
+class GatewayError(Exception):
+    def __init__(self, status_code, retry_after=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        headers = {"retry-after": retry_after} if retry_after is not None else {}
+        self.response = SimpleNamespace(headers=headers)
+
+
+class Scripted:
+    """create() raises / returns the scripted outcomes in order, recording each call's kwargs."""
+
+    def __init__(self, *outcomes):
+        self.outcomes = iter(outcomes)
+        self.calls = []
+
+    def create(self, **kwargs):
+        self.calls.append(kwargs)
+        outcome = next(self.outcomes)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+FAST = CallPolicy(deadline_seconds=5, max_retries=3, backoff_base=0)
+
+
+def test_transient_failures_are_retried():
+    caller = ResilientCaller(default=FAST)
+    gateway = Scripted(GatewayError(503), GatewayError(429), "ok")
+
+    assert caller.wrap("cust", gateway).create(model="m") == "ok"
+    assert len(gateway.calls) == 3
+    assert caller.stats["cust.retries"] == 2
+
+
+def test_client_errors_are_not_retried():
+    caller = ResilientCaller(default=FAST)
+    gateway = Scripted(GatewayError(400), "unreached")
+
+    with pytest.raises(GatewayError):
+        caller.wrap("cust", gateway).create(model="m")
+    assert len(gateway.calls) == 1
+
+
+def test_shared_retry_budget_caps_retries_across_calls():
+    caller = ResilientCaller(default=FAST, retry_budget=2, retry_ratio=0)
+    gateway = Scripted(*[GatewayError(503)] * 10)
+    completions = caller.wrap("design", gateway)
+
+    for _ in range(2):
+        with pytest.raises(GatewayError):
+            completions.create(model="m")
+
+    # First call: 2 retries drain the budget; the second call fails on its first attempt
+    assert len(gateway.calls) == 4
+    assert caller.stats["retries"] == 2
+    assert caller.stats["retry_budget_exhausted"] == 2
+
+
+def test_each_attempt_gets_the_time_left_and_a_call_timeout_tightens_it():
+    caller = ResilientCaller(default=FAST)
+    gateway = Scripted("ok")
+
+    caller.wrap("trend", gateway).create(model="m", timeout=0.5)
+    assert 0 < gateway.calls[0]["timeout"] <= 0.5
+
+
+def test_retry_after_past_the_deadline_raises_deadline_exceeded():
+    caller = ResilientCaller(default=CallPolicy(deadline_seconds=1, backoff_base=0))
+    gateway = Scripted(GatewayError(429, retry_after="30"), "unreached")
+
+    with pytest.raises(DeadlineExceeded, match="while retrying"):
+        caller.wrap("cust", gateway).create(model="m")
+    assert len(gateway.calls) == 1
+    assert caller.stats["cust.deadline_exceeded"] == 1
+
+
+HEDGED = CallPolicy(deadline_seconds=5, hedge=True, hedge_min_samples=1, hedge_min_delay=0.05)
+
+
+class StallFirst:
+    """The first request hangs (until released); later ones answer at once."""
+
+    def __init__(self):
+        self.count = itertools.count()
+        self.release = threading.Event()
+
+    def create(self, **kwargs):
+        if next(self.count) == 0:
+            self.release.wait(5)
+            return "primary"
+        return "hedge"
+
+
+def test_hedge_answers_when_the_primary_stalls():
+    caller = ResilientCaller(policies={"design": HEDGED})
+    caller.wrap("design", Scripted("warm")).create(model="m")   # one latency sample enables hedging
+    assert caller.hedge_delay("design") == pytest.approx(0.05, abs=0.05)
+
+    gateway = StallFirst()
+    start = time.monotonic()
+    try:
+        assert caller.wrap("design", gateway).create(model="m") == "hedge"
+    finally:
+        gateway.release.set()
+
+    assert time.monotonic() - start < 1
+    assert caller.stats["design.hedges_fired"] == 1
+    assert caller.stats["design.hedges_won"] == 1
+
+
+def test_async_hedge_cancels_the_stalled_primary():
+    caller = ResilientCaller(policies={"design": HEDGED})
+    caller._record("design", 0.01)
+    cancelled = []
+
+    class AsyncStallFirst:
+        count = itertools.count()
+
+        async def create(self, **kwargs):
+            if next(self.count) == 0:
+                try:
+                    await asyncio.sleep(5)
+                except asyncio.CancelledError:
+                    cancelled.append(True)
+                    raise
+                return "primary"
+            return "hedge"
+
+    async def run():
+        result = await caller.wrap_async("design", AsyncStallFirst()).create(model="m")
+        await asyncio.sleep(0)   # let the cancellation land
+        return result
+
+    assert asyncio.run(run()) == "hedge"
+    assert cancelled == [True]
+    assert caller.stats["design.hedges_won"] == 1
@@ -0,0 +1,52 @@
+# test_scenarios.py
+#
+# Batch scenario mode: per-scenario competitor intel is exactly what
+# competitor_analyst_node returns for that selection, and scenarios with
+# the same gap set share one design run.
+
+import pandas as pd
+import pytest
+
+import engine
+from scenarios import _competitor_signals, run_scenarios, scenario_combinations, scenario_competitor_intel
+
+OPTIONS = ["BOGO", "Loyalty Multiplier", "Biggie Bag"]
+
+
+def test_combinations_cover_every_subset():
+    combos = scenario_combinations(OPTIONS)
+    assert len(combos) == 8 and len(set(combos)) == 8
+    assert combos[0] == () and combos[-1] == tuple(sorted(OPTIONS))
+
+
+@pytest.mark.parametrize("seed", [0, 5])
+def test_intel_matches_competitor_node(seed):
+    scenarios = scenario_combinations(OPTIONS)
+    group_of, intel = scenario_competitor_intel(_competitor_signals(seed), scenarios)
+
+    for scenario, group in zip(scenarios, group_of):
+        expected = engine.competitor_analyst_node({"wendys_active": list(scenario), "signal_seed": seed})["competitor_intel"]
+        got = intel[group]
+        assert got["summary"] == expected["summary"]
+        pd.testing.assert_frame_equal(got["threats"], expected["threats"])
+        pd.testing.assert_frame_equal(got["raw"].to_pandas(), expected["raw"].to_pandas())
+
+
+def test_same_gap_set_shares_a_group():
+    # Biggie Bag is not a competitor mechanic, so it never changes the gap set
+    scenarios = [(), ("Biggie Bag",), ("BOGO",), ("BOGO", "Biggie Bag")]
+    group_of, intel = scenario_competitor_intel(_competitor_signals(1), scenarios)
+
+    assert group_of[0] == group_of[1] and group_of[2] == group_of[3] and group_of[0] != group_of[2]
+    assert len(intel) == 2
+
+
+def test_run_scenarios_designs_once_per_gap_set(engine_runtime, llm_gateway):
+    before = llm_gateway.requests.count
+    results = run_scenarios([(), ("Biggie Bag",), ("BOGO",)], signal_seed=2)
+
+    assert results[()]["scenario_group"] == results[("Biggie Bag",)]["scenario_group"]
+    assert results[()]["structured_concepts"] == results[("Biggie Bag",)]["structured_concepts"]
+    assert results[("BOGO",)]["wendys_active"] == ["BOGO"]
+    # Shared cust + trend once, then design + validate per distinct gap set
+    assert llm_gateway.requests.count - before == 2 + 2 * 2
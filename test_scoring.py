@@ -0,0 +1,76 @@
+# test_scoring.py
+#
+# Row-level scorers: the vectorized threat table and the top-K context
+# windows match the original loops they replaced.
+
+import pandas as pd
+import pytest
+
+from bench_context_windows import legacy_windows, weighted_signals
+from bench_threat_scoring import check_parity, legacy_threats, weighted_gaps
+from scoring import THREAT_COLUMNS, THREAT_SCORE_CAP, score_competitor_threats, score_context_windows
+
+
+@pytest.mark.parametrize("rows", [5, 500, 20_000])
+@pytest.mark.parametrize("seed", [0, 42])
+def test_threats_match_per_mechanic_loop(rows, seed):
+    gaps = weighted_gaps(rows, seed=seed)
+    table, summary = score_competitor_threats(gaps)
+
+    check_parity(gaps, legacy_threats(gaps), table)
+    assert list(table.columns) == THREAT_COLUMNS
+    assert summary.count("\n") == len(table) - 1
+
+
+def test_threats_accept_plain_string_columns():
+    gaps = pd.DataFrame({
+        "id": ["a", "b", "c", "d"],
+        "brand": ["Taco Bell", "Burger King", "Burger King", "Taco Bell"],
+        "mechanic": ["BOGO", "BOGO", "BOGO", "Loyalty Multiplier"],
+        "weight": [0.5, 0.25, 0.5, 1.0]
+    })
+    table, summary = score_competitor_threats(gaps)
+
+    assert table[["mechanic", "top_brand", "score", "trace_id"]].values.tolist() == [
+        ["BOGO", "Burger King", 1.2, "a"],
+        ["Loyalty Multiplier", "Taco Bell", 1.0, "d"]
+    ]
+    assert summary.splitlines()[0] == "BOGO driven by Burger King (Threat: 1.2/10) [Ref ID: a]"
+
+
+def test_threat_score_is_capped():
+    gaps = pd.DataFrame({"id": list("abc"), "brand": ["Taco Bell"] * 3, "mechanic": ["BOGO"] * 3, "weight": [6.0] * 3})
+    table, _ = score_competitor_threats(gaps)
+
+    assert table["raw_score"].iloc[0] == 18.0
+    assert table["score"].iloc[0] == THREAT_SCORE_CAP
+
+
+def test_no_gaps_no_threats():
+    table, summary = score_competitor_threats(pd.DataFrame(columns=["id", "brand", "mechanic", "weight"]))
+    assert table.empty and list(table.columns) == THREAT_COLUMNS
+    assert summary == ""
+
+
+@pytest.mark.parametrize("rows", [10, 900, 50_000])
+@pytest.mark.parametrize("seed", [0, 42])
+def test_context_windows_match_group_loop(rows, seed):
+    df = weighted_signals(rows, seed=seed)
+    assert score_context_windows(df) == legacy_windows(df)
+
+
+def test_context_windows_extra_dimension_and_k():
+    df = weighted_signals(5_000, seed=1)
+    windows = score_context_windows(df, dims=["trend_type", "source"], k=3)
+
+    assert len(windows) == 3
+    assert set(windows[0]) == {"signal_id", "trend", "source", "timing_strength", "relevance_score", "confidence", "action"}
+    assert windows[0]["relevance_score"] == 10.0
+    scores = [window["relevance_score"] for window in windows]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_context_windows_without_weight_are_empty():
+    df = weighted_signals(100, seed=0)
+    assert score_context_windows(df.iloc[:0]) == []
+    assert score_context_windows(df.assign(weight=0.0)) == []
@@ -0,0 +1,97 @@
+# test_signal_aggregator.py
+#
+# The streaming aggregator must match scoring the in-window rows directly,
+# across batches, time advances and partial window eviction.
+
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from scoring import RECENCY_DECAY, score_competitor_threats, score_context_windows
+from signal_aggregator import DecayedSignalAggregator
+from signal_generator import (
+    COMPETITOR_WINDOW_DAYS,
+    MARKET_WINDOW_DAYS,
+    generate_competitor_signals,
+    generate_market_signals
+)
+
+TODAY = date(2026, 1, 24)
+
+
+def direct(competitor, market, today, wendys_active):
+    """(threat summary, context windows) scored straight from the rows still in window."""
+    comp_age = (pd.Timestamp(today) - competitor["obs_date"]).dt.days
+    comp = competitor[comp_age <= COMPETITOR_WINDOW_DAYS]
+    comp = comp.assign(weight=np.exp(-RECENCY_DECAY * comp_age[comp.index]))
+    _, summary = score_competitor_threats(comp[~comp["mechanic"].isin(wendys_active)])
+
+    mkt_age = (pd.Timestamp(today) - market["observed_date"]).dt.days
+    mkt = market[mkt_age <= MARKET_WINDOW_DAYS]
+    mkt = mkt.assign(weight=np.exp(-RECENCY_DECAY * mkt_age[mkt.index]))
+    return summary, score_context_windows(mkt)
+
+
+def filled(competitor, market, as_of, batches=2):
+    aggregator = DecayedSignalAggregator(as_of)
+    for part in np.array_split(np.arange(len(competitor)), batches):
+        aggregator.add_competitor_batch(competitor.iloc[part])
+    for part in np.array_split(np.arange(len(market)), batches):
+        aggregator.add_market_batch(market.iloc[part])
+    return aggregator
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_batches_and_advance_match_direct_scoring(seed):
+    competitor = generate_competitor_signals(TODAY, seed=seed)
+    market = generate_market_signals(TODAY, seed=seed)
+
+    aggregator = filled(competitor, market, TODAY - timedelta(days=30))
+    aggregator.advance(TODAY)
+
+    summary, windows = direct(competitor, market, TODAY, ["BOGO"])
+    assert aggregator.competitor_intel(["BOGO"])["summary"] == summary
+    assert aggregator.market_context_windows() == windows
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_partial_eviction_matches_direct_scoring(seed):
+    competitor = generate_competitor_signals(TODAY, seed=seed)
+    market = generate_market_signals(TODAY, seed=seed)
+    later = TODAY + timedelta(days=30)
+
+    aggregator = filled(competitor, market, TODAY)
+    aggregator.advance(later)
+
+    # Windows whose first row aged out must cite their first row still in window
+    summary, windows = direct(competitor, market, later, [])
+    assert aggregator.competitor_intel([])["summary"] == summary
+    assert aggregator.market_context_windows() == windows
+
+
+def test_full_eviction_empties_outputs():
+    aggregator = filled(generate_competitor_signals(TODAY, seed=0), generate_market_signals(TODAY, seed=0), TODAY)
+    aggregator.advance(TODAY + timedelta(days=MARKET_WINDOW_DAYS + 1))
+
+    assert aggregator.competitor_intel([])["summary"] == ""
+    assert aggregator.market_context_windows() == []
+
+
+def test_state_round_trip_keeps_scoring_and_advancing():
+    aggregator = filled(generate_competitor_signals(TODAY, size=3_000, seed=1),
+                        generate_market_signals(TODAY, size=3_000, seed=1), TODAY)
+    restored = DecayedSignalAggregator.from_state(aggregator.to_state())
+
+    for step in (0, 5, 90):
+        aggregator.advance(TODAY + timedelta(days=step))
+        restored.advance(TODAY + timedelta(days=step))
+        assert restored.competitor_intel(["BOGO"])["summary"] == aggregator.competitor_intel(["BOGO"])["summary"]
+        assert restored.market_context_windows() == aggregator.market_context_windows()
+
+
+def test_moving_back_in_time_is_rejected():
+    aggregator = DecayedSignalAggregator(TODAY)
+    with pytest.raises(ValueError):
+        aggregator.advance(TODAY - timedelta(days=1))
@@ -0,0 +1,72 @@
+# test_signal_cube.py
+#
+# The day-bucketed cube must reproduce the row-level scorers exactly.
+
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from scoring import RECENCY_DECAY, score_competitor_threats, score_context_windows
+from signal_cube import SignalCube
+from signal_generator import generate_competitor_signals, generate_market_signals
+
+TODAY = date(2026, 1, 24)
+WENDYS_ACTIVE = ["BOGO"]
+
+
+def weighted(df, date_col, today=TODAY, decay=RECENCY_DECAY, window_days=None):
+    ages = (pd.Timestamp(today) - df[date_col]).dt.days
+    if window_days is not None:
+        df, ages = df[(ages >= 0) & (ages <= window_days)], ages[(ages >= 0) & (ages <= window_days)]
+    return df.assign(weight=np.exp(-decay * ages))
+
+
+@pytest.mark.parametrize("rows", [10, 900, 50_000])
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_matches_row_scorers(rows, seed):
+    competitor = generate_competitor_signals(TODAY, size=rows, seed=seed)
+    market = generate_market_signals(TODAY, size=rows, seed=seed)
+    cube = SignalCube.from_frames(competitor, market)
+
+    comp = weighted(competitor, "obs_date")
+    table, summary = score_competitor_threats(comp[~comp["mechanic"].isin(WENDYS_ACTIVE)])
+    intel = cube.competitor_intel(WENDYS_ACTIVE, TODAY)
+
+    assert intel["summary"] == summary
+    assert intel["threats"]["mechanic"].tolist() == table["mechanic"].tolist()
+    assert cube.market_context_windows(TODAY) == score_context_windows(weighted(market, "observed_date"))
+
+
+def test_chunked_adds_match_one_batch():
+    competitor = generate_competitor_signals(TODAY, size=5_000, seed=3)
+    market = generate_market_signals(TODAY, size=5_000, seed=3)
+    whole = SignalCube.from_frames(competitor, market)
+
+    chunked = SignalCube()
+    for start in range(0, 5_000, 700):
+        chunked.add_competitor_batch(competitor.iloc[start:start + 700])
+        chunked.add_market_batch(market.iloc[start:start + 700])
+
+    assert chunked.competitor_intel(WENDYS_ACTIVE, TODAY)["summary"] == whole.competitor_intel(WENDYS_ACTIVE, TODAY)["summary"]
+    assert chunked.market_context_windows(TODAY) == whole.market_context_windows(TODAY)
+
+
+def test_rescore_at_new_date_decay_and_window():
+    market = generate_market_signals(TODAY, size=20_000, seed=4)
+    cube = SignalCube.from_frames(generate_competitor_signals(TODAY, size=10, seed=4), market)
+    shifted = TODAY - timedelta(days=7)
+
+    expected = score_context_windows(weighted(market, "observed_date", today=shifted, decay=0.08, window_days=30))
+    assert cube.market_context_windows(shifted, decay=0.08, window_days=30) == expected
+
+
+def test_decay_sweep_matches_per_decay_weights():
+    cube = SignalCube.from_frames(generate_competitor_signals(TODAY, size=10, seed=5),
+                                  generate_market_signals(TODAY, size=20_000, seed=5))
+    decays = np.array([0.01, 0.05, 0.2])
+
+    swept = cube.context_weights(TODAY, decay=decays)
+    for i, decay in enumerate(decays):
+        np.testing.assert_allclose(swept[..., i], cube.context_weights(TODAY, decay=decay))
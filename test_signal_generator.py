@@ -0,0 +1,75 @@
+# test_signal_generator.py
+#
+# Seeded bulk generation: the same seed gives the same frames, the three
+# generators draw from independent streams, and every value stays inside
+# its vocabulary and look-back window.
+
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from signal_generator import (
+    COMPETITOR_BRANDS,
+    COMPETITOR_MECHANICS,
+    COMPETITOR_WINDOW_DAYS,
+    MARKET_WINDOW_DAYS,
+    TREND_TYPES,
+    _COMPETITOR_STREAM,
+    _MARKET_STREAM,
+    _REDEMPTION_STREAM,
+    _rng,
+    generate_competitor_signals,
+    generate_market_signals,
+    generate_redemption_logs
+)
+
+TODAY = date(2026, 1, 24)
+
+
+@pytest.mark.parametrize("generate", [
+    lambda seed: generate_competitor_signals(TODAY, size=2_000, seed=seed),
+    lambda seed: generate_market_signals(TODAY, size=2_000, seed=seed),
+    lambda seed: generate_redemption_logs(size=2_000, seed=seed)
+])
+def test_same_seed_same_frame(generate):
+    pd.testing.assert_frame_equal(generate(11), generate(11))
+    assert not generate(11).equals(generate(12))
+
+
+def test_generators_draw_from_independent_streams():
+    children = np.random.SeedSequence(3).spawn(3)
+    draws = [_rng(3, stream).integers(0, 2**32, size=8) for stream in (_COMPETITOR_STREAM, _MARKET_STREAM, _REDEMPTION_STREAM)]
+
+    for child, draw in zip(children, draws):
+        np.testing.assert_array_equal(np.random.default_rng(child).integers(0, 2**32, size=8), draw)
+    assert len({tuple(draw) for draw in draws}) == 3
+
+
+def test_competitor_schema_and_window():
+    df = generate_competitor_signals(TODAY, size=10_000, seed=0)
+
+    assert list(df.columns) == ["id", "brand", "mechanic", "obs_date"]
+    assert list(df["brand"].cat.categories) == COMPETITOR_BRANDS
+    assert list(df["mechanic"].cat.categories) == COMPETITOR_MECHANICS
+    assert df["id"].str.fullmatch(r"[0-9a-f]{8}").all()
+    ages = (pd.Timestamp(TODAY) - df["obs_date"]).dt.days
+    assert ages.between(0, COMPETITOR_WINDOW_DAYS).all()
+    assert {ages.min(), ages.max()} == {0, COMPETITOR_WINDOW_DAYS}
+
+
+def test_market_schema_and_window():
+    df = generate_market_signals(TODAY, size=10_000, seed=0)
+
+    assert list(df.columns) == ["trend_type", "season", "daypart", "situation", "source", "observed_date"]
+    assert list(df["trend_type"].cat.categories) == TREND_TYPES
+    assert (pd.Timestamp(TODAY) - df["observed_date"]).dt.days.between(0, MARKET_WINDOW_DAYS).all()
+
+
+def test_redemption_logs_are_boolean_and_sized():
+    df = generate_redemption_logs(size=1_000, seed=0)
+
+    assert len(df) == 1_000
+    assert df["coupon_used"].dtype == np.bool_
+    assert 0.4 < df["coupon_used"].mean() < 0.6
@@ -0,0 +1,121 @@
+# test_tracing.py
+#
+# Per-node spans: one record per node run with status, state sizes and the
+# tokens of the LLM calls made inside it (streamed calls included); bounded
+# buckets; critical path.
+
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from checkpointing import run_config
+from tracing import DEFAULT_RUN_ID, Tracer, state_size
+
+
+def llm_node(tracer, prompt_tokens, completion_tokens):
+    def node(state):
+        usage = SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+        tracer.on_llm_response("node", SimpleNamespace(usage=usage))
+        tracer.on_llm_response("node", SimpleNamespace(usage=usage), cached=True)
+        return {"answer": "x" * 100}
+    return node
+
+
+def test_span_records_tokens_and_state_sizes(tmp_path):
+    tracer = Tracer(jsonl_path=str(tmp_path / "spans.jsonl"))
+    run_id = tracer.new_run_id()
+
+    tracer.wrap("design", llm_node(tracer, 30, 7))({"prompt": "y" * 50}, run_config(run_id))
+
+    [span] = tracer.spans(run_id)
+    assert (span["node"], span["status"], span["llm_calls"], span["cached_calls"]) == ("design", "ok", 2, 1)
+    assert (span["prompt_tokens"], span["completion_tokens"]) == (60, 14)
+    assert span["output_state_bytes"] == state_size({"answer": "x" * 100}) > 100
+    assert span["wall_s"] >= 0 and span["end_s"] >= span["start_s"]
+    assert json.loads((tmp_path / "spans.jsonl").read_text())["node"] == "design"
+
+
+def test_failed_node_records_an_error_span():
+    tracer = Tracer(track_memory=False)
+
+    def broken(state):
+        raise ValueError("bad JSON")
+
+    with pytest.raises(ValueError):
+        tracer.wrap("validate", broken)({})
+    [span] = tracer.spans()
+    assert span["status"] == "error" and "bad JSON" in span["error"]
+
+
+def test_calls_outside_a_span_are_ignored():
+    tracer = Tracer()
+    tracer.on_llm_response("node", SimpleNamespace(usage=None))
+    assert tracer.spans() == []
+
+
+def test_default_bucket_and_run_count_are_bounded():
+    tracer = Tracer(track_memory=False, max_runs=3, max_default_spans=5)
+    node = tracer.wrap("viz", lambda state: {})
+    for _ in range(12):
+        node({})
+    assert len(tracer.spans(DEFAULT_RUN_ID)) == 5
+
+    runs = [tracer.new_run_id() for _ in range(4)]
+    for run_id in runs:
+        node({}, run_config(run_id))
+    assert tracer.spans(runs[0]) == []
+    assert all(len(tracer.spans(run_id)) == 1 for run_id in runs[1:])
+
+
+def test_waterfall_marks_the_critical_path():
+    tracer = Tracer(track_memory=False)
+    run_id = tracer.new_run_id()
+
+    def sleeper(seconds):
+        return lambda state: time.sleep(seconds) or {}
+
+    tracer.wrap("comp", sleeper(0.01))({}, run_config(run_id))
+    tracer.wrap("slow", sleeper(0.05))({}, run_config(run_id))
+    tracer.wrap("viz", sleeper(0.0))({}, run_config(run_id))
+
+    waterfall = tracer.waterfall(run_id)
+    assert waterfall["node"].tolist() == ["comp", "slow", "viz"]
+    assert waterfall["critical"].tolist() == [True, True, True]
+
+
+def test_graph_run_traces_every_node(engine_runtime):
+    import engine
+
+    run_id = engine_runtime.tracer.new_run_id()
+    engine.build_app().invoke({"wendys_active": ["BOGO"], "signal_seed": 1}, run_config(run_id))
+
+    spans = {span["node"]: span for span in engine_runtime.tracer.spans(run_id)}
+    assert {"comp", "cust", "trend", "design", "validate", "viz"} <= set(spans)
+    for node in ("cust", "trend", "design", "validate"):
+        assert spans[node]["llm_calls"] == 1
+        assert spans[node]["prompt_tokens"] > 0 and spans[node]["completion_tokens"] > 0
+    assert spans["comp"]["llm_calls"] == 0
+
+
+@pytest.mark.parametrize("async_nodes", [False, True])
+def test_streamed_nodes_record_tokens(engine_runtime, async_nodes):
+    import engine
+
+    run_id = engine_runtime.tracer.new_run_id()
+    app = engine.build_app(async_nodes=async_nodes)
+    payload = {"wendys_active": ["BOGO"], "signal_seed": 1, "stream_tokens": True}
+    if async_nodes:
+        async def consume():
+            return [chunk async for chunk in app.astream(payload, run_config(run_id), stream_mode=["updates", "custom"])]
+        chunks = asyncio.run(consume())
+    else:
+        chunks = list(app.stream(payload, run_config(run_id), stream_mode=["updates", "custom"]))
+
+    assert {chunk["node"] for mode, chunk in chunks if mode == "custom"} >= {"trend", "design"}
+    spans = {span["node"]: span for span in engine_runtime.tracer.spans(run_id)}
+    for node in ("trend", "design"):
+        assert spans[node]["llm_calls"] == 1
+        assert spans[node]["prompt_tokens"] > 0 and spans[node]["completion_tokens"] > 0
@@ -0,0 +1,236 @@
+# tracing.py
+#
+# Per-node profiling and tracing for the compiled graph.
+#
+# Tracer.wrap is a node_wrapper for engine.build_graph: every node run emits
+# one span record with wall time, CPU time, peak traced-memory delta,
+# input/output state sizes and the prompt/completion tokens of the LLM
+# calls made inside it. Spans are kept in-process per run and optionally
+# appended to a JSONL file; waterfall() lays a run out on a timeline and
+# marks the critical path through the fan-out/fan-in graph.
+
+import contextvars
+import inspect
+import json
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import deque
+
+import pandas as pd
+
+from frames import TableRef
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+DEFAULT_RUN_ID = "default"
+
+# Containers larger than this are measured on a prefix sample and extrapolated
+_SIZE_SAMPLE = 64
+
+
+def _sampled(items, measure):
+    """Sum of measure(item), extrapolated from a prefix sample for large containers."""
+    n = len(items)
+    if n <= _SIZE_SAMPLE:
+        return sum(measure(item) for item in items)
+    sample = [measure(item) for _, item in zip(range(_SIZE_SAMPLE), items)]
+    return int(sum(sample) * n / _SIZE_SAMPLE)
+
+
+def state_size(obj, _depth=0) -> int:
+    """Approximate in-memory size (bytes) of a state value."""
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(index=True, deep=True).sum())
+    if isinstance(obj, pd.Series):
+        return int(obj.memory_usage(index=True, deep=True))
+    if isinstance(obj, TableRef):
+        return obj.nbytes
+    if isinstance(obj, str):
+        return len(obj.encode("utf-8"))
+    if _depth > 6:
+        return sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + _sampled(
+            obj.items(), lambda kv: state_size(kv[0], _depth + 1) + state_size(kv[1], _depth + 1)
+        )
+    if isinstance(obj, (list, tuple, set)):
+        return sys.getsizeof(obj) + _sampled(obj, lambda v: state_size(v, _depth + 1))
+    return sys.getsizeof(obj)
+
+
+def run_id_from_config(config) -> str:
+    """Run ID from config["configurable"] ("run_id", else "thread_id")."""
+    configurable = (config or {}).get("configurable", {})
+    return str(configurable.get("run_id") or configurable.get("thread_id") or DEFAULT_RUN_ID)
+
+
+class Tracer:
+    """
+    Collects span records for every node run.
+
+    The newest max_runs runs are kept. Invocations without a run_id / thread_id
+    all share the DEFAULT_RUN_ID bucket, which only keeps its newest
+    max_default_spans spans, so plain app.invoke loops stay bounded.
+    """
+
+    def __init__(self, jsonl_path=None, track_memory=True, max_runs=256, max_default_spans=1024):
+        self.jsonl_path = jsonl_path
+        self.track_memory = track_memory
+        self.max_runs = max_runs
+        self.max_default_spans = max_default_spans
+
+        self._runs = {}                  # run_id -> [span, ...] (a bounded deque for DEFAULT_RUN_ID)
+        self._run_started = {}           # run_id -> perf_counter at run start
+        self._lock = threading.Lock()
+
+    # ---------------------------------------------------
+    # RUN LIFECYCLE
+    # ---------------------------------------------------
+    def new_run_id(self) -> str:
+        """Registers a run; pass it as config={"configurable": {"run_id": ...}}."""
+        run_id = uuid.uuid4().hex[:12]
+        with self._lock:
+            self._run_started[run_id] = time.perf_counter()
+            self._trim()
+        return run_id
+
+    def _trim(self):
+        while len(self._run_started) > self.max_runs:
+            oldest = next(iter(self._run_started))
+            self._run_started.pop(oldest)
+            self._runs.pop(oldest, None)
+
+    # ---------------------------------------------------
+    # LLM ACCOUNTING (CachedChatClient observer)
+    # ---------------------------------------------------
+    def on_llm_response(self, node, response, cached=False):
+        span = _current_span.get()
+        if span is None:
+            return
+        usage = getattr(response, "usage", None)
+        span["llm_calls"] += 1
+        span["cached_calls"] += int(cached)
+        if usage is not None:
+            span["prompt_tokens"] += usage.prompt_tokens or 0
+            span["completion_tokens"] += usage.completion_tokens or 0
+
+    # ---------------------------------------------------
+    # NODE WRAPPING
+    # ---------------------------------------------------
+    def wrap(self, name, fn):
+        """node_wrapper(name, fn) -> fn that records one span per call."""
+        tracer = self
+
+        if inspect.iscoroutinefunction(fn):
+            async def traced_async(state, config=None):
+                span, token = tracer._open(name, state, config)
+                try:
+                    result = await fn(state)
+                except BaseException as exc:
+                    tracer._close(span, token, None, exc)
+                    raise
+                tracer._close(span, token, result, None)
+                return result
+
+            traced_async.__name__ = getattr(fn, "__name__", name)
+            return traced_async
+
+        def traced(state, config=None):
+            span, token = tracer._open(name, state, config)
+            try:
+                result = fn(state)
+            except BaseException as exc:
+                tracer._close(span, token, None, exc)
+                raise
+            tracer._close(span, token, result, None)
+            return result
+
+        # No functools.wraps: LangGraph must see the (state, config) signature
+        traced.__name__ = getattr(fn, "__name__", name)
+        return traced
+
+    def _open(self, name, state, config):
+        run_id = run_id_from_config(config)
+        now = time.perf_counter()
+        with self._lock:
+            started = self._run_started.setdefault(run_id, now)
+            self._trim()
+
+        span = {
+            "run_id": run_id,
+            "node": name,
+            "timestamp": time.time(),
+            "start_s": now - started,
+            "input_state_bytes": state_size(dict(state)),
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "llm_calls": 0,
+            "cached_calls": 0,
+            "_t0": now,
+            "_cpu0": time.thread_time()
+        }
+        if self.track_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            # Process-wide: overlapping spans share the same peak counter
+            tracemalloc.reset_peak()
+            span["_mem0"] = tracemalloc.get_traced_memory()[0]
+
+        return span, _current_span.set(span)
+
+    def _close(self, span, token, result, error):
+        _current_span.reset(token)
+
+        end = time.perf_counter()
+        span["wall_s"] = end - span.pop("_t0")
+        span["end_s"] = span["start_s"] + span["wall_s"]
+        span["cpu_s"] = time.thread_time() - span.pop("_cpu0")
+        if "_mem0" in span:
+            span["mem_peak_delta_bytes"] = max(0, tracemalloc.get_traced_memory()[1] - span.pop("_mem0"))
+        span["output_state_bytes"] = state_size(result) if result is not None else 0
+        span["status"] = "error" if error is not None else "ok"
+        if error is not None:
+            span["error"] = repr(error)
+
+        with self._lock:
+            run_id = span["run_id"]
+            if run_id not in self._runs:
+                self._runs[run_id] = deque(maxlen=self.max_default_spans) if run_id == DEFAULT_RUN_ID else []
+            self._runs[run_id].append(span)
+            if self.jsonl_path:
+                with open(self.jsonl_path, "a", encoding="utf-8") as fh:
+                    fh.write(json.dumps(span, default=str) + "\n")
+
+    # ---------------------------------------------------
+    # IN-PROCESS API
+    # ---------------------------------------------------
+    def spans(self, run_id=DEFAULT_RUN_ID) -> list:
+        with self._lock:
+            return [dict(s) for s in self._runs.get(run_id, [])]
+
+    def waterfall(self, run_id=DEFAULT_RUN_ID) -> pd.DataFrame:
+        """
+        Spans of one run ordered by start time, with a `critical` flag.
+
+        The critical path is walked back from the last span to finish: each
+        node was gated by the latest span that finished before it started.
+        LangGraph runs in supersteps, so that blocker may be a parallel
+        branch rather than a direct graph predecessor.
+        """
+        df = pd.DataFrame(self.spans(run_id))
+        if df.empty:
+            return df
+
+        df = df.sort_values("start_s").reset_index(drop=True)
+        df["critical"] = False
+
+        current = df["end_s"].idxmax()
+        while current is not None:
+            df.loc[current, "critical"] = True
+            done = df[df["end_s"] <= df.loc[current, "start_s"]]
+            current = done["end_s"].idxmax() if not done.empty else None
+
+        return df